@@ -0,0 +1,358 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Asynchronous (asyncio) access to the Ansible Tower API.
+
+This module requires Python 3.5 or later and the optional `aiohttp`
+library, and is never imported by the rest of tower-cli. Use it like so:
+
+    async with AsyncClient(concurrency=20) as client:
+        jobs = get_resource('job', client)
+        result = await jobs.monitor(42)
+
+Requests are made with the settings of the thread running the event loop,
+so `settings.runtime_values` (or an `api.Context`) works as it does for
+the synchronous API.
+"""
+
+import asyncio
+import base64
+import json
+import math
+import time
+
+import six
+
+from sdict import adict
+
+import tower_cli
+from tower_cli.api import check_response, connection_error, url_prefix
+from tower_cli.conf import settings
+from tower_cli.utils import debug, exceptions as exc
+from tower_cli.utils.data_structures import OrderedDict
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is optional.
+    aiohttp = None
+
+
+class AsyncResponse(object):
+    """The response to a request made with `AsyncClient`, offering the
+    parts of the `requests` response interface that tower-cli uses.
+    """
+    def __init__(self, method, url, status_code, content):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+
+    def json(self, **kwargs):
+        kwargs.setdefault('object_pairs_hook', OrderedDict)
+        return json.loads(self.content.decode('utf8'), **kwargs)
+
+
+class AsyncClient(object):
+    """The asynchronous counterpart of `tower_cli.api.Client`.
+
+    At most `concurrency` requests are in flight at any time; further
+    requests wait their turn. The client must be closed when done, either
+    with `close` or by using it as an asynchronous context manager.
+    """
+    def __init__(self, concurrency=10):
+        if aiohttp is None:
+            raise exc.TowerCLIError('The asynchronous client requires the '
+                                    'aiohttp library.')
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def prefix(self):
+        """Return the appropriate URL prefix to prepend to requests,
+        based on the host provided in settings.
+        """
+        return url_prefix(settings.host)
+
+    @property
+    def session(self):
+        # The session and semaphore are created lazily, since they must be
+        # created from within a running event loop.
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method, url, params=None, data=None,
+                            headers=None):
+        """Make a request to the Ansible Tower API, and return the
+        response.
+
+        Errors are reported with the same exceptions as
+        `tower_cli.api.Client.request`.
+        """
+        # Piece together the full URL.
+        url = '%s%s' % (self.prefix, url.lstrip('/'))
+
+        # Query string values are sent as text, as `requests` does.
+        params = dict([(k, six.text_type(v))
+                       for k, v in (params or {}).items()])
+
+        # Ansible Tower expects authenticated requests; add the
+        # authentication from settings.
+        headers = dict(headers or {})
+        credentials = '%s:%s' % (settings.username, settings.password)
+        headers.setdefault('Authorization', 'Basic %s' % base64.b64encode(
+            credentials.encode('utf8')).decode('ascii'))
+
+        # POST and PUT requests will send JSON by default.
+        if method.upper() in ('PATCH', 'POST', 'PUT'):
+            headers.setdefault('Content-Type', 'application/json')
+
+        # If debugging is on, print the URL and data being sent.
+        debug.log('%s %s' % (method, url), fg='blue', bold=True)
+        if method in ('POST', 'PUT', 'PATCH'):
+            debug.log('Data: %s' % (data or {}), fg='blue', bold=True)
+        if method == 'GET' or params:
+            debug.log('Params: %s' % params, fg='blue', bold=True)
+        debug.log('')
+
+        # If this is a JSON request, encode the data value.
+        if headers.get('Content-Type', '') == 'application/json':
+            data = json.dumps(data or {})
+
+        session = self.session
+        async with self._semaphore:
+            try:
+                async with session.request(method, url, params=params,
+                                           data=data, headers=headers,
+                                           ssl=False) as r:
+                    content = await r.read()
+            except aiohttp.ClientConnectionError as ex:
+                raise connection_error(ex)
+
+        # Raise an appropriate exception if the server reports an error.
+        check_response(method, url, r.status, content, params=params,
+                       data=data)
+        return AsyncResponse(method, url, r.status, content)
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, data=None, **kwargs):
+        return await self.request('POST', url, data=data, **kwargs)
+
+    async def patch(self, url, data=None, **kwargs):
+        return await self.request('PATCH', url, data=data, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request('DELETE', url, **kwargs)
+
+
+class AsyncResource(object):
+    """The asynchronous counterpart of a `tower_cli.models.Resource`,
+    wrapping the resource and making its requests with an `AsyncClient`.
+
+    The methods here accept the same arguments and return the same values
+    as their synchronous equivalents.
+    """
+    def __init__(self, resource, client):
+        self.resource = resource
+        self.client = client
+
+    async def read(self, pk=None, fail_on_no_results=False,
+                         fail_on_multiple_results=False, **kwargs):
+        """Retrieve and return objects from the Ansible Tower API."""
+        url, params = self.resource._read_request(pk, kwargs)
+        r = await self.client.get(url, params=params)
+        return self.resource._read_response(pk, r.json(), fail_on_no_results,
+                                            fail_on_multiple_results)
+
+    async def get(self, pk=None, **kwargs):
+        """Return one and exactly one object."""
+        kwargs.pop('include_debug_header', None)
+        response = await self.read(pk=pk, fail_on_no_results=True,
+                                   fail_on_multiple_results=True, **kwargs)
+        return response['results'][0]
+
+    async def list(self, all_pages=False, **kwargs):
+        """Return a list of objects.
+
+        If `all_pages` is set, the remaining pages are retrieved
+        concurrently once the first page gives the total count.
+        """
+        if all_pages:
+            kwargs.pop('page', None)
+        response = self.resource._normalize_pages(await self.read(**kwargs))
+        if not all_pages or not response['next']:
+            return response
+
+        # Determine how many pages there are, and get the rest of them.
+        total_pages = int(math.ceil(response['count'] /
+                                    float(len(response['results']))))
+        pages = await asyncio.gather(*[
+            self.read(**dict(kwargs, page=page))
+            for page in range(response['next'], total_pages + 1)
+        ])
+        for page in pages:
+            response['results'] += page['results']
+        response['next'] = None
+        return response
+
+    async def write(self, pk=None, create_on_missing=False,
+                          fail_on_found=False, force_on_exists=True, **kwargs):
+        """Modify the given object using the Ansible Tower API."""
+        self.resource._clean_kwargs(kwargs)
+
+        # Determine which record we are writing, and get its existing data.
+        if not pk:
+            existing_data = await self._lookup(
+                fail_on_found=fail_on_found,
+                fail_on_missing=not create_on_missing,
+                **kwargs
+            )
+            if existing_data:
+                pk = existing_data['id']
+        else:
+            existing_data = await self.get(pk)
+
+        # Decide whether a write is needed at all, and if so, do it.
+        answer = self.resource._write_plan(pk, existing_data,
+                                           force_on_exists, kwargs)
+        if answer is not None:
+            return answer
+        url, method = self.resource._write_request(pk)
+        r = await self.client.request(method, url, data=kwargs)
+        return self.resource._write_response(r.json())
+
+    async def create(self, fail_on_found=False, force_on_exists=False,
+                           **kwargs):
+        """Create an object."""
+        return await self.write(create_on_missing=True,
+                                fail_on_found=fail_on_found,
+                                force_on_exists=force_on_exists, **kwargs)
+
+    async def modify(self, pk=None, create_on_missing=False, **kwargs):
+        """Modify an already existing object."""
+        force_on_exists = kwargs.pop('force_on_exists', True)
+        return await self.write(pk, create_on_missing=create_on_missing,
+                                force_on_exists=force_on_exists, **kwargs)
+
+    async def delete(self, pk=None, fail_on_missing=False, **kwargs):
+        """Remove the given object."""
+        if not pk:
+            existing_data = await self._lookup(
+                fail_on_missing=fail_on_missing, **kwargs)
+            if not existing_data:
+                return {'changed': False}
+            pk = existing_data['id']
+
+        try:
+            await self.client.delete('%s%d/' % (self.resource.endpoint, pk))
+            return {'changed': True}
+        except exc.NotFound:
+            if fail_on_missing:
+                raise
+            return {'changed': False}
+
+    async def status(self, pk, detail=False):
+        """Return the current status of a job, or of the current (or most
+        recent) update of a project or inventory source.
+        """
+        record = (await self.client.get('%s%d/' % (self.resource.endpoint,
+                                                   pk))).json()
+
+        # Projects and inventory sources point at their updates; jobs are
+        # their own status.
+        job = record
+        related = record.get('related', {})
+        update_url = (related.get('current_update', None) or
+                      related.get('last_update', None))
+        if update_url:
+            job = (await self.client.get(update_url[7:])).json()
+        elif self.resource.endpoint != '/jobs/':
+            raise exc.NotFound('No updates exist.')
+
+        if detail:
+            return job
+        return adict({
+            'elapsed': job['elapsed'],
+            'failed': job['failed'],
+            'status': job['status'],
+        })
+
+    async def monitor(self, pk, min_interval=1, max_interval=30,
+                            timeout=None):
+        """Wait until a job completes, and return its final status.
+
+        Raise `JobFailure` if the job fails, and `Timeout` if `timeout`
+        seconds pass first.
+        """
+        interval = min_interval
+        start = time.time()
+        result = await self.status(pk)
+        while result['status'] != 'successful':
+            if result['failed']:
+                raise exc.JobFailure('Job failed.')
+            if timeout and time.time() - start > timeout:
+                raise exc.Timeout('Monitoring aborted due to timeout.')
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, max_interval)
+            result = await self.status(pk)
+        return result
+
+    async def _lookup(self, fail_on_missing=False, fail_on_found=False,
+                            **kwargs):
+        """Attempt to perform a lookup that is expected to return a single
+        result, and return the record.
+        """
+        read_params = {}
+        for field_name in self.resource.identity:
+            if field_name in kwargs:
+                read_params[field_name] = kwargs[field_name]
+        if not read_params:
+            raise exc.BadRequest('Cannot reliably determine which record '
+                                 'to write. Include an ID or unique '
+                                 'fields.')
+
+        try:
+            existing_data = await self.get(**read_params)
+        except exc.NotFound:
+            if fail_on_missing:
+                raise
+            return {}
+        if fail_on_found:
+            raise exc.Found('A record matching %s already exists, and '
+                            'you requested a failure in that case.' %
+                            read_params)
+        return existing_data
+
+
+def get_resource(name, client):
+    """Return an `AsyncResource` for the requested resource, making its
+    requests through the given `AsyncClient`.
+    """
+    return AsyncResource(tower_cli.get_resource(name), client)
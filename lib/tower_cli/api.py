@@ -17,13 +17,22 @@ import contextlib
 import copy
 import functools
 import json
+import threading
+import time
 import warnings
 
-from requests.exceptions import ConnectionError
+import six
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, RequestException
 from requests.sessions import Session
 from requests.models import Response
+from requests.structures import CaseInsensitiveDict
 from requests.packages import urllib3
 
+import tower_cli
+from tower_cli import coalesce
 from tower_cli.conf import settings
 from tower_cli.utils import data_structures, debug, exceptions as exc
 
@@ -38,9 +47,19 @@ class Client(Session):
     similar.
 
       [1]: http://docs.python-requests.org/en/latest/
+
+    A Client is not safe to share between threads; use a `Context` (below)
+    to get one client per thread over a shared connection pool.
     """
-    def __init__(self):
+    def __init__(self, adapters=None):
         super(Client, self).__init__()
+
+        # If we were handed a set of adapters, use that exact mapping, so
+        # that every client sharing it also shares connection pools (and
+        # any faux adapter mounted by `test_mode`).
+        if adapters is not None:
+            self.adapters = adapters
+            return
         for adapter in self.adapters.values():
             adapter.max_retries = 3
 
@@ -49,18 +68,25 @@ class Client(Session):
         """Return the appropriate URL prefix to prepend to requests,
         based on the host provided in settings.
         """
-        host = settings.host
-        if '://' not in host:
-            host = 'https://%s' % host.strip('/')
-        return '%s/api/v1/' % host.rstrip('/')
+        return url_prefix(settings.host)
 
     @functools.wraps(Session.request)
     def request(self, method, url, *args, **kwargs):
         """Make a request to the Ansible Tower API, and return the
         response.
         """
+        # Reads may be spread across the nodes of a Tower cluster, if any
+        # are configured; writes always go to the configured host.
+        # Determine the hosts we may use, in order of preference.
+        path = url.lstrip('/')
+        hosts = [settings.host]
+        pool = None
+        if method.upper() == 'GET' and settings.nodes:
+            pool = NodePool.get()
+            hosts = pool.candidates()
+
         # Piece together the full URL.
-        url = '%s%s' % (self.prefix, url.lstrip('/'))
+        url = '%s%s' % (url_prefix(hosts[0]), path)
 
         # Ansible Tower expects authenticated requests; add the authentication
         # from settings if it's provided.
@@ -93,63 +119,53 @@ class Client(Session):
             urllib3.disable_warnings()
 
         # Call the superclass method.
-        try:
-            with warnings.catch_warnings():
-                r = super(Client, self).request(method, url, *args,
-                                                verify=False, **kwargs)
-        except ConnectionError as ex:
-            if settings.verbose:
-                debug.log('Cannot connect to Tower:', fg='yellow', bold=True)
-                debug.log(str(ex), fg='yellow', bold=True, nl=2)
-            raise exc.ConnectionError(
-                'There was a network error of some kind trying to connect '
-                'to Tower.\n\nThe most common  reason for this is a settings '
-                'issue; is your "host" value in `tower-cli config` correct?\n'
-                'Right now it is: "%s".' % settings.host
-            )
+        #
+        # If this is a read from a cluster and a node cannot be reached,
+        # mark it as down and fail over to the next one.
+        def send():
+            for i, host in enumerate(hosts):
+                url = '%s%s' % (url_prefix(host), path)
+                start = time.time()
+                try:
+                    with warnings.catch_warnings():
+                        r = super(Client, self).request(method, url, *args,
+                                                        verify=False, **kwargs)
+                except ConnectionError as ex:
+                    if pool is None:
+                        raise connection_error(ex)
+                    pool.mark_down(host)
+                    if i == len(hosts) - 1:
+                        raise connection_error(ex)
+                    debug.log('Cannot connect to %s; trying another node.' %
+                              host, fg='yellow', bold=True)
+                    continue
+                if pool is not None:
+                    pool.mark_up(host, latency=time.time() - start)
+                return r
 
-        # Sanity check: Did the server send back some kind of internal error?
-        # If so, bubble this up.
-        if r.status_code >= 500:
-            raise exc.ServerError('The Tower server sent back a server error. '
-                                  'Please try again later.')
-
-        # Sanity check: Did we fail to authenticate properly?
-        # If so, fail out now; this is always a failure.
-        if r.status_code == 401:
-            raise exc.AuthError('Invalid Tower authentication credentials.')
-
-        # Sanity check: Did we get a forbidden response, which means that
-        # the user isn't allowed to do this? Report that.
-        if r.status_code == 403:
-            raise exc.Forbidden("You don't have permission to do that.")
-
-        # Sanity check: Did we get a 404 response?
-        # Requests with primary keys will return a 404 if there is no response,
-        # and we want to consistently trap these.
-        if r.status_code == 404:
-            raise exc.NotFound('The requested object could not be found.')
-
-        # Sanity check: Did we get a 405 response?
-        # A 405 means we used a method that isn't allowed. Usually this
-        # is a bad request, but it requires special treatment because the
-        # API sends it as a logic error in a few situations (e.g. trying to
-        # cancel a job that isn't running).
-        if r.status_code == 405:
-            raise exc.MethodNotAllowed(
-                "The Tower server says you can't make a request with the "
-                "%s method to that URL (%s)." % (method, url),
-            )
+        # Identical GET requests made at the same time by other threads
+        # (or, optionally, other tower-cli processes) are only sent once,
+        # and their response shared.
+        if method.upper() == 'GET' and settings.coalesce:
+            key = json.dumps([
+                url_prefix(settings.host) + path, settings.username,
+                sorted((kwargs.get('params', None) or {}).items()),
+            ], default=six.text_type)
+            if settings.coalesce_across_processes:
+                db = coalesce.coordinator(settings.cache_path('flights.db'))
+                send_once = functools.partial(db.do, key, send,
+                                              functools.partial(
+                                                  stored_response, url))
+            else:
+                send_once = send
+            r = coalesce.singleflight.do(key, send_once)
+        else:
+            r = send()
 
-        # Sanity check: Did we get some other kind of error?
-        # If so, write an appropriate error message.
-        if r.status_code >= 400:
-            raise exc.BadRequest(
-                'The Tower server claims it was sent a bad request.\n\n'
-                '%s %s\nParams: %s\nData: %s\n\nResponse: %s' %
-                (method, url, kwargs.get('params', None),
-                 kwargs.get('data', None), r.content.decode('utf8'))
-            )
+        # Raise an appropriate exception if the server reports an error.
+        check_response(method, url, r.status_code, r.content,
+                       params=kwargs.get('params', None),
+                       data=kwargs.get('data', None))
 
         # Django REST Framework intelligently prints API keys in the
         # order that they are defined in the models and serializer.
@@ -175,21 +191,119 @@ class Client(Session):
         # Import this here, because we don't want to require fauxquests
         # in order for the app to work.
         from fauxquests.adapter import FauxAdapter
+
+        # The faux Tower does not serve API metadata, so the schema is
+        # turned off; its jobs are made up anew by each test, so the cache
+        # of finished jobs is too.
         with settings.runtime_values(host='20.12.4.21', username='meagan',
                                      password='This is the best wine.',
-                                     verbose=False, format='json'):
+                                     verbose=False, format='json',
+                                     schema=False, result_cache_size=0):
             adapters = copy.copy(self.adapters)
             faux_adapter = FauxAdapter(
                 url_pattern=self.prefix.rstrip('/') + '%s',
             )
 
+            # Swap the adapters in place (rather than rebinding
+            # `self.adapters`), so that other clients sharing this mapping
+            # through a `Context` see the faux adapter too.
             try:
                 self.adapters.clear()
                 self.mount('https://', faux_adapter)
                 self.mount('http://', faux_adapter)
                 yield faux_adapter
             finally:
-                self.adapters = adapters
+                self.adapters.clear()
+                self.adapters.update(adapters)
+
+
+def check_response(method, url, status_code, content, params=None,
+                   data=None):
+    """Raise the appropriate `tower_cli.utils.exceptions` exception if the
+    given response status code is an error, and return None otherwise.
+
+    This is shared by `Client.request` and the asynchronous client in
+    `tower_cli.aio`, so that both report errors identically.
+    """
+    # Sanity check: Did the server send back some kind of internal error?
+    # If so, bubble this up.
+    if status_code >= 500:
+        raise exc.ServerError('The Tower server sent back a server error. '
+                              'Please try again later.')
+
+    # Sanity check: Did we fail to authenticate properly?
+    # If so, fail out now; this is always a failure.
+    if status_code == 401:
+        raise exc.AuthError('Invalid Tower authentication credentials.')
+
+    # Sanity check: Did we get a forbidden response, which means that
+    # the user isn't allowed to do this? Report that.
+    if status_code == 403:
+        raise exc.Forbidden("You don't have permission to do that.")
+
+    # Sanity check: Did we get a 404 response?
+    # Requests with primary keys will return a 404 if there is no response,
+    # and we want to consistently trap these.
+    if status_code == 404:
+        raise exc.NotFound('The requested object could not be found.')
+
+    # Sanity check: Did we get a 405 response?
+    # A 405 means we used a method that isn't allowed. Usually this
+    # is a bad request, but it requires special treatment because the
+    # API sends it as a logic error in a few situations (e.g. trying to
+    # cancel a job that isn't running).
+    if status_code == 405:
+        raise exc.MethodNotAllowed(
+            "The Tower server says you can't make a request with the "
+            "%s method to that URL (%s)." % (method, url),
+        )
+
+    # Sanity check: Did we get some other kind of error?
+    # If so, write an appropriate error message.
+    if status_code >= 400:
+        raise exc.BadRequest(
+            'The Tower server claims it was sent a bad request.\n\n'
+            '%s %s\nParams: %s\nData: %s\n\nResponse: %s' %
+            (method, url, params, data, content.decode('utf8'))
+        )
+
+
+def connection_error(ex):
+    """Log the given low-level connection error if verbose, and return the
+    `tower_cli.utils.exceptions.ConnectionError` to raise in its place.
+    """
+    if settings.verbose:
+        debug.log('Cannot connect to Tower:', fg='yellow', bold=True)
+        debug.log(str(ex), fg='yellow', bold=True, nl=2)
+    return exc.ConnectionError(
+        'There was a network error of some kind trying to connect '
+        'to Tower.\n\nThe most common  reason for this is a settings '
+        'issue; is your "host" value in `tower-cli config` correct?\n'
+        'Right now it is: "%s".' % settings.host
+    )
+
+
+def stored_response(url, status_code, headers, content):
+    """Return an `APIResponse` rebuilt from the parts of a response that
+    was stored by another process.
+    """
+    r = APIResponse()
+    r.url = url
+    r.status_code = status_code
+    r.headers = CaseInsensitiveDict(headers)
+    r.encoding = 'utf-8'
+    r._content = content
+    return r
+
+
+def url_prefix(host):
+    """Return the URL prefix of the API on the given Tower host.
+
+    HTTPS is assumed as the protocol unless one is given explicitly.
+    """
+    if '://' not in host:
+        host = 'https://%s' % host.strip('/')
+    return '%s/api/v1/' % host.rstrip('/')
 
 
 class APIResponse(Response):
@@ -201,4 +315,245 @@ class APIResponse(Response):
         return super(APIResponse, self).json(**kwargs)
 
 
-client = Client()
+class NodePool(object):
+    """The nodes of a Tower cluster that reads may be sent to, along with
+    what we know about their health and latency.
+
+    With the "round-robin" strategy, reads rotate through the healthy
+    nodes; with the "latency" strategy, they go to the healthy node that
+    has been answering fastest. Nodes that fail are skipped until a health
+    check (a request to the cheap `/ping/` endpoint, made periodically in
+    the background) finds them answering again.
+    """
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, nodes, strategy='round-robin', interval=30):
+        self.nodes = list(nodes)
+        self.strategy = strategy
+        self.interval = interval
+        self.healthy = dict([(node, True) for node in self.nodes])
+        self.latency = dict([(node, 0.0) for node in self.nodes])
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    @classmethod
+    def get(cls):
+        """Return the pool for the nodes named in the `nodes` setting,
+        creating it (and starting its health checks) if necessary.
+        """
+        nodes = tuple([i.strip()
+                       for i in six.text_type(settings.nodes).split(',')
+                       if i.strip()])
+        key = (nodes, settings.node_strategy)
+        with cls._pools_lock:
+            if key not in cls._pools:
+                pool = cls(nodes, strategy=settings.node_strategy,
+                           interval=settings.health_check_interval)
+                pool.start()
+                cls._pools[key] = pool
+            return cls._pools[key]
+
+    def candidates(self):
+        """Return the nodes to try for a read, best first: healthy nodes
+        in the order the strategy prefers, then nodes believed to be down
+        (as a last resort).
+        """
+        with self._lock:
+            up = [i for i in self.nodes if self.healthy[i]]
+            down = [i for i in self.nodes if not self.healthy[i]]
+            if self.strategy == 'latency':
+                up.sort(key=lambda node: self.latency[node])
+            elif up:
+                start = self._counter % len(up)
+                self._counter += 1
+                up = up[start:] + up[:start]
+        return up + down
+
+    def mark_up(self, node, latency=None):
+        """Record that the node answered, optionally taking `latency`
+        seconds to do so.
+        """
+        with self._lock:
+            self.healthy[node] = True
+            if latency is not None:
+                if self.latency[node]:
+                    latency = 0.7 * self.latency[node] + 0.3 * latency
+                self.latency[node] = latency
+
+    def mark_down(self, node):
+        """Record that the node could not be reached."""
+        debug.log('Marking %s as down.' % node, fg='yellow', bold=True)
+        with self._lock:
+            self.healthy[node] = False
+
+    def check(self):
+        """Ping each node once, and record its health and latency."""
+        for node in self.nodes:
+            start = time.time()
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    r = requests.get('%sping/' % url_prefix(node),
+                                     timeout=5, verify=False)
+                healthy = r.status_code < 500
+            except RequestException:
+                healthy = False
+            if healthy:
+                self.mark_up(node, latency=time.time() - start)
+            else:
+                self.mark_down(node)
+
+    def start(self):
+        """Start checking the health of the nodes in a background thread,
+        every `interval` seconds. An interval of zero disables this.
+        """
+        if not self.interval or self.interval <= 0:
+            return
+        thread = threading.Thread(target=self._check_forever)
+        thread.daemon = True
+        thread.start()
+
+    def _check_forever(self):
+        while True:
+            self.check()
+            time.sleep(self.interval)
+
+
+class Context(object):
+    """An object bundling the settings and HTTP connection pool used to talk
+    to one Ansible Tower instance.
+
+    Keyword arguments are settings (such as `host`, `username`, and
+    `password`) that override the configuration files while the context is
+    active. Activate a context for the current thread with a `with`
+    statement; any resource method called inside the block uses its
+    settings and its clients:
+
+        ctx = Context(host='tower.example.com', username='admin',
+                      password='p4ssw0rd')
+        with ctx:
+            get_resource('job').status(42)
+
+    Each thread gets its own `Client` (since `requests.Session` is not
+    thread-safe), but every client in a context shares the same connection
+    pool, so a single context may be used from a thread pool.
+    """
+    _local = threading.local()
+
+    def __init__(self, **kwargs):
+        self.settings = dict([(k, v) for k, v in kwargs.items()
+                              if v is not None])
+        self.adapters = data_structures.OrderedDict()
+        for prefix in ('https://', 'http://'):
+            self.adapters[prefix] = HTTPAdapter(max_retries=3)
+        self._clients = threading.local()
+
+    def __enter__(self):
+        stack = self._stack()
+        runtime = settings.runtime_values(**self.settings)
+        runtime.__enter__()
+        stack.append((self, runtime))
+        return self
+
+    def __exit__(self, *exc_info):
+        context, runtime = self._stack().pop()
+        return runtime.__exit__(*exc_info)
+
+    def get_resource(self, name):
+        """Return the requested resource, bound to this context; every
+        method called on it runs with this context active.
+        """
+        return BoundResource(self, tower_cli.get_resource(name))
+
+    @property
+    def client(self):
+        """Return the `Client` for this context in the current thread,
+        creating it if necessary.
+        """
+        if not hasattr(self._clients, 'client'):
+            self._clients.client = Client(adapters=self.adapters)
+        return self._clients.client
+
+    @classmethod
+    def current(cls):
+        """Return the context active in the current thread, or the default
+        context if none is.
+        """
+        stack = cls._stack()
+        if stack:
+            return stack[-1][0]
+        return default_context
+
+    @classmethod
+    def _stack(cls):
+        if not hasattr(cls._local, 'stack'):
+            cls._local.stack = []
+        return cls._local.stack
+
+
+class BoundResource(object):
+    """A wrapper around a resource that activates a given `Context` around
+    every method call, for code that prefers passing a context explicitly
+    to relying on `with` blocks.
+    """
+    def __init__(self, context, resource):
+        self.context = context
+        self.resource = resource
+
+    def __getattr__(self, key):
+        value = getattr(self.resource, key)
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def inner(*args, **kwargs):
+            with self.context:
+                return value(*args, **kwargs)
+        return inner
+
+
+def inherit_context(func):
+    """Return a wrapper around `func` that runs it with the context and
+    runtime settings of the thread calling `inherit_context`.
+
+    Use this to hand work to other threads (for instance, a thread pool),
+    which otherwise start with no runtime settings and the default context.
+    """
+    context = Context.current()
+    runtime = settings._runtime
+
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        old_runtime = settings._runtime
+        stack = Context._stack()
+        stack.append((context, None))
+        settings._runtime = runtime
+        try:
+            return func(*args, **kwargs)
+        finally:
+            settings._runtime = old_runtime
+            stack.pop()
+    return inner
+
+
+class ClientProxy(object):
+    """A stand-in for a `Client` that forwards everything to the client of
+    the current thread's active `Context`.
+
+    This is what `tower_cli.api.client` is, which keeps
+    `from tower_cli.api import client` working unchanged in code that is
+    called from several threads or contexts.
+    """
+    def __getattr__(self, key):
+        return getattr(Context.current().client, key)
+
+    def __setattr__(self, key, value):
+        setattr(Context.current().client, key, value)
+
+    def __delattr__(self, key):
+        delattr(Context.current().client, key)
+
+
+default_context = Context()
+client = ClientProxy()
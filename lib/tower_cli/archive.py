@@ -0,0 +1,392 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Archives of the configuration of a Tower: gzipped files of JSON lines.
+
+The first line is a header; each other line is one record:
+
+    {"type": "host", "record": {"name": "web1", "enabled": true,
+     "inventory": {"name": "prod", "organization": {"name": "Acme"}}}}
+
+A record has the fields of its resource (less any secrets). Related
+records are referred to by their identity fields, rather than by ID, so
+that an archive can be compared with, or restored to, another Tower.
+
+Restoring an archive creates the records it has, or updates the records
+that exist already; it never deletes anything.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import binascii
+import gzip
+import io
+import json
+import os
+import threading
+
+import tower_cli
+from tower_cli import bulk
+from tower_cli.conf import settings
+from tower_cli.index import IdentityIndex, read_pages
+from tower_cli.utils import debug, exceptions as exc, parallel, secho
+from tower_cli.utils.data_structures import OrderedDict
+from tower_cli.utils.types import Related
+
+
+FORMAT = 'tower-cli-archive'
+VERSION = 1
+
+# The resources in an archive, in an order in which they can be created.
+RESOURCES = ('organization', 'user', 'team', 'credential', 'project',
+             'inventory', 'group', 'host', 'job_template')
+
+# Fields holding secrets that Tower does not give back anyway, besides
+# password fields.
+SECRET_FIELDS = ('ssh_key_data',)
+
+
+def fields(resource):
+    """Return the fields of the given resource that go in an archive, as
+    an ordered dictionary mapping each field's key in the API to the
+    field.
+    """
+    answer = OrderedDict()
+    for field in resource.fields:
+        if field.password or field.name in SECRET_FIELDS:
+            continue
+        answer[field.key or field.name] = field
+    return answer
+
+
+def dependencies(names=RESOURCES):
+    """Return an ordered dictionary mapping each of the given resources to
+    the set of the others that its related fields refer to.
+    """
+    answer = OrderedDict()
+    for name in names:
+        resource = tower_cli.get_resource(name)
+        answer[name] = set([i.type.resource_name
+                            for i in fields(resource).values()
+                            if isinstance(i.type, Related) and
+                            i.type.resource_name in names and
+                            i.type.resource_name != name])
+    return answer
+
+
+def levels(names=RESOURCES):
+    """Return the given resources in levels: lists of resources that refer
+    only to those of earlier levels, and so can be handled together.
+    """
+    pending = dependencies(names)
+    done = set()
+    answer = []
+    while pending:
+        level = [k for k, v in pending.items() if v <= done]
+        if not level:
+            raise exc.TowerCLIError('The resources %s refer to each other.'
+                                    % ', '.join(pending))
+        for name in level:
+            del pending[name]
+        done.update(level)
+        answer.append(level)
+    return answer
+
+
+class Writer(object):
+    """Write records to an archive in the given binary file, from any
+    number of threads.
+    """
+    def __init__(self, fileobj, **header):
+        self._file = gzip.GzipFile(fileobj=fileobj, mode='wb')
+        self._lock = threading.Lock()
+        self._write([OrderedDict([('format', FORMAT),
+                                  ('version', VERSION)] +
+                                 sorted(header.items()))])
+
+    def _write(self, lines):
+        text = ''.join([json.dumps(i, sort_keys=True) + '\n'
+                        for i in lines])
+        with self._lock:
+            self._file.write(text.encode('utf8'))
+
+    def write(self, resource_name, records):
+        """Write the given records of the given resource."""
+        self._write([{'type': resource_name, 'record': i} for i in records])
+
+    def close(self):
+        self._file.close()
+
+
+def read(fileobj):
+    """Return the header of the archive in the given binary file, and an
+    iterator over its `(resource name, record)` pairs, which reads the
+    archive as it goes.
+    """
+    lines = io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj, mode='rb'),
+                             encoding='utf8')
+    try:
+        header = json.loads(next(lines))
+    except (IOError, ValueError, StopIteration):
+        header = None
+    if not isinstance(header, dict) or header.get('format', None) != FORMAT:
+        raise exc.UsageError('%s is not a tower-cli archive.' %
+                             getattr(fileobj, 'name', 'The file'))
+    if header.get('version', None) != VERSION:
+        raise exc.UsageError('Archives of version %s are not supported.' %
+                             header.get('version', None))
+
+    def records():
+        for line in lines:
+            if line.strip():
+                item = json.loads(line)
+                yield item['type'], item['record']
+    return header, records()
+
+
+def reference(resource_name, record, refs):
+    """Return the reference to the given record of the given resource: its
+    identity fields, with related records referred to in turn.
+
+    `refs` maps the names of resources to dictionaries mapping the IDs of
+    the records seen so far to their references.
+    """
+    resource = tower_cli.get_resource(resource_name)
+    archived = fields(resource)
+    answer = {}
+    for key in resource.identity:
+        value = record.get(key, None)
+        field = archived.get(key, None)
+        if field is not None and isinstance(field.type, Related):
+            value = related_reference(field.type.resource_name, value, refs)
+        answer[key] = value
+    return answer
+
+
+def related_reference(resource_name, pk, refs):
+    """Return the reference to the record of the given resource with the
+    given primary key, from `refs` (see `reference`).
+    """
+    if pk is None:
+        return None
+    answer = refs.get(resource_name, {}).get(pk, None)
+    if answer is None:
+        # This is a record that is not in the archive; keep its ID, so
+        # that nothing is lost.
+        debug.log('No %s with ID %s was exported.' % (resource_name, pk),
+                  header='details')
+        return {'id': pk}
+    return answer
+
+
+def export(fileobj, names=RESOURCES, workers=None, page_size=200):
+    """Write every record of the given resources to an archive in the
+    given binary file, and return the number of records of each.
+
+    The resources of a level (see `levels`) are read concurrently, and
+    each a few pages at a time, so that only those pages are ever held
+    in memory; only the references of records that others refer to are
+    kept.
+    """
+    writer = Writer(fileobj, host=settings.host, resources=list(names))
+    referenced = set()
+    for deps in dependencies(names).values():
+        referenced.update(deps)
+    refs = dict([(i, {}) for i in referenced])
+    counts = OrderedDict([(i, 0) for i in names])
+    workers = workers or settings.concurrency
+
+    def export_resource(name):
+        resource = tower_cli.get_resource(name)
+        archived = fields(resource)
+
+        def read_page(page):
+            return resource.read(page=page, query=[
+                ('page_size', page_size),
+                ('order_by', 'id'),
+            ])
+
+        def write_page(results):
+            records = []
+            for result in results:
+                record = OrderedDict()
+                for key, field in archived.items():
+                    if key not in result:
+                        continue
+                    value = result[key]
+                    if isinstance(field.type, Related):
+                        value = related_reference(field.type.resource_name,
+                                                  value, refs)
+                    record[key] = value
+                if name in refs:
+                    refs[name][result['id']] = reference(name, result, refs)
+                records.append(record)
+            writer.write(name, records)
+            counts[name] += len(records)
+
+        # Read the first page to learn how many there are, and then the
+        # rest a few at a time.
+        first = read_page(1)
+        write_page(first['results'])
+        pages = -(-first.get('count', 0) // page_size)
+        remaining = list(range(2, pages + 1))
+        for start in range(0, len(remaining), workers):
+            window = remaining[start:start + workers]
+            for response in parallel.map(read_page, window,
+                                         workers=workers):
+                write_page(response['results'])
+        debug.log('Exported %d %s records.' % (counts[name], name),
+                  header='details')
+
+    try:
+        for level in levels(names):
+            parallel.map(export_resource, level, workers=len(level))
+    finally:
+        writer.close()
+    return counts
+
+
+def key(ref):
+    """Return a reference as text, to look it up by."""
+    return json.dumps(ref, sort_keys=True)
+
+
+class ReferenceIndex(object):
+    """The primary keys of the records of a Tower, by their references, for
+    the resources that other resources refer to.
+    """
+    def __init__(self):
+        self.refs = {}
+        self.pks = {}
+
+    def load(self, resource_name, page_size=200):
+        """Read all the records of the given resource, and index their
+        references. The resources they refer to must be indexed already.
+        """
+        resource = tower_cli.get_resource(resource_name)
+        refs = self.refs[resource_name] = {}
+        pks = self.pks[resource_name] = {}
+        query = [('page_size', page_size), ('order_by', 'id')]
+        for response in read_pages(lambda page: resource.read(page=page,
+                                                              query=query)):
+            for record in response['results']:
+                ref = reference(resource_name, record, self.refs)
+                refs[record['id']] = ref
+                pks[key(ref)] = record['id']
+
+    def lookup(self, resource_name, ref):
+        """Return the primary key of the record of the given resource with
+        the given reference, or raise `RelatedError` if there is none.
+        """
+        if ref is None:
+            return None
+        pk = self.pks.get(resource_name, {}).get(key(ref), None)
+        if pk is None:
+            raise exc.RelatedError('Could not find the %s %s.' %
+                                   (resource_name, key(ref)))
+        return pk
+
+
+def restore(filename, workers=None, batch_size=1000, user_password=None,
+            outfile=None):
+    """Create or update the records in the archive at the given path, and
+    return the number of records of each resource with each outcome.
+
+    Archives have no passwords, but Tower requires one to create a user;
+    new users are given `user_password`, or else a random password of
+    their own, to be reset before they log in. Existing users keep theirs.
+
+    The resources are restored a level at a time (see `levels`), so that
+    the records they refer to exist; each level reads the archive again,
+    so that only a batch of records is ever held in memory. References
+    are resolved through a `ReferenceIndex` of the records of the Tower,
+    and each batch is written with the bulk engine, so restoring the same
+    archive again changes nothing.
+    """
+    with open(filename, 'rb') as f:
+        header, records = read(f)
+    names = [i for i in header.get('resources', RESOURCES)
+             if i in RESOURCES]
+    referenced = set()
+    for deps in dependencies(names).values():
+        referenced.update(deps)
+    index = ReferenceIndex()
+    answer = OrderedDict()
+
+    for level in levels(names):
+        indexes = dict([(name, IdentityIndex(tower_cli.get_resource(name)))
+                        for name in level])
+        answer.update([(name, OrderedDict([(i, 0) for i in (
+            'created', 'modified', 'unchanged', 'failed')]))
+            for name in level])
+        batches = dict([(name, []) for name in level])
+
+        def flush(name):
+            batch, batches[name] = batches[name], []
+            resource = indexes[name].resource
+            operations = [operation for _, operation in batch]
+            for (ref, _), result in zip(batch, bulk.run(
+                    resource, operations, workers=workers,
+                    index=indexes[name], overrides=False)):
+                answer[name][result['result']] += 1
+                if result['result'] == 'failed':
+                    secho('Failed: %s %s: %s' % (name, key(ref),
+                                                 result['error']),
+                          fg='red', bold=True, err=True, file=outfile)
+
+        with open(filename, 'rb') as f:
+            for name, record in read(f)[1]:
+                if name not in batches:
+                    continue
+                identity = indexes[name].resource.identity
+                operation = _operation(name, record, index)
+                if name == 'user' and 'error' not in operation and \
+                        not indexes[name].lookup(username=record['username']):
+                    operation['password'] = user_password or \
+                        binascii.hexlify(os.urandom(16)).decode('ascii')
+                batches[name].append((
+                    dict([(i, record.get(i, None)) for i in identity]),
+                    operation,
+                ))
+                if len(batches[name]) >= batch_size:
+                    flush(name)
+        for name in level:
+            if batches[name]:
+                flush(name)
+            if name in referenced:
+                index.load(name)
+        for name in level:
+            debug.log('Restored %s: %s.' % (name, ', '.join(
+                ['%d %s' % (v, k) for k, v in answer[name].items()])),
+                header='details')
+    return answer
+
+
+def _operation(resource_name, record, index):
+    """Return the bulk operation creating or updating the given archived
+    record, with its references resolved, or one with an `error`.
+    """
+    operation = OrderedDict([('action', 'create'),
+                             ('force_on_exists', True)])
+    archived = fields(tower_cli.get_resource(resource_name))
+    try:
+        for k, value in record.items():
+            field = archived.get(k, None)
+            if field is not None and isinstance(field.type, Related):
+                value = index.lookup(field.type.resource_name, value)
+            operation[k] = value
+    except exc.RelatedError as ex:
+        return {'error': ex.message}
+    return operation
@@ -0,0 +1,269 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Applying many create, modify and delete operations to a resource.
+
+Each operation is a dictionary naming its `action` ("create", "modify" or
+"delete"), with the fields to write, and optionally the `id` of the
+record, or any of the options of the corresponding command
+(`fail_on_found`, `force_on_exists`, `create_on_missing`,
+`fail_on_missing`):
+
+    {"action": "create", "name": "web1", "inventory": "prod"}
+    {"action": "modify", "id": 42, "enabled": false}
+    {"action": "delete", "name": "web2", "inventory": "prod"}
+
+Related fields may be given by name; all names are looked up in a few
+batched requests. The existing records are listed once, rather than
+looked up one operation at a time, and the writes are made by a bounded
+pool of threads. A failed operation does not stop the others.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import json
+import re
+
+import six
+
+import tower_cli
+from tower_cli import schema
+from tower_cli.api import client
+from tower_cli.index import IdentityIndex
+from tower_cli.utils import debug, exceptions as exc, parallel
+from tower_cli.utils.data_structures import OrderedDict
+from tower_cli.utils.types import Related
+
+
+ACTIONS = ('create', 'modify', 'delete')
+OPTIONS = ('fail_on_found', 'force_on_exists', 'create_on_missing',
+           'fail_on_missing')
+
+
+def read_operations(lines):
+    """Yield the operations in the given lines of JSON (such as an open
+    file), skipping blank lines.
+
+    A line that is not a JSON object becomes an operation with an
+    `error` key, which `run` reports as a failure.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            operation = json.loads(line, object_pairs_hook=OrderedDict)
+            if not isinstance(operation, dict):
+                raise ValueError('Not a JSON object.')
+        except ValueError as ex:
+            operation = {'error': 'Invalid operation: %s' % ex}
+        yield operation
+
+
+def run(resource, operations, workers=None, index=None, overrides=True):
+    """Apply the given operations to the given resource, and yield the
+    result of each, in order.
+
+    Records are looked up in the given `IdentityIndex` of the resource,
+    which is kept up to date with the writes made; if none is given, one
+    is built. Operations go through the resource's own methods where it
+    customizes them, unless `overrides` is False (for callers that write
+    only the resource's own fields).
+
+    Each result is a dictionary giving the operation's 1-based `line`,
+    its `action`, its `result` ("created", "modified", "deleted",
+    "unchanged" or "failed"), and the `id` of the record, or the `error`
+    if the operation failed.
+    """
+    operations = [dict(i) for i in operations]
+    errors = dict([(ix, op.pop('error')) for ix, op in enumerate(operations)
+                   if 'error' in op])
+    for ix, op in enumerate(operations):
+        if ix not in errors and op.get('action', None) not in ACTIONS:
+            errors[ix] = 'Unknown action "%s"; use one of: %s.' % (
+                op.get('action', ''), ', '.join(ACTIONS))
+    _resolve_related(resource, operations, errors)
+
+    def custom(action):
+        return overrides and _overrides(resource, action)
+
+    # Operations go by the existing records; list them once.
+    if index is None and any([i not in errors and not custom(op['action'])
+                              for i, op in enumerate(operations)]):
+        debug.log('Listing the existing records.', header='details')
+        index = IdentityIndex(resource)
+
+    def apply(ix):
+        if ix in errors:
+            raise exc.BadRequest(errors[ix])
+        op = dict(operations[ix])
+        action = op.pop('action')
+        if custom(action):
+            return _apply_override(resource, action, op)
+        return _apply(resource, index, action, op)
+
+    for ix, answer, error in parallel.imap(apply, range(len(operations)),
+                                           workers=workers):
+        result = OrderedDict((
+            ('line', ix + 1),
+            ('action', operations[ix].get('action', None)),
+        ))
+        if error is not None:
+            result['result'] = 'failed'
+            result['error'] = six.text_type(getattr(error, 'message', error))
+        else:
+            result['result'], result['id'] = answer
+        yield result
+
+
+def summarize(results):
+    """Return a summary of the given results of `run`: the number of
+    operations, and how many had each outcome.
+    """
+    answer = OrderedDict([('total', 0)] + [(i, 0) for i in (
+        'created', 'modified', 'deleted', 'unchanged', 'failed')])
+    for result in results:
+        answer['total'] += 1
+        answer[result['result']] += 1
+    return answer
+
+
+def _apply(resource, index, action, data):
+    """Apply one operation, finding its record in the index rather than
+    looking it up, and return its result and the ID of the record.
+    """
+    pk = data.pop('id', None)
+    options = dict([(k, data.pop(k)) for k in OPTIONS if k in data])
+    resource._clean_kwargs(data)
+    record = index.lookup(pk, **data)
+
+    # If we were given a primary key that the listing does not have, the
+    # record may have been created since; get it.
+    if pk and record is None and action != 'delete':
+        record = resource.get(pk)
+
+    if action == 'delete':
+        if record is None and not pk:
+            if options.get('fail_on_missing', False):
+                raise exc.NotFound('The requested object could not be '
+                                   'found.')
+            return 'unchanged', None
+        pk = pk or record['id']
+        try:
+            client.delete('%s%d/' % (resource.endpoint, pk))
+        except exc.NotFound:
+            if options.get('fail_on_missing', False):
+                raise
+            return 'unchanged', pk
+        index.remove(pk)
+        return 'deleted', pk
+
+    # This is a create or a modify.
+    if record is None:
+        if action == 'modify' and not options.get('create_on_missing',
+                                                  False):
+            raise exc.NotFound('The requested object could not be found.')
+        resource._write_plan(None, {}, False, data)
+        schema.validate(resource.endpoint, data, create=True)
+        r = client.post(resource.endpoint, data=data).json()
+        index.add(r)
+        return 'created', r['id']
+
+    pk = record['id']
+    if action == 'create' and options.get('fail_on_found', False):
+        raise exc.Found('A record matching %s already exists, and you '
+                        'requested a failure in that case.' % data)
+    force_on_exists = options.get('force_on_exists', action == 'modify')
+    if resource._write_plan(pk, record, force_on_exists, data) is not None:
+        return 'unchanged', pk
+    schema.validate(resource.endpoint, data)
+    r = client.patch('%s%d/' % (resource.endpoint, pk), data=data).json()
+    index.add(r)
+    return 'modified', pk
+
+
+def _apply_override(resource, action, data):
+    """Apply one operation through the resource's own method, for
+    resources that customize it, and return its result and the ID of the
+    record.
+    """
+    pk = data.pop('id', None)
+    if action == 'create':
+        answer = resource.create(**data)
+    else:
+        answer = getattr(resource, action)(pk, **data)
+    outcome = {'create': 'created', 'modify': 'modified',
+               'delete': 'deleted'}[action]
+    if not answer.get('changed', False):
+        outcome = 'unchanged'
+    return outcome, answer.get('id', pk)
+
+
+def _overrides(resource, action):
+    """Return True if the resource customizes the given action, in which
+    case operations must go through its method rather than the generic
+    implementation here.
+    """
+    # Import this here, since the models import this module.
+    from tower_cli.models.base import Resource
+    method = six.get_unbound_function(getattr(type(resource), action))
+    return method is not six.get_unbound_function(getattr(Resource, action))
+
+
+def _resolve_related(resource, operations, errors):
+    """Replace the names given for related fields with primary keys,
+    looking up all of the names for each field at once. Operations
+    naming something that cannot be found get an error.
+    """
+    for field in resource.fields:
+        if not isinstance(field.type, Related):
+            continue
+        key = field.key or field.name
+        names = set()
+        for ix, op in enumerate(operations):
+            value = op.get(key, None)
+            if ix not in errors and isinstance(value, six.string_types) \
+                    and not re.match(r'^\d+$', value):
+                names.add(value)
+        if not names:
+            continue
+
+        related = field.type
+        pks = _resolve_names(related.resource_name, sorted(names))
+        for ix, op in enumerate(operations):
+            value = op.get(key, None)
+            if value not in names or ix in errors:
+                continue
+            if isinstance(pks[value], Exception):
+                errors[ix] = pks[value].message
+            else:
+                op[key] = pks[value]
+
+
+def _resolve_names(resource_name, names):
+    """Return a dictionary mapping each of the given names of the given
+    resource to its primary key, or to an error saying why it could not
+    be looked up.
+    """
+    related = tower_cli.get_resource(resource_name)
+    endpoint = related.endpoint.strip('/')
+    answer, missing, ambiguous = related.resolve_partial(names)
+    for name in missing:
+        answer[name] = exc.RelatedError('Could not get %s named: %s.' %
+                                        (endpoint, name))
+    for name in ambiguous:
+        answer[name] = exc.MultipleRelatedError(
+            'Cannot look up %s exclusively by name, because more than one '
+            'exists with the name: %s.' % (endpoint, name))
+    return answer
@@ -0,0 +1,172 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Coalescing of identical, concurrent GET requests.
+
+When several threads (or, optionally, several tower-cli processes on the
+same machine) make the same GET request at the same time, only one of them
+sends it; the others wait for it to finish and reuse its response.
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from tower_cli.utils.sqlite import Transaction
+
+
+class SingleFlight(object):
+    """Coalesce concurrent calls with the same key within one process."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Call `func` and return its result, unless a call with the same
+        key is already in progress, in which case wait for that call and
+        return (or raise) its outcome instead.
+        """
+        with self._lock:
+            call = self._calls.get(key, None)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        # If someone else is already making this call, wait for them.
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ProcessCoordinator(object):
+    """Coalesce identical GET requests across the tower-cli processes of
+    one machine, using a SQLite database that they share.
+
+    The first process to register a request sends it and stores the
+    response; other processes that make the same request meanwhile wait
+    (for up to `wait` seconds) and reuse it. A stored response is reused
+    only for `grace` seconds after it arrives, so results never get more
+    than slightly stale.
+    """
+    def __init__(self, filename, wait=10.0, grace=1.0, poll=0.05):
+        self.filename = filename
+        self.wait = wait
+        self.grace = grace
+        self.poll = poll
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS flights ('
+                       'key TEXT PRIMARY KEY, pid INTEGER, started REAL, '
+                       'finished REAL, status INTEGER, headers TEXT, '
+                       'body BLOB)')
+
+    def _connect(self):
+        return Transaction(self.filename, timeout=self.wait, immediate=True)
+
+    def do(self, key, send, build):
+        """Return the response to the request identified by `key`.
+
+        If another process is making the same request, wait for it and
+        pass its stored `(status_code, headers, body)` to `build` to make
+        the response; otherwise call `send` and share its response.
+        """
+        key = hashlib.sha1(key.encode('utf8')).hexdigest()
+        deadline = time.time() + self.wait
+        while True:
+            now = time.time()
+            with self._connect() as db:
+                row = db.execute('SELECT started, finished, status, headers, '
+                                 'body FROM flights WHERE key = ?',
+                                 (key,)).fetchone()
+
+                # If nobody has this request in flight (or the last one is
+                # too old to reuse, or its sender seems to have died),
+                # claim it.
+                claim = (row is None or
+                         (row[1] is not None and now - row[1] > self.grace) or
+                         (row[1] is None and now - row[0] > self.wait))
+                if claim:
+                    db.execute('INSERT OR REPLACE INTO flights (key, pid, '
+                               'started) VALUES (?, ?, ?)',
+                               (key, os.getpid(), now))
+            if claim:
+                return self._send(key, send)
+
+            # Someone else's response has arrived; reuse it.
+            if row[1] is not None:
+                return build(row[2], json.loads(row[3]), bytes(row[4]))
+
+            # Someone else is sending this request; wait, unless we have
+            # waited long enough, in which case send it ourselves.
+            if now > deadline:
+                return send()
+            time.sleep(self.poll)
+
+    def _send(self, key, send):
+        try:
+            r = send()
+        except Exception:
+            # Let any waiting processes make the request themselves.
+            with self._connect() as db:
+                db.execute('DELETE FROM flights WHERE key = ?', (key,))
+            raise
+        with self._connect() as db:
+            db.execute('UPDATE flights SET finished = ?, status = ?, '
+                       'headers = ?, body = ? WHERE key = ?',
+                       (time.time(), r.status_code,
+                        json.dumps(dict(r.headers)),
+                        sqlite3.Binary(r.content), key))
+            db.execute('DELETE FROM flights WHERE finished < ?',
+                       (time.time() - 60,))
+        return r
+
+
+_coordinators = {}
+_coordinators_lock = threading.Lock()
+
+
+def coordinator(filename):
+    """Return the `ProcessCoordinator` using the given database file."""
+    with _coordinators_lock:
+        if filename not in _coordinators:
+            _coordinators[filename] = ProcessCoordinator(filename)
+        return _coordinators[filename]
+
+
+singleflight = SingleFlight()
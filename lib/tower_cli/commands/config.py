@@ -44,7 +44,12 @@ from tower_cli.utils import exceptions as exc, secho
 @click.option('--unset', is_flag=True,
               help='Remove reference to this configuration option from '
                    'the config file.')
-def config(key=None, value=None, scope='user', global_=False, unset=False):
+@click.option('--profile', required=False,
+              help='Write this option to the named Tower profile, rather '
+                   'than to the general settings. Profiles are used by the '
+                   '--hosts option of read commands.')
+def config(key=None, value=None, scope='user', global_=False, unset=False,
+           profile=None):
     """Read or write tower-cli configuration.
 
     `tower config` saves the given setting to the appropriate Tower CLI;
@@ -63,7 +68,7 @@ def config(key=None, value=None, scope='user', global_=False, unset=False):
 
     # If no key was provided, print out the current configuration
     # in play.
-    if not key:
+    if not key and not profile:
         seen = set()
         parser_desc = {
             'runtime': 'Runtime options.',
@@ -111,20 +116,36 @@ def config(key=None, value=None, scope='user', global_=False, unset=False):
 
     # Sanity check: Is this a valid configuration option? If it's not
     # a key we recognize, abort.
-    if not hasattr(settings, key):
+    if key and not hasattr(settings, key):
         raise exc.TowerCLIError('Invalid configuration option "%s".' % key)
 
     # Sanity check: The combination of a value and --unset makes no
-    # sense.
+    # sense, and writing requires a key.
+    if (value or unset) and not key:
+        raise exc.UsageError('A key is required to write a setting.')
     if value and unset:
         raise exc.UsageError('Cannot provide both a value and --unset.')
 
     # If a key was provided but no value was provided, then just
     # print the current value for that key.
-    if key and not value and not unset:
+    if key and not value and not unset and not profile:
         echo_setting(key)
         return
 
+    # If a profile was provided without a value to write, print that
+    # profile's settings.
+    section = 'general'
+    if profile:
+        section = 'profile %s' % profile
+        if not value and not unset:
+            values = settings.profile(profile) or {}
+            for option in sorted(values):
+                if key and option != key:
+                    continue
+                secho('%s: ' % option, fg='magenta', bold=True, nl=False)
+                secho(values[option], bold=True, fg='white')
+            return
+
     # Okay, so we're *writing* a key. Let's do this.
     # First, we need the appropriate file.
     filename = os.path.expanduser('~/.tower_cli.cfg')
@@ -141,10 +162,12 @@ def config(key=None, value=None, scope='user', global_=False, unset=False):
     parser = Parser()
     parser.add_section('general')
     parser.read(filename)
+    if not parser.has_section(section):
+        parser.add_section(section)
     if unset:
-        parser.remove_option('general', key)
+        parser.remove_option(section, key)
     else:
-        parser.set('general', key, value)
+        parser.set(section, key, value)
     with open(filename, 'w') as config_file:
         parser.write(config_file)
     try:
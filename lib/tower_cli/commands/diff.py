@@ -0,0 +1,63 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import click
+
+from tower_cli import archive, drift
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc, secho
+from tower_cli.utils.decorators import command
+
+
+@command
+@click.argument('old')
+@click.argument('new', default='-')
+@click.option('--resources', required=False,
+              help='A comma-separated list of the resources to compare. '
+                   'Defaults to all of: %s.' % ', '.join(archive.RESOURCES))
+@click.option('--workers', type=int, required=False,
+              help='The number of pages to read at once for each resource. '
+                   'Defaults to the `concurrency` setting.')
+def diff(old, new='-', resources=None, workers=None):
+    """Show how one Tower differs from another, or from an archive.
+
+    OLD and NEW are each an archive made by `export`, the name of a Tower
+    profile, or "-" for the configured Tower (the default for NEW).
+    Only records added, removed or changed are shown.
+    """
+    names = archive.RESOURCES
+    if resources:
+        names = tuple([i.strip() for i in resources.split(',') if i.strip()])
+        unknown = [i for i in names if i not in archive.RESOURCES]
+        if unknown:
+            raise exc.UsageError('Cannot compare: %s.' % ', '.join(unknown))
+    differences = drift.diff(old, new, names=names, workers=workers)
+
+    if settings.format == 'json':
+        click.echo(json.dumps(differences, indent=2))
+        return
+    if not differences:
+        secho('No differences.', fg='green')
+    symbols = {'added': '+', 'removed': '-', 'changed': '~'}
+    colors = {'added': 'green', 'removed': 'red', 'changed': 'yellow'}
+    for difference in differences:
+        secho('%s %s %s' % (symbols[difference['change']],
+                            difference['resource'], difference['identity']),
+              fg=colors[difference['change']])
+        for field, (before, after) in difference.get('fields', {}).items():
+            secho('    %s: %s -> %s' % (field, json.dumps(before),
+                                        json.dumps(after)))
@@ -0,0 +1,49 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import click
+
+from tower_cli import archive
+from tower_cli.utils import exceptions as exc, secho
+from tower_cli.utils.decorators import command
+
+
+@command
+@click.option('-o', '--output', type=click.File('wb'), default='-',
+              help='The file to write the archive to. Defaults to standard '
+                   'output.')
+@click.option('--resources', required=False,
+              help='A comma-separated list of the resources to export. '
+                   'Defaults to all of: %s.' % ', '.join(archive.RESOURCES))
+@click.option('--workers', type=int, required=False,
+              help='The number of pages to read at once for each resource. '
+                   'Defaults to the `concurrency` setting.')
+def export(output, resources=None, workers=None):
+    """Export the configuration of Tower to a gzipped archive of JSON
+    lines.
+
+    Secrets, such as credentials' passwords, are left out. Related
+    records are referred to by name, so that the archive can be imported
+    into another Tower.
+    """
+    names = archive.RESOURCES
+    if resources:
+        names = tuple([i.strip() for i in resources.split(',') if i.strip()])
+        unknown = [i for i in names if i not in archive.RESOURCES]
+        if unknown:
+            raise exc.UsageError('Cannot export: %s.' % ', '.join(unknown))
+    counts = archive.export(output, names=names, workers=workers)
+    for name, count in counts.items():
+        secho('Exported %d %s records.' % (count, name), err=True)
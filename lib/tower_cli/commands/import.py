@@ -0,0 +1,51 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import click
+
+from tower_cli import archive
+from tower_cli.utils import exceptions as exc, secho
+from tower_cli.utils.decorators import command
+
+
+# Note: `import` is a reserved word, so the function has a trailing
+# underscore; `tower-cli` looks for it under that name.
+@command(name='import')
+@click.argument('filename', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', type=int, required=False,
+              help='The number of records to write at once. Defaults to '
+                   'the `concurrency` setting.')
+@click.option('--user-password', required=False,
+              help='The password to give users that are created. Defaults '
+                   'to a random password for each, to be reset before they '
+                   'log in.')
+def import_(filename, workers=None, user_password=None):
+    """Create or update the records in an archive made by `export`.
+
+    Resources are imported in the order they depend on one another, and
+    records that already exist are updated rather than duplicated, so an
+    archive may be imported again safely. If any record cannot be
+    imported, the others still are, and the command fails at the end.
+    """
+    answer = archive.restore(filename, workers=workers,
+                             user_password=user_password)
+    for name, counts in answer.items():
+        secho('%s: %s.' % (name, ', '.join(
+            ['%d %s' % (v, k) for k, v in counts.items()])),
+            fg='red' if counts['failed'] else None)
+    failed = sum([i['failed'] for i in answer.values()])
+    if failed:
+        raise exc.TowerCLIError('%d records could not be imported.' %
+                                failed)
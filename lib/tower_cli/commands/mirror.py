@@ -0,0 +1,106 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import click
+
+import tower_cli
+from tower_cli import archive
+from tower_cli.conf import settings
+from tower_cli.mirror import Mirror
+from tower_cli.utils import exceptions as exc, format_table, parallel, secho
+from tower_cli.utils.decorators import command
+
+
+@click.group()
+def mirror():
+    """Keep a local SQLite copy of the records of Tower.
+
+    Once resources are synced, `mirror query` runs SQL against them, and
+    reads are answered from the mirror if the `mirror_max_age` setting is
+    a number of seconds and the resource was synced more recently.
+    """
+
+
+@command(name='sync')
+@click.argument('resources', required=False)
+def sync(resources=None):
+    """Bring the mirror of the given resources up to date.
+
+    RESOURCES is a comma-separated list; it defaults to all of the
+    resources that can be exported. Jobs may be mirrored too, for
+    `job status --offline`. Resources are synced concurrently.
+    """
+    names = archive.RESOURCES
+    if resources:
+        names = tuple([i.strip() for i in resources.split(',') if i.strip()])
+        unknown = [i for i in names if not _exists(i)]
+        if unknown:
+            raise exc.UsageError('Cannot mirror: %s.' % ', '.join(unknown))
+    local = Mirror.get()
+    summaries = parallel.map(local.sync, names, workers=settings.concurrency)
+
+    if settings.format == 'json':
+        click.echo(json.dumps(summaries, indent=2))
+        return
+    for summary in summaries:
+        secho('%(resource)s: %(sync)s sync, %(updated)d updated, '
+              '%(deleted)d deleted, %(count)d mirrored.' % summary,
+              fg='green')
+
+
+def _exists(resource_name):
+    try:
+        tower_cli.get_resource(resource_name)
+    except ImportError:
+        return False
+    return True
+
+
+@command(name='query')
+@click.argument('sql')
+def query(sql):
+    """Run a SQL query against the mirror.
+
+    Each resource synced has a table named after it, with a column for
+    each of its fields, plus `data`, the whole record as JSON.
+    """
+    columns, rows = Mirror.get().query(sql)
+    if settings.format == 'json':
+        click.echo(json.dumps([dict(zip(columns, i)) for i in rows],
+                              indent=2))
+        return
+    click.echo(format_table(columns, rows))
+
+
+@command(name='status')
+def status():
+    """Show the resources mirrored, and how long ago each was synced."""
+    resources = Mirror.get().status()
+    if settings.format == 'json':
+        click.echo(json.dumps(resources, indent=2))
+        return
+    if not resources:
+        secho('Nothing is mirrored yet.', fg='yellow')
+        return
+    click.echo(format_table(['resource', 'count', 'age'], [
+        (i['resource'], i['count'], '%ds' % i['age']) for i in resources
+    ]))
+
+
+mirror.add_command(sync)
+mirror.add_command(query)
+mirror.add_command(status)
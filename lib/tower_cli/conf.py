@@ -17,6 +17,7 @@ import contextlib
 import copy
 import os
 import stat
+import threading
 import warnings
 
 import six
@@ -75,15 +76,30 @@ class Settings(object):
         """Create the settings object, and read from appropriate files as
         well as from `sys.argv`.
         """
-        self._cache = {}
+        # The runtime parser and the value cache are per-thread, so that
+        # `runtime_values` in one thread never leaks into another.
+        self._thread = threading.local()
 
         # Initialize the data dictionary for the default level
         # precedence (that is, the bottom of the totem pole).
         defaults = {
+            'cache_dir': '',
+            'coalesce': 'true',
+            'coalesce_across_processes': 'false',
             'color': 'true',
+            'concurrency': '8',
             'format': 'human',
+            'health_check_interval': '30',
             'host': '127.0.0.1',
+            'mirror_max_age': '0',
+            'node_strategy': 'round-robin',
+            'nodes': '',
+            'offline': 'false',
+            'optimistic_writes': 'false',
             'password': '',
+            'result_cache_size': '1000',
+            'schema': 'true',
+            'schema_ttl': '3600',
             'username': '',
             'verify_ssl': 'true',
             'verbose': 'false',
@@ -156,14 +172,17 @@ class Settings(object):
             local_filename = '%s/.tower_cli.cfg' % local_dir
             self._local.read(local_filename)
 
-        # Put a stubbed runtime parser in.
-        self._runtime = Parser()
-        self._runtime.add_section('general')
 
     def __getattr__(self, key):
         """Return the approprate value, intelligently type-casted in the
         case of numbers or booleans.
         """
+        # Sanity check: Private attributes are never settings; refusing them
+        # here also avoids recursing through `_cache` before `__init__`
+        # has run.
+        if key.startswith('_'):
+            raise AttributeError(key)
+
         # Sanity check: Have I cached this value? If so, return that.
         if key in self._cache:
             return self._cache[key]
@@ -199,6 +218,85 @@ class Settings(object):
         # also that there is no default; raise an exception.
         raise AttributeError('No setting exists: %s.' % key.lower())
 
+    def cache_path(self, *parts):
+        """Return the path to the given file or directory within the
+        tower-cli cache directory, creating parent directories as needed.
+
+        The cache directory is the `cache_dir` setting if set, and
+        `$XDG_CACHE_HOME/tower_cli` (or `~/.cache/tower_cli`) otherwise.
+        """
+        root = self.cache_dir
+        if not root:
+            xdg = os.environ.get('XDG_CACHE_HOME', '~/.cache')
+            root = os.path.join(xdg, 'tower_cli')
+        path = os.path.join(os.path.expanduser(root), *parts)
+        parent = os.path.dirname(path)
+        try:
+            os.makedirs(parent, stat.S_IRWXU)
+        except OSError:
+            # The directory already exists (perhaps because another process
+            # just created it), or cannot be created; in the latter case,
+            # the caller gets an error when it uses the path.
+            pass
+        return path
+
+    def profiles(self):
+        """Return the names of the Tower profiles defined in the
+        configuration files, in the order they were first defined.
+
+        A profile is a section named `[profile NAME]` holding settings
+        (such as `host`, `username`, and `password`) for one Tower instance.
+        """
+        names = []
+        for parser in reversed(self._parsers):
+            for section in parser.sections():
+                if not section.startswith('profile '):
+                    continue
+                name = section[len('profile '):].strip()
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def profile(self, name):
+        """Return a dictionary of the settings in the named profile, or
+        None if no such profile is defined.
+
+        If the profile is defined in several configuration files, the usual
+        order of precedence applies to each setting.
+        """
+        section = 'profile %s' % name
+        answer = None
+        for parser in reversed(self._parsers):
+            if not parser.has_section(section):
+                continue
+            answer = answer or {}
+            for key in parser.options(section):
+                if key not in parser.defaults():
+                    answer[key] = parser.get(section, key)
+        return answer
+
+    @property
+    def _cache(self):
+        """Return the value cache for the current thread."""
+        if not hasattr(self._thread, 'cache'):
+            self._thread.cache = {}
+        return self._thread.cache
+
+    @property
+    def _runtime(self):
+        """Return the runtime parser for the current thread, creating a
+        stubbed one if this thread has never set runtime values.
+        """
+        if not hasattr(self._thread, 'runtime'):
+            self._thread.runtime = Parser()
+            self._thread.runtime.add_section('general')
+        return self._thread.runtime
+
+    @_runtime.setter
+    def _runtime(self, parser):
+        self._thread.runtime = parser
+        self._thread.cache = {}
+
     @property
     def _parsers(self):
         """Return a tuple of all parsers, in order.
@@ -212,6 +310,8 @@ class Settings(object):
     def runtime_values(self, **kwargs):
         """Temporarily override the runtime settings, which exist at the
         highest precedence level.
+
+        The override applies only to the calling thread.
         """
         # Coerce all values to strings (to be coerced back by configparser
         # later) and defenestrate any None values.
@@ -221,9 +321,6 @@ class Settings(object):
                 kwargs.pop(k)
                 continue
 
-            # Remove these keys from the cache, if they are present.
-            self._cache.pop(k, None)
-
             # Coerce values to strings.
             kwargs[k] = six.text_type(v)
 
@@ -232,22 +329,22 @@ class Settings(object):
         # be anything other than defaults, but that isn't a problem for our
         # purposes because we're using our own precedence system).
         #
+        # Values from any enclosing `runtime_values` call are layered
+        # underneath, so nested overrides only replace what they name.
+        #
         # Ensure that everything is put back to rights at the end of the
         # context manager call.
         old_runtime_parser = self._runtime
         try:
-            self._runtime = Parser(defaults=kwargs)
+            layered = dict(old_runtime_parser.defaults(), **kwargs)
+            self._runtime = Parser(defaults=layered)
             self._runtime.add_section('general')
             yield self
         finally:
-            # Revert the runtime configparser object.
+            # Revert the runtime configparser object; this also resets
+            # this thread's cache, since the settings have been reverted.
             self._runtime = old_runtime_parser
 
-            # Remove the keys from the cache again, since the settings
-            # have been reverted.
-            for key in kwargs:
-                self._cache.pop(k, None)
-
 
 # The primary way to interact with settings is to simply hit the
 # already constructed settings object.
@@ -0,0 +1,196 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Finding the differences between two Towers, or between a Tower and an
+archive of one.
+
+Live Towers are first exported to temporary archives (see
+`tower_cli.archive`), so both sides are compared in the same way. Each
+side is read twice: first, each record is reduced to its identity and a
+hash of its other fields, and only those are kept; then, only the records
+whose hashes differ are read again, for their field-level differences.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import json
+import os
+import tempfile
+
+import tower_cli
+from tower_cli import archive
+from tower_cli.api import Context
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc, parallel
+from tower_cli.utils.data_structures import OrderedDict
+
+
+# Fields that differ between Towers, or over time, without any change to
+# the configuration. Archives leave them out already; this guards against
+# records that have them anyway.
+IGNORED_FIELDS = ('id', 'created', 'modified', 'url', 'related',
+                  'summary_fields')
+
+
+def label(ref):
+    """Return a short, readable name for a reference, such as
+    "Acme/prod/web1" for a host.
+    """
+    if not isinstance(ref, dict):
+        return '' if ref is None else '%s' % ref
+    return '/'.join([label(ref[k]) for k in sorted(ref, key=_identity_order)
+                     if ref[k] is not None])
+
+
+def _identity_order(key):
+    # Related records come before the names within them.
+    return (key in ('name', 'username', 'kind'), key)
+
+
+def normalize(resource_name, record):
+    """Return the identity of the given archived record, as text, and the
+    rest of its fields, less the ignored ones.
+    """
+    identity = tower_cli.get_resource(resource_name).identity
+    fields = dict([(k, v) for k, v in record.items()
+                   if k not in identity and k not in IGNORED_FIELDS])
+    return archive.key(dict([(k, record.get(k, None)) for k in identity])), \
+        fields
+
+
+def fingerprints(filename, names):
+    """Return a dictionary mapping the `(resource name, identity)` of each
+    record of the given resources in the archive at the given path to a
+    hash of its fields.
+    """
+    answer = {}
+    with open(filename, 'rb') as f:
+        for name, record in archive.read(f)[1]:
+            if name in names:
+                identity, fields = normalize(name, record)
+                answer[(name, identity)] = hashlib.sha1(
+                    archive.key(fields).encode('utf8')).digest()
+    return answer
+
+
+def records(filename, keys):
+    """Return the fields of the records of the archive at the given path
+    with the given `(resource name, identity)` keys.
+    """
+    answer = {}
+    with open(filename, 'rb') as f:
+        for name, record in archive.read(f)[1]:
+            identity, fields = normalize(name, record)
+            if (name, identity) in keys:
+                answer[(name, identity)] = fields
+    return answer
+
+
+def compare(old, new, names=archive.RESOURCES):
+    """Compare the archives at the given paths, and return the list of
+    differences, ordered by resource and identity.
+
+    Each difference gives the `change` ("added", "removed" or "changed"),
+    the `resource`, the `identity` of the record, and, for changed
+    records, the `fields` that differ, mapped to their old and new values.
+    """
+    old_hashes = fingerprints(old, names)
+    new_hashes = fingerprints(new, names)
+    changed = set([k for k, v in new_hashes.items()
+                   if k in old_hashes and old_hashes[k] != v])
+    old_records = records(old, changed)
+    new_records = records(new, changed)
+
+    answer = []
+    for k in set(old_hashes) | set(new_hashes):
+        if k not in old_hashes:
+            change = 'added'
+        elif k not in new_hashes:
+            change = 'removed'
+        elif k in changed:
+            change = 'changed'
+        else:
+            continue
+        diff = OrderedDict((('change', change), ('resource', k[0]),
+                            ('identity', label(json.loads(k[1])))))
+        if change == 'changed':
+            before, after = old_records[k], new_records[k]
+            diff['fields'] = OrderedDict([
+                (i, [before.get(i, None), after.get(i, None)])
+                for i in sorted(set(before) | set(after))
+                if before.get(i, None) != after.get(i, None)
+            ])
+        answer.append(diff)
+    order = dict([(name, ix) for ix, name in enumerate(archive.RESOURCES)])
+    answer.sort(key=lambda i: (order.get(i['resource'], len(order)),
+                               i['identity'], i['change']))
+    return answer
+
+
+def snapshot(side, names=archive.RESOURCES, workers=None):
+    """Return the path to an archive of one side of a comparison, and
+    whether it is a temporary file, to be removed afterwards.
+
+    The side is the path to an archive, the name of a Tower profile, or
+    "-" for the configured Tower; Towers are exported.
+    """
+    if os.path.isfile(side):
+        return side, False
+    context = None
+    if side != '-':
+        profile = settings.profile(side)
+        if profile is None:
+            raise exc.UsageError('%s is neither an archive nor a Tower '
+                                 'profile.' % side)
+        context = Context(**profile)
+
+    fd, filename = tempfile.mkstemp(suffix='.jsonl.gz')
+
+    def export():
+        with os.fdopen(fd, 'wb') as f:
+            archive.export(f, names=names, workers=workers)
+    try:
+        if context is None:
+            export()
+        else:
+            with context:
+                export()
+    except Exception:
+        os.remove(filename)
+        raise
+    return filename, True
+
+
+def diff(old, new, names=archive.RESOURCES, workers=None):
+    """Compare two sides (see `snapshot`), exporting any live Towers
+    concurrently, and return the list of differences (see `compare`).
+    """
+    sides = []
+    first_error = None
+    for _, result, error in parallel.imap(
+            lambda side: snapshot(side, names=names, workers=workers),
+            [old, new], workers=2):
+        first_error = first_error or error
+        if result is not None:
+            sides.append(result)
+    try:
+        if first_error is not None:
+            raise first_error
+        return compare(sides[0][0], sides[1][0], names=names)
+    finally:
+        for filename, temporary in sides:
+            if temporary:
+                os.remove(filename)
@@ -0,0 +1,111 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Running read commands against several Tower instances at once.
+
+Tower instances are named by profiles in the configuration files:
+
+    [profile prod]
+    host: tower.example.com
+    username: admin
+    password: p4ssw0rd
+
+Settings a profile does not define fall back to the usual settings.
+
+Related records given by name are looked up on each Tower separately,
+since the same name has a different primary key on each.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+from copy import copy
+
+import six
+
+from tower_cli.api import Context
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc, parallel
+from tower_cli.utils.data_structures import OrderedDict
+from tower_cli.utils.types import resolve_deferred
+
+
+def contexts(hosts):
+    """Given a comma-separated list of profile names, or "all", return an
+    ordered dictionary mapping each profile name to a `Context` for it.
+    """
+    if hosts.strip() == 'all':
+        names = settings.profiles()
+    else:
+        names = [i.strip() for i in hosts.split(',') if i.strip()]
+    if not names:
+        raise exc.UsageError('No Tower profiles are defined. Add a '
+                             '[profile NAME] section to tower_cli.cfg.')
+
+    answer = OrderedDict()
+    for name in names:
+        profile = settings.profile(name)
+        if profile is None:
+            raise exc.UsageError('No such Tower profile: "%s".' % name)
+        answer[name] = Context(**profile)
+    return answer
+
+
+def fan_out(func, hosts, *args, **kwargs):
+    """Call `func` once for each Tower profile named by `hosts`,
+    concurrently, and return the merged results.
+
+    Each record in the answer gains a `tower_host` key naming the profile
+    it came from. A failure on one Tower does not stop the others; errors
+    are listed under the `errors` key of the answer, and the profiles of
+    the Towers where the object is simply absent under `missing`. If
+    every Tower fails, the first error is raised instead.
+
+    Keyword arguments that are related records given by name (see
+    `resolve_deferred`) are looked up on each Tower in turn.
+    """
+    targets = contexts(hosts)
+
+    def call(name):
+        with targets[name]:
+            return func(*copy(args), **resolve_deferred(kwargs))
+
+    answer = OrderedDict((('count', 0), ('results', []), ('errors', []),
+                          ('missing', [])))
+    first_error = None
+    for name, result, error in parallel.imap(call, targets.keys()):
+        # An object that is simply absent on some Tower is not an error;
+        # it just contributes no results.
+        if isinstance(error, exc.NotFound):
+            answer['missing'].append(name)
+            continue
+        if error is not None:
+            first_error = first_error or error
+            answer['errors'].append(OrderedDict((
+                ('tower_host', name),
+                ('error', six.text_type(getattr(error, 'message', error))),
+            )))
+            continue
+
+        # Merge the records from this Tower into the answer.
+        records = result.get('results', [result])
+        for record in records:
+            row = OrderedDict((('tower_host', name),))
+            row.update(record)
+            answer['results'].append(row)
+        answer['count'] += len(records)
+
+    if first_error is not None and len(answer['errors']) == len(targets):
+        raise first_error
+    return answer
@@ -0,0 +1,155 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-memory indexes of the records of a resource, built from one listing,
+for work (such as bulk writes and reconciliation) that looks up many
+records by their identity fields.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import threading
+
+from tower_cli.utils import debug, exceptions as exc
+
+
+def read_pages(read):
+    """Yield each page of a listing in turn, as `read` returns it given
+    the page number, until a page has no next one.
+
+    Pages are read only as they are asked for, so that a caller can handle
+    each before the next is read.
+    """
+    page = 1
+    while page:
+        response = read(page)
+        yield response
+        page = page + 1 if response.get('next', None) else None
+
+
+class IdentityIndex(object):
+    """The records of one resource, indexed by primary key, by the tuple of
+    the resource's `identity` fields, and by each of its unique fields.
+
+    The index is built from one listing of the resource, read a page at a
+    time, and is meant to be kept for a run of work and passed to whatever
+    needs it. `refresh` brings it up to date by listing only the records
+    modified since; records deleted by others meanwhile are not noticed,
+    so an index should not be kept indefinitely.
+
+    Any keyword arguments narrow the records indexed, as filters to the
+    listing (for instance, `inventory=5` to index the hosts of one
+    inventory).
+    """
+    def __init__(self, resource, page_size=200, **filters):
+        self.resource = resource
+        self.page_size = page_size
+        self.filters = filters
+        self.by_id = {}
+        self.by_identity = {}
+        self.by_field = dict([(i, {}) for i in resource.unique_fields
+                              if i not in resource.identity])
+        self.last_modified = None
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self, **filters):
+        """List the records matching the given filters a page at a time,
+        and add each to the index.
+        """
+        filters = dict(self.filters, **filters)
+        query = [('page_size', self.page_size), ('order_by', 'id')]
+        for response in read_pages(lambda page: self.resource.read(
+                page=page, query=query, **filters)):
+            for record in response['results']:
+                self.add(record)
+
+    def refresh(self):
+        """Add or update the records modified since the index was last
+        brought up to date.
+        """
+        if self.last_modified is None:
+            return
+        debug.log('Refreshing the index of %s.' %
+                  self.resource.endpoint.strip('/'), header='details')
+        self._load(modified__gt=self.last_modified)
+
+    def identity_of(self, record):
+        """Return the identity tuple of the given record."""
+        return tuple([record.get(i, None) for i in self.resource.identity])
+
+    def add(self, record):
+        """Add (or update) the given record."""
+        with self._lock:
+            self.remove(record['id'])
+            self.by_id[record['id']] = record
+            self.by_identity.setdefault(self.identity_of(record),
+                                        set()).add(record['id'])
+            for field, index in self.by_field.items():
+                if record.get(field, None) is not None:
+                    index.setdefault(record[field], set()).add(record['id'])
+            modified = record.get('modified', None)
+            if modified and (self.last_modified is None or
+                             modified > self.last_modified):
+                self.last_modified = modified
+
+    def remove(self, pk):
+        """Remove the record with the given primary key, if present."""
+        with self._lock:
+            record = self.by_id.pop(pk, None)
+            if record is None:
+                return
+            self.by_identity.get(self.identity_of(record), set()).discard(pk)
+            for field, index in self.by_field.items():
+                index.get(record.get(field, None), set()).discard(pk)
+
+    def find(self, **fields):
+        """Return the list of records matching all of the given fields."""
+        with self._lock:
+            identity = self.resource.identity
+            if all([i in fields for i in identity]):
+                ids = self.by_identity.get(
+                    tuple([fields[i] for i in identity]), set())
+            else:
+                indexed = [i for i in fields if i in self.by_field]
+                if indexed:
+                    ids = self.by_field[indexed[0]].get(fields[indexed[0]],
+                                                        set())
+                else:
+                    ids = self.by_id.keys()
+            return [self.by_id[i] for i in sorted(ids)
+                    if all([self.by_id[i].get(k, None) == v
+                            for k, v in fields.items()])]
+
+    def lookup(self, pk=None, **fields):
+        """Return the record with the given primary key, or else the one
+        record matching the resource's identity fields among those given,
+        or None if there is none.
+
+        Raise `MultipleResults` if more than one record matches.
+        """
+        if pk:
+            return self.by_id.get(pk, None)
+        fields = dict([(k, v) for k, v in fields.items()
+                       if k in self.resource.identity])
+        if not fields:
+            raise exc.BadRequest('Cannot reliably determine which record '
+                                 'to write. Include an ID or unique '
+                                 'fields.')
+        matches = self.find(**fields)
+        if len(matches) > 1:
+            raise exc.MultipleResults('Expected one result, got %d. Tighten '
+                                      'your criteria.' % len(matches))
+        return matches[0] if matches else None
@@ -0,0 +1,395 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A local SQLite copy of the records of a Tower, for questions that would
+otherwise need full listings.
+
+Each resource mirrored has a table of its own, named after it, with a
+column for each of its fields (related fields hold primary keys), plus
+`id`, `modified`, and `data`, the record as JSON. The first sync of a
+resource loads it in full; later syncs read only the records modified
+since, and then find the records deleted since by comparing the number of
+records in ranges of IDs with Tower's, narrowing down the ranges that
+differ.
+
+If the `mirror_max_age` setting is a number of seconds, reads of resources
+synced more recently than that are answered from the mirror, where the
+filters can be. If the `offline` setting is set, every read is answered
+from the mirror, however old, or fails.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+import six
+
+import tower_cli
+from tower_cli.api import client
+from tower_cli.conf import settings
+from tower_cli.index import read_pages
+from tower_cli.utils import debug, exceptions as exc
+from tower_cli.utils.data_structures import OrderedDict
+from tower_cli.utils.sqlite import Transaction
+from tower_cli.utils.types import Related
+
+
+# The lookups that reads may use, and their SQL.
+LOOKUPS = {
+    'exact': '"%s" = ?',
+    'iexact': '"%s" = ? COLLATE NOCASE',
+    'gt': '"%s" > ?',
+    'gte': '"%s" >= ?',
+    'lt': '"%s" < ?',
+    'lte': '"%s" <= ?',
+    'contains': 'instr("%s", ?) > 0',
+    'icontains': 'instr(lower("%s"), lower(?)) > 0',
+    'startswith': 'substr("%s", 1, length(?)) = ?',
+    'istartswith': 'lower(substr("%s", 1, length(?))) = lower(?)',
+}
+
+
+class Mirror(object):
+    """The mirror of one Tower host, in a SQLite database file."""
+    _mirrors = {}
+    _mirrors_lock = threading.Lock()
+
+    def __init__(self, filename):
+        self.filename = filename
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS syncs ('
+                       'resource TEXT PRIMARY KEY, last_modified TEXT, '
+                       'synced REAL, count INTEGER)')
+
+    @classmethod
+    def get(cls):
+        """Return the mirror of the configured host."""
+        slug = hashlib.sha1(settings.host.encode('utf8')).hexdigest()
+        filename = settings.cache_path('mirror', '%s.db' % slug[:16])
+        with cls._mirrors_lock:
+            if filename not in cls._mirrors:
+                cls._mirrors[filename] = cls(filename)
+            return cls._mirrors[filename]
+
+    def _connect(self):
+        return Transaction(self.filename)
+
+    @staticmethod
+    def columns(resource):
+        """Return an ordered dictionary mapping the columns of the table
+        of the given resource to their SQL types.
+        """
+        answer = OrderedDict([('id', 'INTEGER PRIMARY KEY'),
+                              ('modified', 'TEXT')])
+        for field in resource.fields:
+            key = field.key or field.name
+            if isinstance(field.type, Related) or field.type in (int, bool):
+                answer[key] = 'INTEGER'
+            else:
+                answer[key] = 'TEXT'
+        answer['data'] = 'TEXT'
+        return answer
+
+    def _table(self, db, resource_name):
+        """Create the table of the given resource if need be, or recreate
+        it (forgetting the last sync) if its columns have changed.
+        """
+        resource = tower_cli.get_resource(resource_name)
+        columns = self.columns(resource)
+        current = [i[1] for i in
+                   db.execute('PRAGMA table_info("%s")' % resource_name)]
+        if current == list(columns.keys()):
+            return columns
+        if current:
+            db.execute('DROP TABLE "%s"' % resource_name)
+            db.execute('DELETE FROM syncs WHERE resource = ?',
+                       (resource_name,))
+        db.execute('CREATE TABLE "%s" (%s)' % (resource_name, ', '.join(
+            ['"%s" %s' % i for i in columns.items()])))
+        for key in list(columns.keys())[2:-1]:
+            db.execute('CREATE INDEX "%s_%s" ON "%s" ("%s")' % (
+                resource_name, key, resource_name, key))
+        return columns
+
+    def _store(self, db, resource_name, columns, records):
+        rows = []
+        for record in records:
+            row = []
+            for key in columns:
+                value = record.get(key, None)
+                if key == 'data':
+                    value = json.dumps(record)
+                elif isinstance(value, (dict, list)):
+                    value = json.dumps(value)
+                row.append(value)
+            rows.append(row)
+        db.executemany('INSERT OR REPLACE INTO "%s" VALUES (%s)' % (
+            resource_name, ', '.join(['?'] * len(columns))), rows)
+
+    def sync(self, resource_name, page_size=200):
+        """Bring the mirror of the given resource up to date, and return a
+        summary of what was done.
+        """
+        resource = tower_cli.get_resource(resource_name)
+        with self._connect() as db:
+            columns = self._table(db, resource_name)
+            row = db.execute('SELECT last_modified FROM syncs WHERE '
+                             'resource = ?', (resource_name,)).fetchone()
+        last_modified = row[0] if row else None
+
+        # Load the records modified since the last sync (or all of them,
+        # the first time), a page at a time.
+        params = OrderedDict([('page_size', page_size), ('order_by', 'id')])
+        if last_modified:
+            params['modified__gt'] = last_modified
+        else:
+            with self._connect() as db:
+                db.execute('DELETE FROM "%s"' % resource_name)
+        updated = 0
+        for response in read_pages(lambda page: client.get(
+                resource.endpoint, params=dict(params, page=page)).json()):
+            with self._connect() as db:
+                self._store(db, resource_name, columns, response['results'])
+            updated += len(response['results'])
+
+        # Find the records deleted since the last sync.
+        deleted = []
+        if last_modified:
+            with self._connect() as db:
+                high = db.execute('SELECT max(id) FROM "%s"' %
+                                  resource_name).fetchone()[0]
+            deleted = self._deleted(resource_name, 0, high, page_size)
+            with self._connect() as db:
+                db.executemany('DELETE FROM "%s" WHERE id = ?' %
+                               resource_name,
+                               [(i,) for i in deleted])
+
+        with self._connect() as db:
+            count, modified = db.execute(
+                'SELECT count(*), max(modified) FROM "%s"' % resource_name,
+            ).fetchone()
+            db.execute('INSERT OR REPLACE INTO syncs VALUES (?, ?, ?, ?)',
+                       (resource_name, modified, time.time(), count))
+        return OrderedDict((
+            ('resource', resource_name),
+            ('sync', 'incremental' if last_modified else 'full'),
+            ('updated', updated),
+            ('deleted', len(deleted)),
+            ('count', count),
+        ))
+
+    def _deleted(self, resource_name, low, high, page_size):
+        """Return the IDs of the mirrored records of the given resource,
+        with IDs above `low` and up to `high`, that Tower no longer has.
+
+        The numbers of records in the range are compared; if they differ,
+        the range is split in two and each half compared in turn, until
+        the ranges are small enough to list.
+        """
+        endpoint = tower_cli.get_resource(resource_name).endpoint
+        with self._connect() as db:
+            ids = [i[0] for i in db.execute(
+                'SELECT id FROM "%s" WHERE id > ? AND id <= ? ORDER BY id' %
+                resource_name, (low, high))]
+        if not ids:
+            return []
+        remote = client.get(endpoint, params=OrderedDict((
+            ('id__gt', low), ('id__lte', high), ('page_size', 1),
+        ))).json()['count']
+        if remote == len(ids):
+            return []
+        if remote == 0:
+            return ids
+
+        if len(ids) <= page_size:
+            existing = client.get(endpoint, params=OrderedDict((
+                ('id__in', ','.join([six.text_type(i) for i in ids])),
+                ('page_size', page_size),
+            ))).json()['results']
+            existing = set([i['id'] for i in existing])
+            return [i for i in ids if i not in existing]
+        middle = ids[len(ids) // 2]
+        return (self._deleted(resource_name, low, middle, page_size) +
+                self._deleted(resource_name, middle, high, page_size))
+
+    def synced(self, resource_name):
+        """Return the time the given resource was last synced, or None if
+        it never was.
+        """
+        with self._connect() as db:
+            row = db.execute('SELECT synced FROM syncs WHERE resource = ?',
+                             (resource_name,)).fetchone()
+        return row[0] if row else None
+
+    def status(self):
+        """Return the resources mirrored, with the number of records of
+        each and when each was last synced.
+        """
+        with self._connect() as db:
+            rows = db.execute('SELECT resource, count, synced FROM syncs '
+                              'ORDER BY resource').fetchall()
+        return [OrderedDict((('resource', i[0]), ('count', i[1]),
+                             ('age', int(time.time() - i[2]))))
+                for i in rows]
+
+    def query(self, sql, args=()):
+        """Run the given SQL query against the mirror, and return the names
+        of the columns of the result, and its rows.
+        """
+        with self._connect() as db:
+            try:
+                cursor = db.execute(sql, args)
+            except sqlite3.Error as ex:
+                raise exc.UsageError('Could not run the query: %s' % ex)
+            return ([i[0] for i in cursor.description or ()],
+                    cursor.fetchall())
+
+    def read(self, resource_name, pk, params):
+        """Answer a read of the given resource, with the given primary key
+        or query parameters, in the form the API would, or return None if
+        the mirror cannot (because the resource is not mirrored, or the
+        parameters use filters the mirror does not support).
+        """
+        if self.synced(resource_name) is None:
+            return None
+        resource = tower_cli.get_resource(resource_name)
+        columns = self.columns(resource)
+        if pk:
+            params = {'id': pk}
+        params = dict(params)
+        page = int(params.pop('page', 1) or 1)
+        page_size = int(params.pop('page_size', 25) or 25)
+
+        # Translate the filters to SQL.
+        order = 'id'
+        where, args = [], []
+        for key, value in params.items():
+            if key == 'order_by':
+                order = '"%s"%s' % (value.lstrip('-'),
+                                  ' DESC' if value.startswith('-') else '')
+                if value.lstrip('-') not in columns:
+                    return None
+                continue
+            column, _, lookup = key.partition('__')
+            if column not in columns or column == 'data':
+                return None
+            value = _value(columns[column], value)
+            if lookup == 'in':
+                values = [_value(columns[column], i) for i in
+                          six.text_type(value).split(',')]
+                where.append('"%s" IN (%s)' % (column,
+                                             ', '.join(['?'] * len(values))))
+                args += values
+            elif lookup == 'isnull':
+                where.append('"%s" IS %sNULL' % (
+                    column, '' if value in (True, 1, 'true', 'True')
+                    else 'NOT '))
+            elif lookup in LOOKUPS or not lookup:
+                sql = LOOKUPS[lookup or 'exact']
+                where.append(sql % column)
+                args += [value] * sql.count('?')
+            else:
+                return None
+        where = ' WHERE %s' % ' AND '.join(where) if where else ''
+
+        with self._connect() as db:
+            count = db.execute('SELECT count(*) FROM "%s"%s' % (
+                resource_name, where), args).fetchone()[0]
+            rows = db.execute('SELECT data FROM "%s"%s ORDER BY %s LIMIT ? '
+                              'OFFSET ?' % (resource_name, where, order),
+                              args + [page_size, (page - 1) * page_size])
+            results = [json.loads(i[0]) for i in rows]
+        if pk:
+            if not results:
+                raise exc.NotFound('The requested object could not be '
+                                   'found.')
+            return results[0]
+        return OrderedDict((
+            ('count', count),
+            ('next', '%s?page=%d' % (resource.endpoint, page + 1)
+                     if page * page_size < count else None),
+            ('previous', '%s?page=%d' % (resource.endpoint, page - 1)
+                         if page > 1 else None),
+            ('results', results),
+        ))
+
+
+def _value(sql_type, value):
+    """Return a filter value as the mirror stores it."""
+    if sql_type.startswith('INTEGER') and isinstance(value,
+                                                     six.string_types):
+        if value.lower() in ('true', 'false'):
+            return int(value.lower() == 'true')
+        if re.match(r'^-?\d+$', value):
+            return int(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def serve(resource_name, pk, params):
+    """Answer a read from the mirror, if the `mirror_max_age` setting is
+    set and the resource was synced recently enough; otherwise, return
+    None.
+
+    In offline mode, answer every read from the mirror, or raise
+    `UsageError` if it cannot be.
+    """
+    if settings.offline:
+        return _serve_offline(resource_name, pk, params)
+    if not settings.mirror_max_age:
+        return None
+    mirror = Mirror.get()
+    synced = mirror.synced(resource_name)
+    if synced is None or time.time() - synced > settings.mirror_max_age:
+        return None
+    answer = mirror.read(resource_name, pk, params)
+    if answer is not None:
+        debug.log('Answered from the mirror.', header='details')
+    return answer
+
+
+def _serve_offline(resource_name, pk, params):
+    mirror = Mirror.get()
+    if mirror.synced(resource_name) is None:
+        raise exc.UsageError('There is no mirror of %s records to answer '
+                             'from offline; run `tower-cli mirror sync %s` '
+                             'while Tower is up.' % (resource_name,
+                                                     resource_name))
+    answer = mirror.read(resource_name, pk, params)
+    if answer is None:
+        raise exc.UsageError('The mirror cannot apply these filters '
+                             'offline: %s.' % ', '.join(sorted(params)))
+    debug.log('Answered from the mirror (offline).', header='details')
+    return answer
+
+
+def age(resource_name):
+    """Return how long ago the given resource was last synced, as text
+    such as "5m" or "2d", or None if it never was.
+    """
+    synced = Mirror.get().synced(resource_name)
+    if synced is None:
+        return None
+    seconds = max(int(time.time() - synced), 0)
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return '%d%s' % (seconds // size, unit)
+    return '%ds' % seconds
@@ -35,11 +35,13 @@ from click.decorators import _make_command
 
 from sdict import adict
 
-from tower_cli import resources
+from tower_cli import (bulk, fleet, get_resource, mirror, resources, results,
+                       schema, tables)
 from tower_cli.api import client
 from tower_cli.conf import settings
+from tower_cli.index import read_pages
 from tower_cli.models.fields import Field
-from tower_cli.utils import exceptions as exc
+from tower_cli.utils import exceptions as exc, parallel
 from tower_cli.utils.command import Command
 from tower_cli.utils import debug, secho
 from tower_cli.utils.data_structures import OrderedDict
@@ -131,6 +133,9 @@ class BaseResource(six.with_metaclass(ResourceMeta)):
     endpoint = None
     identity = ('name',)
 
+    # The number of names looked up by each request made by `resolve`.
+    resolve_batch_size = 100
+
     def as_command(self):
         """Return a `click.Command` class for interacting with this
         Resource.
@@ -151,28 +156,30 @@ class BaseResource(six.with_metaclass(ResourceMeta)):
 
             def list_commands(self, ctx):
                 """Return a list of all methods decorated with the
-                @resources.command decorator.
+                @resources.command decorator, with the words of each
+                name joined by hyphens, as they are typed.
                 """
-                return self.resource.commands
+                return [i.replace('_', '-') for i in self.resource.commands]
 
             def get_command(self, ctx, name):
                 """Retrieve the appropriate method from the Resource,
                 decorate it as a click command, and return that method.
                 """
                 # Sanity check: Does a method exist corresponding to this
-                # command? If not, this is an error.
-                if not hasattr(self.resource, name):
+                # command? If not, this is an error. (Commands of several
+                # words may be written with hyphens, too.)
+                if not hasattr(self.resource, name.replace('-', '_')):
                     raise exc.UsageError(
                         'The %s resource has no such command: "%s"' %
                         (self.resource_name, name),
                     )
 
                 # Get the method.
-                method = getattr(self.resource, name)
+                method = getattr(self.resource, name.replace('-', '_'))
 
                 # Get any attributes that were given at command-declaration
-                # time.
-                attrs = getattr(method, '_cli_command_attrs', {})
+                # time. (Copy them, since some are popped off below.)
+                attrs = dict(getattr(method, '_cli_command_attrs', {}))
 
                 # If the help message comes from the docstring, then
                 # convert it into a message specifically for this resource.
@@ -183,9 +190,23 @@ class BaseResource(six.with_metaclass(ResourceMeta)):
                 # for writing and not reading; process this.
                 ignore_defaults = attrs.pop('ignore_defaults', False)
 
+                # Read commands may be run against several Tower instances
+                # at once; process this.
+                fan_out = attrs.pop('fan_out', False)
+
+                # Read commands may also be answered from the local mirror
+                # when Tower is unavailable; process this.
+                offline = attrs.pop('offline', False)
+
+                # Commands that stream results of their own to standard
+                # output echo their return value to standard error instead,
+                # so as not to mix the two; process this.
+                stderr = attrs.pop('stderr', False)
+
                 # Wrap the method, such that it outputs its final return
                 # value rather than returning it.
-                new_method = self._echo_method(method)
+                new_method = self._echo_method(method, fan_out=fan_out,
+                                               offline=offline, stderr=stderr)
 
                 # Soft copy the "__click_params__", if any exist.
                 # This is the internal holding method that the click library
@@ -201,6 +222,17 @@ class BaseResource(six.with_metaclass(ResourceMeta)):
                 # bottom-to-top.)
                 click_params = getattr(method, '__click_params__', [])
                 new_method.__click_params__ = copy(click_params)
+                if fan_out:
+                    click.option('--hosts', required=False,
+                        help='A comma-separated list of Tower profiles (from '
+                             'tower_cli.cfg) to run this command against '
+                             'concurrently, or "all" for every profile.',
+                    )(new_method)
+                if offline:
+                    click.option('--offline', is_flag=True, default=False,
+                        help='Answer from the local mirror (see `tower-cli '
+                             'mirror`) rather than from Tower.',
+                    )(new_method)
 
                 # Write options based on the fields available on this resource.
                 fao = attrs.pop('use_fields_as_options', True)
@@ -278,17 +310,46 @@ class BaseResource(six.with_metaclass(ResourceMeta)):
                 # Done; return the new help text.
                 return help_text
 
-            def _echo_method(self, method):
+            def _echo_method(self, method, fan_out=False, offline=False,
+                             stderr=False):
                 """Given a method, return a method that runs the internal
-                method and echos the result.
+                method and echos the result (to standard error, if `stderr`
+                is set).
+
+                If `fan_out` is set, the method accepts a `hosts` option, and
+                is run against each of the named Tower profiles.
+
+                If `offline` is set, the method accepts an `offline` option,
+                and is then answered from the local mirror, with a note of
+                how old the mirror is.
                 """
                 @functools.wraps(method)
                 def func(*args, **kwargs):
-                    result = method(*args, **kwargs)
+                    hosts = kwargs.pop('hosts', None) if fan_out else None
+                    offline_mode = kwargs.pop('offline', False) and offline
+                    with settings.runtime_values(offline=offline_mode or None):
+                        if hosts:
+                            result = fleet.fan_out(method, hosts, *args,
+                                                   **kwargs)
+                            for error in result['errors']:
+                                secho('Error (%s): %s' % (
+                                    error['tower_host'], error['error'],
+                                ), err=True, fg='red', bold=True)
+                            for name in result['missing']:
+                                secho('Not found (%s).' % name, err=True,
+                                      fg='yellow')
+                        else:
+                            result = method(*args, **kwargs)
+
+                    # Commands that write their own output return nothing.
+                    if result is None:
+                        return
 
                     # If this was a request that could result in a modification
                     # of data, print it in Ansible coloring.
                     color_info = {}
+                    if stderr:
+                        color_info['err'] = True
                     if 'changed' in result:
                         if result['changed']:
                             color_info['fg'] = 'yellow'
@@ -301,6 +362,13 @@ class BaseResource(six.with_metaclass(ResourceMeta)):
 
                     # Perform the echo.
                     secho(output, **color_info)
+
+                    # Answers from the mirror may be out of date; say how
+                    # much, without disturbing the output itself.
+                    if offline_mode:
+                        name = type(self.resource).__module__.split('.')[-1]
+                        secho('(Offline: from the mirror, synced %s ago.)' %
+                              mirror.age(name), err=True, fg='yellow')
                 return func
 
             def _format_json(self, payload):
@@ -321,6 +389,12 @@ class BaseResource(six.with_metaclass(ResourceMeta)):
                                       if field.display]
                 columns.insert(0, 'id')
 
+                # Results gathered from several Tower instances say which
+                # one each record came from.
+                results = payload.get('results', [])
+                if any(['tower_host' in i for i in results]):
+                    columns.insert(1, 'tower_host')
+
                 # Sanity check: If there is a "changed" key in our payload
                 # and little else, we print a short message and not a table.
                 if 'changed' in payload and 'id' not in payload:
@@ -437,59 +511,15 @@ class Resource(BaseResource):
         (Note: This is meaningless if a primary key is included, as there can
         never be multiple results.)
         """
-        # Piece together the URL we will be hitting.
-        url = self.endpoint
-        if pk:
-            url += '%d/' % pk
-
-        # Pop the query parameter off of the keyword arguments; it will
-        # require special handling (below).
-        queries = kwargs.pop('query', [])
-
-        # Remove default values (anything where the value is None).
-        # click is unfortunately bad at the way it sends through unspecified
-        # defaults.
-        for key, value in copy(kwargs).items():
-            if value is None:
-                kwargs.pop(key)
-            if hasattr(value, 'read'):
-                kwargs[key] = value.read()
-
-        # If queries were provided, process them.
-        for query in queries:
-            if query[0] in kwargs:
-                raise exc.BadRequest('Attempted to set %s twice.' % query[0])
-            kwargs[query[0]] = query[1]
-
-        # Make the request to the Ansible Tower API.
-        r = client.get(url, params=kwargs)
-        resp = r.json()
-
-        # If this was a request with a primary key included, then at the
-        # point that we got a good result, we know that we're done and can
-        # return the result.
-        if pk:
-            # Make the results all look the same, for easier parsing
-            # by other methods.
-            #
-            # Note that the `get` method will effectively undo this operation,
-            # but that's a good thing, because we might use `get` without a
-            # primary key.
-            return {'count': 1, 'results': [resp]}
-
-        # Did we get zero results back when we shouldn't?
-        # If so, this is an error, and we need to complain.
-        if fail_on_no_results and resp['count'] == 0:
-            raise exc.NotFound('The requested object could not be found.')
-
-        # Did we get more than one result back?
-        # If so, this is also an error, and we need to complain.
-        if fail_on_multiple_results and resp['count'] >= 2:
-            raise exc.MultipleResults('Expected one result, got %d. Tighten '
-                                      'your criteria.' % resp['count'])
-
-        # Return the response.
-        return resp
+        # Make the request to the Ansible Tower API, unless the local
+        # mirror can answer it.
+        url, params = self._read_request(pk, kwargs)
+        answer = mirror.serve(type(self).__module__.split('.')[-1], pk,
+                              params)
+        if answer is None:
+            answer = client.get(url, params=params).json()
+        return self._read_response(pk, answer, fail_on_no_results,
+                                   fail_on_multiple_results)
 
     def write(self, pk=None, create_on_missing=False, fail_on_found=False,
                     force_on_exists=True, **kwargs):
@@ -513,16 +543,18 @@ class Resource(BaseResource):
         to False, then the non-unique values are only written in a creation
         case.
         """
-        existing_data = {}
+        self._clean_kwargs(kwargs)
 
-        # Remove default values (anything where the value is None).
-        # click is unfortunately bad at the way it sends through unspecified
-        # defaults.
-        for key, value in copy(kwargs).items():
-            if value is None:
-                kwargs.pop(key)
-            if hasattr(value, 'read'):
-                kwargs[key] = value.read()
+        # Check the field names and values against the API's metadata
+        # before making any requests.
+        schema.validate(self.endpoint, kwargs)
+
+        # In optimistic mode, skip reading the record before writing it.
+        if settings.optimistic_writes:
+            answer = self._optimistic_write(pk, create_on_missing,
+                                            force_on_exists, kwargs)
+            if answer is not None:
+                return answer
 
         # Determine which record we are writing, if we weren't given a
         # primary key.
@@ -542,62 +574,21 @@ class Resource(BaseResource):
             debug.log('Getting existing record.', header='details')
             existing_data = self.get(pk)
 
-        # Sanity check: Are we missing required values?
-        # If we don't have a primary key, then all required values must be
-        # set, and if they're not, it's an error.
-        required_fields = [i.key or i.name for i in self.fields if i.required]
-        missing_fields = [i for i in required_fields if i not in kwargs]
-        if missing_fields and not pk:
-            raise exc.BadRequest('Missing required fields: %s' %
-                                 ', '.join(missing_fields))
-
-        # Sanity check: Do we need to do a write at all?
-        # If `force_on_exists` is False and the record was, in fact, found,
-        # then no action is required.
-        if pk and not force_on_exists:
-            debug.log('Record already exists, and --force-on-exists is off; '
-                      'do nothing.', header='decision', nl=2)
-            answer = OrderedDict((
-                ('changed', False),
-                ('id', pk),
-            ))
-            answer.update(existing_data)
-            return answer
-
-        # Similarly, if all existing data matches our write parameters,
-        # there's no need to do anything.
-        if all([kwargs[k] == existing_data.get(k, None)
-                for k in kwargs.keys()]):
-            debug.log('All provided fields match existing data; do nothing.',
-                      header='decision', nl=2)
-            answer = OrderedDict((
-                ('changed', False),
-                ('id', pk),
-            ))
-            answer.update(existing_data)
+        # Decide whether a write is needed at all, and if so, where.
+        answer = self._write_plan(pk, existing_data, force_on_exists,
+                                  kwargs)
+        if answer is not None:
             return answer
-
-        # Get the URL and method to use for the write.
-        url = self.endpoint
-        method = 'POST'
-        if pk:
-            url += '%d/' % pk
-            method = 'PATCH'
+        url, method = self._write_request(pk)
+        if method == 'POST':
+            schema.validate(self.endpoint, kwargs, create=True)
 
         # If debugging is on, print the URL and data being sent.
         debug.log('Writing the record.', header='details')
 
         # Actually perform the write.
         r = getattr(client, method.lower())(url, data=kwargs)
-
-        # At this point, we know the write succeeded, and we know that data
-        # was changed in the process.
-        answer = OrderedDict((
-            ('changed', True),
-            ('id', r.json()['id']),
-        ))
-        answer.update(r.json())
-        return answer
+        return self._write_response(r.json())
 
     @resources.command
     def delete(self, pk=None, fail_on_missing=False, **kwargs):
@@ -633,7 +624,7 @@ class Resource(BaseResource):
     #   - read:  get, list
     #   - write: create, modify
 
-    @resources.command(ignore_defaults=True)
+    @resources.command(ignore_defaults=True, fan_out=True, offline=True)
     def get(self, pk=None, **kwargs):
         """Return one and exactly one object.
 
@@ -648,7 +639,8 @@ class Resource(BaseResource):
                              fail_on_multiple_results=True, **kwargs)
         return response['results'][0]
 
-    @resources.command(ignore_defaults=True, no_args_is_help=False)
+    @resources.command(ignore_defaults=True, no_args_is_help=False,
+                       fan_out=True, offline=True)
     @click.option('all_pages', '-a', '--all-pages',
                   is_flag=True, default=False, show_default=True,
                   help='If set, collate all pages of content from the API '
@@ -681,11 +673,7 @@ class Resource(BaseResource):
 
         # Alter the "next" and "previous" to reflect simple integers,
         # rather than URLs, since this endpoint just takes integers.
-        for key in ('next', 'previous'):
-            if not response[key]:
-                continue
-            match = re.search(r'page=(?P<num>[\d]+)', response[key])
-            response[key] = int(match.groupdict()['num'])
+        self._normalize_pages(response)
 
         # If we were asked for all pages, keep retrieving pages until we
         # have them all.
@@ -698,6 +686,37 @@ class Resource(BaseResource):
         # Done; return the response
         return response
 
+    @resources.command(ignore_defaults=True, no_args_is_help=False)
+    @click.option('-o', '--output', type=click.File('wb'), default='-',
+                  help='The file to write the table to. Defaults to '
+                       'standard output.')
+    @click.option('--table-format', type=click.Choice(tables.FORMATS),
+                  default='csv', show_default=True,
+                  help='The format of the table. Parquet requires the '
+                       'pyarrow library.')
+    @click.option('--summary-fields', required=False,
+                  help='A comma-separated list of fields of related '
+                       'records to add as columns, such as inventory.name. '
+                       'Defaults to the name of each related record.')
+    @click.option('-Q', '--query', required=False, nargs=2, multiple=True,
+                  help='A key and value to be passed as an HTTP query string '
+                       'key and value to the Tower API. This argument may be '
+                       'sent multiple times.')
+    def export_table(self, output, table_format='csv', summary_fields=None,
+                     **kwargs):
+        """Write the objects to a table, for spreadsheets and data frames.
+
+        If one or more filters are provided through keyword arguments,
+        only the matching objects are written. Objects are read and
+        written a page at a time.
+        """
+        if summary_fields is not None:
+            summary_fields = [i.strip() for i in summary_fields.split(',')
+                              if i.strip()]
+        count = tables.export_table(self, output, table_format=table_format,
+                                    summary_fields=summary_fields, **kwargs)
+        secho('Wrote %d records.' % count, err=True)
+
     @resources.command
     @click.option('--fail-on-found', default=False,
                   show_default=True, type=bool, is_flag=True,
@@ -738,6 +757,319 @@ class Resource(BaseResource):
         return self.write(pk, create_on_missing=create_on_missing,
                               force_on_exists=force_on_exists, **kwargs)
 
+    @resources.command(use_fields_as_options=False, stderr=True)
+    @click.option('operations', '--file', type=File('r'), required=True,
+                  help='A file of operations, one JSON object per line, '
+                       'or "-" to read them from standard input.')
+    @click.option('--results', type=File('w'), default='-',
+                  help='Where to write the result of each operation, one '
+                       'JSON object per line. Defaults to standard output.')
+    @click.option('--workers', type=int, required=False,
+                  help='The number of operations to run at once. Defaults '
+                       'to the `concurrency` setting.')
+    def bulk(self, operations, results=None, workers=None):
+        """Create, modify and delete many objects, as described by a file
+        of operations in JSON, one per line, such as:
+
+            {"action": "create", "name": "foo"}
+
+        Return a summary of the results (printed to standard error, apart
+        from the results themselves). The result of each operation is
+        written as it finishes; a failed operation does not stop the
+        others.
+        """
+        def write_results():
+            for result in bulk.run(self, bulk.read_operations(operations),
+                                   workers=workers):
+                if results is not None:
+                    results.write(json.dumps(result) + '\n')
+                    results.flush()
+                yield result
+        return bulk.summarize(write_results())
+
+    def resolve(self, names, **scope):
+        """Look up many objects by name at once, and return an ordered
+        dictionary mapping each name to the primary key of its object.
+
+        Keyword arguments narrow the lookup to a scope, given by the
+        resource's other identity fields (such as `inventory` for hosts).
+        A name may also be a tuple giving all of the identity fields in
+        order, such as `(inventory, name)`, to mix scopes in one call; it
+        is then keyed by the tuple. Names that are primary keys already
+        are passed through.
+
+        Names are looked up a batch at a time with `__in` queries (which
+        run concurrently), rather than one request per name. If any name
+        matches no object, or more than one, every such name is reported
+        in one `RelatedError` (`MultipleRelatedError` if any are
+        ambiguous).
+        """
+        answer, missing, ambiguous = self.resolve_partial(names, **scope)
+        missing = [i[-1] if isinstance(i, tuple) else i for i in missing]
+        ambiguous = [i[-1] if isinstance(i, tuple) else i for i in ambiguous]
+
+        endpoint = self.endpoint.strip('/')
+        if ambiguous:
+            raise exc.MultipleRelatedError(
+                'Cannot look up %s exclusively by name, because more than '
+                'one exists with each of these names: %s.%s\n'
+                'Please send IDs instead.' % (
+                    endpoint, ', '.join(ambiguous),
+                    ' Also, there are no %s named: %s.' % (
+                        endpoint, ', '.join(missing)) if missing else '',
+                ))
+        if missing:
+            raise exc.RelatedError('Could not get %s named: %s.' %
+                                   (endpoint, ', '.join(missing)))
+        return answer
+
+    def resolve_partial(self, names, **scope):
+        """Look up many objects by name at once, as `resolve` does, but
+        report names that cannot be resolved rather than raising.
+
+        Return a tuple of the ordered dictionary mapping each name to the
+        primary key of its object (or None), the names matching no object,
+        and the names matching more than one.
+        """
+        field = self.identity[-1]
+        answer = OrderedDict()
+
+        # Group the names by scope, so that each scope can be queried
+        # separately.
+        groups = OrderedDict()
+        for item in names:
+            item_scope = dict(scope)
+            name = item
+            if isinstance(item, tuple):
+                item_scope.update(zip(self.identity[:-1], item[:-1]))
+                name = item[-1]
+            if isinstance(name, int) or re.match(r'^\d+$', name):
+                answer[item] = int(name)
+                continue
+            answer[item] = None
+            key = tuple(sorted(item_scope.items()))
+            groups.setdefault(key, OrderedDict())[name] = []
+
+        # Build the queries. Names containing commas cannot be sent in an
+        # `__in` query, and are looked up one at a time.
+        queries = []
+        for key, found in groups.items():
+            batch = [i for i in found if ',' not in i]
+            for i in range(0, len(batch), self.resolve_batch_size):
+                chunk = batch[i:i + self.resolve_batch_size]
+                queries.append((key, '%s__in' % field, ','.join(chunk)))
+            for name in [i for i in found if ',' in i]:
+                queries.append((key, field, name))
+
+        def run(query):
+            key, lookup, value = query
+            debug.log('Looking up %s objects by %s.' %
+                      (self.endpoint.strip('/'), field), header='details')
+            return self.list(all_pages=True, query=[
+                (lookup, value), ('page_size', self.resolve_batch_size),
+            ], **dict(key))['results']
+
+        for query, records in zip(queries, parallel.map(run, queries)):
+            found = groups[query[0]]
+            for record in records:
+                if record[field] in found:
+                    found[record[field]].append(record['id'])
+
+        # Assign the primary keys found, noting any names that match no
+        # object or more than one.
+        missing = []
+        ambiguous = []
+        for item in answer:
+            if answer[item] is not None:
+                continue
+            item_scope = dict(scope)
+            name = item
+            if isinstance(item, tuple):
+                item_scope.update(zip(self.identity[:-1], item[:-1]))
+                name = item[-1]
+            pks = groups[tuple(sorted(item_scope.items()))][name]
+            if len(pks) == 1:
+                answer[item] = pks[0]
+            elif pks:
+                ambiguous.append(item)
+            else:
+                missing.append(item)
+        return answer, missing, ambiguous
+
+    # Helpers shared by `read` and `write` and their asynchronous
+    # counterparts in `tower_cli.aio`, which differ only in how the HTTP
+    # request is made.
+
+    def _clean_kwargs(self, kwargs):
+        """Remove default values (anything where the value is None) and
+        read any files, modifying `kwargs` in place.
+
+        click is unfortunately bad at the way it sends through unspecified
+        defaults.
+        """
+        for key, value in copy(kwargs).items():
+            if value is None:
+                kwargs.pop(key)
+            if hasattr(value, 'read'):
+                kwargs[key] = value.read()
+        return kwargs
+
+    def _read_request(self, pk, kwargs):
+        """Return the URL and query parameters for a `read` call."""
+        # Piece together the URL we will be hitting.
+        url = self.endpoint
+        if pk:
+            url += '%d/' % pk
+
+        # Pop the query parameter off of the keyword arguments; it will
+        # require special handling (below).
+        queries = kwargs.pop('query', [])
+        self._clean_kwargs(kwargs)
+
+        # If queries were provided, process them.
+        for query in queries:
+            if query[0] in kwargs:
+                raise exc.BadRequest('Attempted to set %s twice.' % query[0])
+            kwargs[query[0]] = query[1]
+        return url, kwargs
+
+    def _read_response(self, pk, resp, fail_on_no_results=False,
+                             fail_on_multiple_results=False):
+        """Validate and return the decoded response to a `read` call."""
+        # If this was a request with a primary key included, then at the
+        # point that we got a good result, we know that we're done and can
+        # return the result.
+        if pk:
+            # Make the results all look the same, for easier parsing
+            # by other methods.
+            #
+            # Note that the `get` method will effectively undo this operation,
+            # but that's a good thing, because we might use `get` without a
+            # primary key.
+            return {'count': 1, 'results': [resp]}
+
+        # Did we get zero results back when we shouldn't?
+        # If so, this is an error, and we need to complain.
+        if fail_on_no_results and resp['count'] == 0:
+            raise exc.NotFound('The requested object could not be found.')
+
+        # Did we get more than one result back?
+        # If so, this is also an error, and we need to complain.
+        if fail_on_multiple_results and resp['count'] >= 2:
+            raise exc.MultipleResults('Expected one result, got %d. Tighten '
+                                      'your criteria.' % resp['count'])
+
+        # Return the response.
+        return resp
+
+    def _write_plan(self, pk, existing_data, force_on_exists, kwargs):
+        """Given the record (if any) that a write would change, decide
+        whether a write is needed.
+
+        If no write is needed, return the answer to give; otherwise, return
+        None.
+        """
+        # Sanity check: Are we missing required values?
+        # If we don't have a primary key, then all required values must be
+        # set, and if they're not, it's an error.
+        required_fields = [i.key or i.name for i in self.fields if i.required]
+        missing_fields = [i for i in required_fields if i not in kwargs]
+        if missing_fields and not pk:
+            raise exc.BadRequest('Missing required fields: %s' %
+                                 ', '.join(missing_fields))
+
+        # Sanity check: Do we need to do a write at all?
+        # If `force_on_exists` is False and the record was, in fact, found,
+        # then no action is required.
+        if pk and not force_on_exists:
+            debug.log('Record already exists, and --force-on-exists is off; '
+                      'do nothing.', header='decision', nl=2)
+            answer = OrderedDict((
+                ('changed', False),
+                ('id', pk),
+            ))
+            answer.update(existing_data)
+            return answer
+
+        # Similarly, if all existing data matches our write parameters,
+        # there's no need to do anything.
+        if all([kwargs[k] == existing_data.get(k, None)
+                for k in kwargs.keys()]):
+            debug.log('All provided fields match existing data; do nothing.',
+                      header='decision', nl=2)
+            answer = OrderedDict((
+                ('changed', False),
+                ('id', pk),
+            ))
+            answer.update(existing_data)
+            return answer
+        return None
+
+    def _write_request(self, pk):
+        """Return the URL and HTTP method to use for a write."""
+        url = self.endpoint
+        method = 'POST'
+        if pk:
+            url += '%d/' % pk
+            method = 'PATCH'
+        return url, method
+
+    def _optimistic_write(self, pk, create_on_missing, force_on_exists,
+                                kwargs):
+        """Attempt a write without first reading the record, and return
+        the answer, or None if the write must be done the usual way.
+
+        A creation is posted directly; if the server reports that the
+        record already exists, return None, so that it is looked up and
+        compared as usual. A modification by primary key is sent directly,
+        and reported as a change, since the record's prior state is not
+        known.
+        """
+        if pk and force_on_exists:
+            debug.log('Writing the record without reading it first.',
+                      header='details')
+            r = client.patch('%s%d/' % (self.endpoint, pk), data=kwargs)
+            return self._write_response(r.json())
+
+        if not pk and create_on_missing:
+            answer = self._write_plan(None, {}, force_on_exists, kwargs)
+            if answer is not None:
+                return answer
+            schema.validate(self.endpoint, kwargs, create=True)
+            debug.log('Creating the record without checking for an existing '
+                      'one first.', header='details')
+            try:
+                r = client.post(self.endpoint, data=kwargs)
+            except exc.BadRequest as ex:
+                if 'already exists' not in ex.message:
+                    raise
+                debug.log('The record already exists.', header='decision')
+                return None
+            return self._write_response(r.json())
+        return None
+
+    def _write_response(self, resp):
+        """Return the answer for a write that the server accepted."""
+        # At this point, we know the write succeeded, and we know that data
+        # was changed in the process.
+        answer = OrderedDict((
+            ('changed', True),
+            ('id', resp['id']),
+        ))
+        answer.update(resp)
+        return answer
+
+    def _normalize_pages(self, response):
+        """Alter the "next" and "previous" of a list response to reflect
+        simple integers, rather than URLs, since `list` just takes integers.
+        """
+        for key in ('next', 'previous'):
+            if not response[key]:
+                continue
+            match = re.search(r'page=(?P<num>[\d]+)', response[key])
+            response[key] = int(match.groupdict()['num'])
+        return response
+
     def _assoc(self, url_fragment, me, other):
         """Associate the `other` record with the `me` record."""
 
@@ -770,6 +1102,52 @@ class Resource(BaseResource):
         r = client.post(url, data={'disassociate': True, 'id': other})
         return {'changed': True}
 
+    def _assoc_many(self, url_fragment, me, others, disassociate=False):
+        """Associate each of the `others` records with the `me` record (or
+        disassociate them, if `disassociate` is set).
+
+        The current members are read once, and only the records whose
+        membership must change are sent, concurrently.
+        """
+        url = self.endpoint + '%d/%s/' % (me, url_fragment)
+        current = self._members(url_fragment, me)
+
+        # Determine which records need to change, and change them.
+        if disassociate:
+            todo = [i for i in OrderedDict.fromkeys(others) if i in current]
+        else:
+            todo = [i for i in OrderedDict.fromkeys(others)
+                    if i not in current]
+        action = 'disassociate' if disassociate else 'associate'
+        debug.log('Sending %d changes.' % len(todo), header='details')
+        parallel.map(lambda other: client.post(url, data={
+            action: True, 'id': other,
+        }), todo)
+        return OrderedDict((('changed', bool(todo)), ('count', len(todo))))
+
+    def _members(self, url_fragment, me):
+        """Return the set of IDs of the records associated with the `me`
+        record, reading all of them at once.
+        """
+        url = self.endpoint + '%d/%s/' % (me, url_fragment)
+        debug.log('Getting the current members.', header='details')
+        answer = set()
+        for r in read_pages(lambda page: client.get(url, params={
+                'page': page, 'page_size': 200}).json()):
+            answer.update([i['id'] for i in r['results']])
+        return answer
+
+    def _resolve_file(self, resource_name, names_file, **scope):
+        """Read the names (or IDs) of records of the given resource from a
+        file, one per line, and return their primary keys.
+
+        Blank lines, and lines starting with "#", are skipped.
+        """
+        names = [i.strip() for i in names_file.read().splitlines()]
+        names = [i for i in names if i and not i.startswith('#')]
+        pks = get_resource(resource_name).resolve(names, **scope)
+        return [pks[i] for i in names]
+
     def _lookup(self, fail_on_missing=False, fail_on_found=False,
                       include_debug_header=True, **kwargs):
         """Attempt to perform a lookup that is expected to return a single
@@ -813,6 +1191,9 @@ class MonitorableResource(Resource):
     """
     abstract = True  # Not inherited.
 
+    # The states in which a task is done, and no longer changes.
+    finished_states = results.FINISHED_STATES
+
     def status(self, pk, detail=False):
         """A stub method requesting the status of the resource."""
         raise NotImplementedError('This resource does not implement a status '
@@ -0,0 +1,693 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bringing the contents of Tower in line with a description of how they
+should be.
+
+The current state is read in bulk, compared with the desired state, and
+the differences are printed (in the human format) as a plan of steps.
+Unless this is a dry run, the steps are then made, a phase at a time
+(creations and updates, then memberships, then deletions), with the steps
+of each phase running concurrently.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import csv
+import json
+import os
+
+import six
+
+import tower_cli
+from tower_cli import bulk
+from tower_cli.api import client
+from tower_cli.conf import settings
+from tower_cli.index import IdentityIndex
+from tower_cli.utils import exceptions as exc, parallel, secho
+from tower_cli.utils.data_structures import OrderedDict
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional.
+    yaml = None
+
+
+def load(source):
+    """Load the desired state from the given open file, which may be JSON,
+    YAML (if PyYAML is installed) or CSV, going by its extension.
+
+    CSV files give a list of rows, as dictionaries keyed by the header.
+    """
+    name = getattr(source, 'name', '') or ''
+    extension = os.path.splitext(name)[1].lower()
+    text = source.read()
+    if extension == '.csv':
+        return [dict(row) for row in csv.DictReader(six.StringIO(text))]
+    if extension in ('.yml', '.yaml'):
+        if yaml is None:
+            raise exc.TowerCLIError('Reading YAML requires the PyYAML '
+                                    'library.')
+        return yaml.safe_load(text)
+    try:
+        return json.loads(text, object_pairs_hook=OrderedDict)
+    except ValueError as ex:
+        raise exc.UsageError('Could not read %s: %s' %
+                             (name or 'the source', ex))
+
+
+def parse_variables(value):
+    """Return variables, given as a dictionary or as JSON or YAML text, as
+    a dictionary. Text that cannot be parsed is returned unchanged.
+    """
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return dict(value)
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        if yaml is None:
+            return value
+        try:
+            parsed = yaml.safe_load(value)
+        except yaml.YAMLError:
+            return value
+    if parsed is None:
+        return {}
+    return parsed if isinstance(parsed, dict) else value
+
+
+def changes(record, desired):
+    """Return the names of the fields whose desired values differ from
+    those of the given record.
+    """
+    answer = []
+    for key, value in desired.items():
+        current = record.get(key, None)
+        if key == 'variables':
+            if parse_variables(current) != parse_variables(value):
+                answer.append(key)
+        elif current != value:
+            answer.append(key)
+    return answer
+
+
+def variables_text(value):
+    """Return variables in the form Tower stores them: as text."""
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+class Step(object):
+    """One step of a plan: an action on a named record."""
+    symbols = {'create': '+', 'update': '~', 'delete': '-',
+               'associate': '>', 'disassociate': '<'}
+
+    def __init__(self, action, kind, name, detail='', operation=None,
+                 func=None, id=None):
+        self.id = id
+        self.action = action
+        self.kind = kind
+        self.name = name
+        self.detail = detail
+        self.operation = operation
+        self.func = func
+
+    def __str__(self):
+        answer = '%s %s %s %s' % (self.symbols[self.action], self.action,
+                                  self.kind, self.name)
+        if self.detail:
+            answer += ' (%s)' % self.detail
+        return answer
+
+    @property
+    def color(self):
+        return {'create': 'green', 'delete': 'red'}.get(self.action,
+                                                        'yellow')
+
+
+class Plan(object):
+    """The steps needed to reconcile Tower with the desired state, in
+    phases, made in the order given; the steps of a phase are independent
+    of one another.
+    """
+    def __init__(self, phases=()):
+        self.phases = OrderedDict([(i, []) for i in phases])
+
+    def add(self, phase, step):
+        self.phases.setdefault(phase, []).append(step)
+
+    @property
+    def steps(self):
+        return [step for steps in self.phases.values() for step in steps]
+
+    def show(self, outfile=None):
+        """Print the plan."""
+        steps = self.steps
+        if not steps:
+            secho('Nothing to do.', file=outfile)
+        for step in steps:
+            secho(six.text_type(step), fg=step.color, file=outfile)
+
+    def summary(self, failures=()):
+        """Return the number of steps of each kind, and of failures."""
+        answer = OrderedDict([(i, 0) for i in (
+            'create', 'update', 'delete', 'associate', 'disassociate')])
+        for step in self.steps:
+            answer[step.action] += 1
+        answer['failed'] = len(failures)
+        return answer
+
+    def apply(self, targets, workers=None, outfile=None):
+        """Make the steps of the plan, a phase at a time, and return the
+        steps that failed, with their errors (which are also printed, to
+        standard error unless another file is given).
+
+        A phase's record operations (creations, updates and deletions)
+        are made with the bulk engine, using the resource and the
+        `IdentityIndex` of its records given for the phase in `targets`
+        (and writing only the records' own fields, so never through a
+        resource's customized methods); its other steps are function
+        calls.
+        """
+        failures = []
+        for phase, steps in self.phases.items():
+            operations = [i for i in steps if i.operation is not None]
+            if operations:
+                resource, index = targets[phase]
+                results = bulk.run(resource,
+                                   [i.operation for i in operations],
+                                   workers=workers, index=index,
+                                   overrides=False)
+                for step, result in zip(operations, results):
+                    if result['result'] == 'failed':
+                        failures.append((step, result['error']))
+                    elif step.action == 'create':
+                        step.id = result['id']
+
+            calls = [i for i in steps if i.func is not None]
+            for step, _, error in parallel.imap(lambda i: i.func(), calls,
+                                                workers=workers):
+                if error is not None:
+                    failures.append((step, six.text_type(
+                        getattr(error, 'message', error))))
+
+        for step, error in failures:
+            secho('Failed: %s: %s' % (step, error), fg='red', bold=True,
+                  err=True, file=outfile)
+        return failures
+
+
+def record_id(kind, name, target):
+    """Return the primary key of a record that the plan refers to either
+    by its primary key or by the `Step` creating or updating it.
+    """
+    if isinstance(target, Step):
+        target = target.id
+    if not target:
+        raise exc.TowerCLIError('The %s %s could not be created.' %
+                                (kind, name))
+    return target
+
+
+def membership_step(action, endpoint, url_fragment, parent, member):
+    """Return the step associating (or disassociating) a member record
+    with a parent record of the given endpoint.
+
+    The parent and member are each given as a `(kind, name, target)`
+    tuple, where the target is as for `record_id`; their primary keys are
+    only needed when the step is made, after any creations.
+    """
+    def func():
+        pk = record_id(*parent)
+        client.post('%s%d/%s/' % (endpoint, pk, url_fragment),
+                    data={action: True, 'id': record_id(*member)})
+    detail = '%s %s %s' % ('in' if action == 'associate' else 'from',
+                           parent[0], parent[1])
+    return Step(action, member[0], member[1], detail=detail, func=func)
+
+
+def desired_inventory(data):
+    """Return the desired groups and hosts of an inventory, as ordered
+    dictionaries mapping names to specifications, from the loaded source.
+
+    The source is either a dictionary with `groups` and `hosts` (each a
+    dictionary keyed by name, or a list of dictionaries with a `name`), or
+    rows from a CSV file with `name`, `groups` (separated by semicolons),
+    `description`, `enabled` and `variables` columns, describing hosts.
+    """
+    groups = OrderedDict()
+    hosts = OrderedDict()
+    if isinstance(data, list):
+        for row in data:
+            name = (row.get('name', None) or '').strip()
+            if not name:
+                continue
+            host = {'groups': [i.strip() for i in
+                               (row.get('groups', None) or '').split(';')
+                               if i.strip()]}
+            for key in ('description', 'variables'):
+                if row.get(key, None):
+                    host[key] = row[key]
+            if row.get('enabled', None):
+                host['enabled'] = row['enabled'].strip().lower() in (
+                    '1', 'true', 'yes', 'y')
+            hosts[name] = host
+    elif isinstance(data, dict):
+        for key, answer in (('groups', groups), ('hosts', hosts)):
+            items = data.get(key, None) or {}
+            if isinstance(items, list):
+                items = OrderedDict([(i['name'], i) for i in items])
+            for name, spec in items.items():
+                answer[name] = dict(spec or {})
+                answer[name].pop('name', None)
+    else:
+        raise exc.UsageError('The source must describe groups and hosts.')
+
+    # Groups that hosts belong to, or that are children of other groups,
+    # are wanted too.
+    for host in hosts.values():
+        for name in host.get('groups', []):
+            groups.setdefault(name, {})
+    for group in list(groups.values()):
+        for name in group.get('children', []):
+            groups.setdefault(name, {})
+    return groups, hosts
+
+
+def inventory_members(inventory):
+    """Return the names of the hosts and child groups of each group of the
+    given inventory, as a dictionary mapping group names to a tuple of two
+    sets.
+
+    They are read at once, from the inventory's script (the inventory as
+    Ansible is given it, with disabled hosts included), rather than with
+    requests for each group.
+    """
+    script = client.get('/inventories/%d/script/' % inventory,
+                        params={'all': 1}).json()
+    answer = {}
+    for name, group in script.items():
+        if name == '_meta':
+            continue
+        if isinstance(group, list):
+            group = {'hosts': group}
+        answer[name] = (set(group.get('hosts', None) or []),
+                        set(group.get('children', None) or []))
+    return answer
+
+
+def plan_inventory(inventory, groups, hosts, keep_extra=False,
+                   workers=None):
+    """Compare the desired groups and hosts with the current contents of
+    the inventory, and return the `Plan` to reconcile them, along with the
+    targets of its phases (see `Plan.apply`).
+    """
+    group_resource = tower_cli.get_resource('group')
+    host_resource = tower_cli.get_resource('host')
+
+    # Read the current state: the groups and hosts of the inventory, and
+    # the hosts and child groups of each group.
+    current_groups, current_hosts, members = parallel.map(
+        lambda read: read(), (
+            lambda: IdentityIndex(group_resource, inventory=inventory),
+            lambda: IdentityIndex(host_resource, inventory=inventory),
+            lambda: inventory_members(inventory),
+        ), workers=workers)
+
+    plan = Plan(('group', 'host', 'membership', 'delete host',
+                 'delete group'))
+    group_steps = {}
+    host_steps = {}
+
+    # Create or update groups and hosts.
+    for kind, desired, index, steps, fields in (
+            ('group', groups, current_groups, group_steps,
+             ('description', 'variables')),
+            ('host', hosts, current_hosts, host_steps,
+             ('description', 'enabled', 'variables'))):
+        for name, spec in desired.items():
+            data = dict([(k, spec[k]) for k in fields if k in spec])
+            record = index.lookup(name=name, inventory=inventory)
+            if record is None:
+                operation = dict(data, action='create', name=name,
+                                 inventory=inventory)
+                step = Step('create', kind, name, operation=operation)
+            else:
+                changed = changes(record, data)
+                if not changed:
+                    steps[name] = record['id']
+                    continue
+                operation = dict([(k, data[k]) for k in changed],
+                                 action='modify', id=record['id'])
+                step = Step('update', kind, name, detail=', '.join(changed),
+                            operation=operation, id=record['id'])
+            if 'variables' in operation:
+                operation['variables'] = variables_text(
+                    operation['variables'])
+            steps[name] = step
+            plan.add(kind, step)
+
+    def membership(action, url_fragment, group, kind, steps, name):
+        return membership_step(action, '/groups/', url_fragment,
+                               ('group', group, group_steps[group]),
+                               (kind, name, steps[name]))
+
+    # Add and remove hosts and child groups in groups.
+    for group, spec in groups.items():
+        current_members, current_children = members.get(group,
+                                                         (set(), set()))
+        for kind, url_fragment, wanted, current, steps in (
+                ('host', 'hosts',
+                 [i for i in hosts if group in hosts[i].get('groups', [])],
+                 current_members, host_steps),
+                ('group', 'children', spec.get('children', []),
+                 current_children, group_steps)):
+            for name in wanted:
+                if name not in current:
+                    plan.add('membership', membership(
+                        'associate', url_fragment, group, kind, steps, name))
+            for name in sorted([i for i in current if i in steps and
+                                i not in wanted]):
+                plan.add('membership', membership(
+                    'disassociate', url_fragment, group, kind, steps, name))
+
+    # Delete hosts and groups that are not wanted.
+    if not keep_extra:
+        for kind, index, desired in (('host', current_hosts, hosts),
+                                     ('group', current_groups, groups)):
+            for pk, record in sorted(index.by_id.items()):
+                if record['name'] not in desired:
+                    plan.add('delete %s' % kind, Step(
+                        'delete', kind, record['name'],
+                        operation={'action': 'delete', 'id': pk}))
+
+    targets = {'group': (group_resource, current_groups),
+               'host': (host_resource, current_hosts),
+               'delete host': (host_resource, current_hosts),
+               'delete group': (group_resource, current_groups)}
+    return plan, targets
+
+
+def reconcile_inventory(inventory, source, dry_run=False, keep_extra=False,
+                        workers=None, outfile=None):
+    """Reconcile the inventory with the desired state in the given source
+    file, and return a summary of the steps made (or, for a dry run, that
+    would be made).
+
+    The plan is printed first, in the human format only; in the others,
+    the summary is all that is written to standard output.
+    """
+    groups, hosts = desired_inventory(load(source))
+    plan, targets = plan_inventory(inventory, groups, hosts,
+                                   keep_extra=keep_extra, workers=workers)
+    if settings.format == 'human':
+        plan.show(outfile=outfile)
+    if dry_run:
+        return plan.summary()
+    failures = plan.apply(targets, workers=workers, outfile=outfile)
+    return plan.summary(failures)
+
+
+def split_list(value):
+    """Return a list given either as a list or as text separated by
+    semicolons.
+    """
+    if not value:
+        return []
+    if isinstance(value, six.string_types):
+        value = value.split(';')
+    return [six.text_type(i).strip() for i in value
+            if six.text_type(i).strip()]
+
+
+def desired_users(data):
+    """Return the desired users, as a list of specifications in the order
+    of the source, from the loaded source.
+
+    The source is a list of users (such as the rows of a CSV file), each
+    with a `username`, any of `email`, `first_name`, `last_name`,
+    `is_superuser` and `password` (which is only used for new users), and
+    the `organizations` and `teams` that the user belongs to. A team is
+    named either by itself or, if the name is not unique, as
+    "organization/team".
+    """
+    if isinstance(data, dict):
+        data = data.get('users', None)
+    if not isinstance(data, list):
+        raise exc.UsageError('The source must be a list of users.')
+    answer = []
+    for row in data:
+        user = {'username': (row.get('username', None) or '').strip()}
+        for key in ('email', 'first_name', 'last_name', 'password'):
+            if row.get(key, None):
+                user[key] = row[key]
+        superuser = row.get('is_superuser', None)
+        if isinstance(superuser, six.string_types):
+            superuser = superuser.strip().lower() in ('1', 'true', 'yes',
+                                                      'y')
+        if superuser is not None and superuser != '':
+            user['is_superuser'] = bool(superuser)
+        user['organizations'] = split_list(row.get('organizations', None))
+        user['teams'] = split_list(row.get('teams', None))
+        answer.append(user)
+    return answer
+
+
+def plan_users(users, keep_extra=False, workers=None):
+    """Compare the desired users with the current users of Tower and their
+    memberships, and return the `Plan` to reconcile them, the targets of
+    its phases (see `Plan.apply`), and for each of the desired users
+    either the list of its steps or the error that prevents planning it.
+
+    Only the memberships of the organizations and teams that the source
+    names are considered; a user is removed from those of them that the
+    user's row does not list, unless `keep_extra` is set.
+    """
+    user_resource = tower_cli.get_resource('user')
+    organization_resource = tower_cli.get_resource('organization')
+    team_resource = tower_cli.get_resource('team')
+
+    # Read the current state: users, organizations, teams, and the users
+    # of each of the organizations and teams that the source names.
+    current_users = IdentityIndex(user_resource)
+    organizations = IdentityIndex(organization_resource)
+    teams = IdentityIndex(team_resource)
+
+    def find_team(name):
+        if '/' in name:
+            organization, name = name.split('/', 1)
+            organization = organizations.lookup(name=organization)
+            if organization is None:
+                return []
+            return teams.find(name=name, organization=organization['id'])
+        return teams.find(name=name)
+
+    rows = []
+    parents = OrderedDict()
+    for user in users:
+        found = OrderedDict()
+        try:
+            if not user['username']:
+                raise exc.UsageError('A username is required.')
+            for kind, names, find in (
+                    ('organization', user['organizations'],
+                     lambda name: organizations.find(name=name)),
+                    ('team', user['teams'], find_team)):
+                for name in names:
+                    matches = find(name)
+                    if len(matches) != 1:
+                        raise exc.NotFound(
+                            'Could not find the %s %s.' % (kind, name)
+                            if not matches else
+                            'More than one %s is named %s; name it as '
+                            '"organization/team".' % (kind, name))
+                    found[(kind, matches[0]['id'])] = name
+        except exc.TowerCLIError as ex:
+            rows.append(ex)
+            continue
+        parents.update(found)
+        rows.append(found)
+    members = dict(zip(parents.keys(), parallel.map(
+        lambda key: {'organization': organization_resource,
+                     'team': team_resource}[key[0]]._members('users',
+                                                             key[1]),
+        list(parents.keys()), workers=workers,
+    )))
+
+    plan = Plan(('user', 'membership'))
+    answer = []
+    for user, found in zip(users, rows):
+        if isinstance(found, Exception):
+            answer.append(found)
+            continue
+        steps = []
+        username = user['username']
+        fields = dict([(k, v) for k, v in user.items()
+                       if k not in ('organizations', 'teams')])
+        record = current_users.lookup(username=username)
+        if record is None:
+            target = Step('create', 'user', username,
+                          operation=dict(fields, action='create'))
+            steps.append(target)
+            plan.add('user', target)
+        else:
+            fields.pop('password', None)
+            changed = changes(record, fields)
+            target = record['id']
+            if changed:
+                target = Step('update', 'user', username,
+                              detail=', '.join(changed), id=record['id'],
+                              operation=dict([(k, fields[k])
+                                              for k in changed],
+                                             action='modify',
+                                             id=record['id']))
+                steps.append(target)
+                plan.add('user', target)
+
+        # Add the user to the organizations and teams listed, and remove
+        # the user from the others that the source names.
+        pk = record['id'] if record else None
+        for key, name in parents.items():
+            name = found.get(key, name)
+            action = None
+            if key in found and pk not in members[key]:
+                action = 'associate'
+            elif key not in found and pk in members[key] and \
+                    not keep_extra:
+                action = 'disassociate'
+            if action:
+                endpoint = {'organization': '/organizations/',
+                            'team': '/teams/'}[key[0]]
+                step = membership_step(action, endpoint, 'users',
+                                       (key[0], name, key[1]),
+                                       ('user', username, target))
+                steps.append(step)
+                plan.add('membership', step)
+        answer.append(steps)
+
+    targets = {'user': (user_resource, current_users)}
+    return plan, targets, answer
+
+
+def sync_users(source, dry_run=False, keep_extra=False, workers=None,
+               outfile=None):
+    """Reconcile the users of Tower, and their memberships, with the users
+    in the given source file; print the outcome for each user, and return
+    a summary of the outcomes.
+
+    The plan and the outcomes are printed in the human format only; in
+    the others, the summary is all that is written to standard output.
+    """
+    human = settings.format == 'human'
+    users = desired_users(load(source))
+    plan, targets, rows = plan_users(users, keep_extra=keep_extra,
+                                     workers=workers)
+    if human:
+        plan.show(outfile=outfile)
+    if dry_run:
+        errors = [(user, i) for user, i in zip(users, rows)
+                  if isinstance(i, Exception)]
+        for user, error in errors:
+            secho('Failed: %s: %s' % (user['username'], error.message),
+                  fg='red', bold=True, err=True, file=outfile)
+        return plan.summary(errors)
+    failures = dict(plan.apply(targets, workers=workers, outfile=outfile))
+
+    results = []
+    for line, (user, steps) in enumerate(zip(users, rows), 1):
+        result = OrderedDict((('line', line),
+                              ('username', user['username'])))
+        if isinstance(steps, Exception):
+            errors = [six.text_type(getattr(steps, 'message', steps))]
+        else:
+            errors = [failures[i] for i in steps if i in failures]
+        if errors:
+            result['result'] = 'failed'
+            result['error'] = ' '.join(errors)
+        elif any([i.action == 'create' for i in steps]):
+            result['result'] = 'created'
+        else:
+            result['result'] = 'modified' if steps else 'unchanged'
+        if human:
+            secho('%s: %s%s' % (result['username'] or '(line %d)' % line,
+                                result['result'],
+                                ' (%s)' % result['error'] if errors else ''),
+                  fg={'failed': 'red', 'unchanged': 'green'}.get(
+                      result['result'], 'yellow'), file=outfile)
+        results.append(result)
+    return bulk.summarize(results)
+
+
+def clone_inventory(source, name, organization=None, workers=None,
+                    outfile=None):
+    """Copy the given inventory, with all of its groups, hosts, variables
+    and memberships, to a new inventory with the given name, and return
+    the new inventory.
+
+    The source is read in bulk; the groups and hosts are then created
+    concurrently, and the memberships replayed concurrently afterwards.
+    """
+    inventory_resource = tower_cli.get_resource('inventory')
+    group_resource = tower_cli.get_resource('group')
+    host_resource = tower_cli.get_resource('host')
+
+    # Read the source: its groups and hosts, and the hosts and child groups
+    # of each group.
+    record = inventory_resource.get(source)
+    groups, hosts, members = parallel.map(
+        lambda read: read(), (
+            lambda: IdentityIndex(group_resource, inventory=source),
+            lambda: IdentityIndex(host_resource, inventory=source),
+            lambda: inventory_members(source),
+        ), workers=workers)
+
+    # Describe the source as the desired state of the new inventory.
+    desired_groups = OrderedDict()
+    desired_hosts = OrderedDict()
+    for pk, host in sorted(hosts.by_id.items()):
+        desired_hosts[host['name']] = {
+            'description': host.get('description', ''),
+            'enabled': host.get('enabled', True),
+            'variables': host.get('variables', ''),
+            'groups': [],
+        }
+    for pk, group in sorted(groups.by_id.items()):
+        host_names, child_names = members.get(group['name'], ((), ()))
+        desired_groups[group['name']] = {
+            'description': group.get('description', ''),
+            'variables': group.get('variables', ''),
+            'children': sorted(child_names),
+        }
+        for host in sorted(host_names):
+            if host in desired_hosts:
+                desired_hosts[host]['groups'].append(group['name'])
+
+    # Create the new inventory, and fill it in.
+    answer = inventory_resource.create(
+        name=name, organization=organization or record['organization'],
+        description=record.get('description', ''),
+        variables=record.get('variables', ''), fail_on_found=True,
+    )
+    plan, targets = plan_inventory(answer['id'], desired_groups,
+                                   desired_hosts, workers=workers)
+    failures = plan.apply(targets, workers=workers, outfile=outfile)
+    if failures:
+        raise exc.TowerCLIError('The inventory %s was created, but %d of '
+                                'its groups, hosts and memberships could '
+                                'not be.' % (name, len(failures)))
+    return answer
@@ -15,8 +15,8 @@
 
 import click
 
-from tower_cli import models, resources
-from tower_cli.utils import types
+from tower_cli import get_resource, models, resources
+from tower_cli.utils import exceptions as exc, types
 
 
 class Resource(models.Resource):
@@ -34,13 +34,43 @@ class Resource(models.Resource):
     @resources.command(use_fields_as_options=False)
     @click.option('--host', type=types.Related('host'))
     @click.option('--group', type=types.Related('group'))
-    def associate(self, host, group):
+    @click.option('--host-file', type=types.File('r'), required=False,
+                  help='A file of hosts (names or IDs, one per line) to '
+                       'associate with the group all at once, instead of '
+                       '--host.')
+    def associate(self, host=None, group=None, host_file=None):
         """Associate a group with this host."""
+        if host_file:
+            return self._group_hosts(group, host, host_file)
         return self._assoc('groups', host, group)
 
     @resources.command(use_fields_as_options=False)
     @click.option('--host', type=types.Related('host'))
     @click.option('--group', type=types.Related('group'))
-    def disassociate(self, host, group):
+    @click.option('--host-file', type=types.File('r'), required=False,
+                  help='A file of hosts (names or IDs, one per line) to '
+                       'disassociate from the group all at once, instead of '
+                       '--host.')
+    def disassociate(self, host=None, group=None, host_file=None):
         """Disassociate a group from this host."""
+        if host_file:
+            return self._group_hosts(group, host, host_file,
+                                     disassociate=True)
         return self._disassoc('groups', host, group)
+
+    def _group_hosts(self, group, host, host_file, disassociate=False):
+        """Associate (or disassociate) all of the hosts in the given file
+        with the given group, reading the group's hosts only once.
+        """
+        if not group:
+            raise exc.UsageError('A group is required with --host-file.')
+        if host:
+            raise exc.UsageError('Give either --host or --host-file, not '
+                                 'both.')
+
+        # Host names are unique within the group's inventory.
+        group_resource = get_resource('group')
+        inventory = group_resource.get(group)['inventory']
+        hosts = self._resolve_file('host', host_file, inventory=inventory)
+        return group_resource._assoc_many('hosts', group, hosts,
+                                          disassociate=disassociate)
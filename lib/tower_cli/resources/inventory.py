@@ -13,7 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from tower_cli import models
+import click
+
+from tower_cli import models, reconcile, resources
 from tower_cli.utils import types
 
 
@@ -27,3 +29,47 @@ class Resource(models.Resource):
     organization = models.Field(type=types.Related('organization'))
     variables = models.Field(type=models.File('r'), required=False,
                              display=False)
+
+    @resources.command(use_fields_as_options=False)
+    @click.argument('inventory', type=types.Related('inventory'))
+    @click.option('--source', type=types.File('r'), required=True,
+                  help='A JSON, YAML or CSV file describing the groups and '
+                       'hosts that the inventory should have.')
+    @click.option('--dry-run', is_flag=True, default=False,
+                  help='Only print the changes that would be made.')
+    @click.option('--keep-extra', is_flag=True, default=False,
+                  help='Do not delete groups and hosts that the source does '
+                       'not mention.')
+    @click.option('--workers', type=int, required=False,
+                  help='The number of changes to make at once. Defaults to '
+                       'the `concurrency` setting.')
+    def reconcile(self, inventory, source, dry_run=False, keep_extra=False,
+                  workers=None, outfile=None):
+        """Make the groups and hosts of an inventory match a source file.
+
+        The changes needed are printed first (in the human format); then,
+        unless this is a dry run, they are made, and a summary is shown.
+        """
+        return reconcile.reconcile_inventory(
+            inventory, source, dry_run=dry_run, keep_extra=keep_extra,
+            workers=workers, outfile=outfile)
+
+    @resources.command(use_fields_as_options=False)
+    @click.argument('inventory', type=types.Related('inventory'))
+    @click.option('--name', required=True,
+                  help='The name of the new inventory.')
+    @click.option('--organization', type=types.Related('organization'),
+                  required=False,
+                  help='The organization of the new inventory. Defaults '
+                       'to that of the inventory copied.')
+    @click.option('--workers', type=int, required=False,
+                  help='The number of records to create at once. Defaults '
+                       'to the `concurrency` setting.')
+    def clone(self, inventory, name, organization=None, workers=None,
+              outfile=None):
+        """Copy an inventory, with all of its groups, hosts, variables and
+        memberships, to a new inventory.
+        """
+        return reconcile.clone_inventory(inventory, name,
+                                         organization=organization,
+                                         workers=workers, outfile=outfile)
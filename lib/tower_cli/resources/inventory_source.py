@@ -18,7 +18,7 @@ import click
 from sdict import adict
 
 import tower_cli
-from tower_cli import models, resources
+from tower_cli import models, resources, results
 from tower_cli.api import client
 from tower_cli.utils import debug, types, exceptions as exc
 
@@ -81,11 +81,11 @@ class Resource(models.MonitorableResource):
         if 'current_update' in inv_src['related']:
             debug.log('A current update exists; retrieving it.',
                       header='details')
-            job = client.get(inv_src['related']['current_update'][7:]).json()
+            job = results.fetch(inv_src['related']['current_update'][7:])
         elif inv_src['related'].get('last_update', None):
             debug.log('No current update exists; retrieving the most '
                       'recent update.', header='details')
-            job = client.get(inv_src['related']['last_update'][7:]).json()
+            job = results.fetch(inv_src['related']['last_update'][7:])
         else:
             raise exc.NotFound('No inventory source updates exist.')
 
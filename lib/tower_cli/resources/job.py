@@ -17,17 +17,24 @@ from __future__ import absolute_import, unicode_literals
 from copy import copy
 from datetime import datetime
 from getpass import getpass
+import json
+import re
 import sys
 import time
 
 import click
+import six
 
 from sdict import adict
 
-from tower_cli import models, get_resource, resources
+from tower_cli import (mirror, models, get_resource, resources, results,
+                       schema, stats)
 from tower_cli.api import client
 from tower_cli.conf import settings
-from tower_cli.utils import debug, exceptions as exc, types
+from tower_cli.index import read_pages
+from tower_cli.utils import (debug, exceptions as exc, format_table, parallel,
+                             secho, types)
+from tower_cli.utils.data_structures import OrderedDict
 
 
 class Resource(models.MonitorableResource):
@@ -39,6 +46,9 @@ class Resource(models.MonitorableResource):
     cli_help = 'Launch or monitor jobs.'
     endpoint = '/jobs/'
 
+    # The longest limit that Tower keeps for a job.
+    limit_max_length = 1024
+
     @resources.command
     @click.option('--job-template', type=types.Related('job_template'))
     @click.option('--monitor', is_flag=True, default=False,
@@ -52,13 +62,37 @@ class Resource(models.MonitorableResource):
                                 help='Suppress any requests for input.')
     @click.option('--extra-vars', type=types.File('r'), required=False)
     @click.option('--tags', required=False)
+    @click.option('--limit', required=False,
+                  help='A host pattern to further limit the hosts that the '
+                       'job runs on.')
+    @click.option('--shards', type=int, required=False,
+                  help='Split the hosts of the inventory into this many '
+                       'slices, and launch a job for each, all at once.')
+    @click.option('--shard-by', type=click.Choice(['group']), required=False,
+                  help='Launch a job for each top-level group of the '
+                       'inventory, all at once.')
     def launch(self, job_template, tags=None, monitor=False, timeout=None,
-                     no_input=True, extra_vars=None):
+                     no_input=True, extra_vars=None, limit=None, shards=None,
+                     shard_by=None, outfile=None):
         """Launch a new job based on a job template.
 
         Creates a new job in Ansible Tower, immediately stats it, and
         returns back an ID in order for its status to be monitored.
+
+        With --shards or --shard-by, launches several jobs, each limited
+        to a slice of the inventory (within --limit, if given); with
+        --monitor, waits for them all, and lists the hosts that failed in
+        any of them.
+
+        A limit is refused if the job template does not prompt for one on
+        launch, since Tower would ignore it and run the job on every host.
         """
+        if shards or shard_by:
+            return self._launch_shards(
+                job_template, shards=shards, shard_by=shard_by, tags=tags,
+                monitor=monitor, timeout=timeout, extra_vars=extra_vars,
+                limit=limit, outfile=outfile)
+
         # Get the job template from Ansible Tower.
         # This is used as the baseline for starting the job.
         jt_resource = get_resource('job_template')
@@ -71,6 +105,8 @@ class Resource(models.MonitorableResource):
         data['name'] = '%s [invoked via. Tower CLI]' % data['name']
         if tags:
             data['job_tags'] = tags
+        if limit:
+            data['limit'] = limit
 
         # If the job template requires prompting for extra variables,
         # do so (unless --no-input is set).
@@ -93,18 +129,23 @@ class Resource(models.MonitorableResource):
         # In Tower 2.1 and later, we create the new job with
         # /job_templates/N/launch/; in Tower 2.0 and before, there is a two
         # step process of posting to /jobs/ and then /jobs/N/start/.
-        supports_job_template_launch = False
-        if 'launch' in jt['related']:
-            supports_job_template_launch = True
+        #
+        # Go by the Tower version if we know it, and by whether the job
+        # template links to a launch endpoint otherwise.
+        supports_job_template_launch = self._launches_job_template(jt)
 
         # Create the new job in Ansible Tower.
         start_data = {}
         if supports_job_template_launch:
+            if limit:
+                self._check_limit_prompt(jt)
             endpoint = '/job_templates/%d/launch/' % jt['id']
             if 'extra_vars' in data:
                 start_data['extra_vars'] = data['extra_vars']
             if tags:
                 start_data['job_tags'] = data['job_tags']
+            if limit:
+                start_data['limit'] = limit
         else:
             debug.log('Creating the job.', header='details')
             job = client.post('/jobs/', data=data).json()
@@ -128,9 +169,14 @@ class Resource(models.MonitorableResource):
         result = client.post(endpoint, start_data)
 
         # If this used the /job_template/N/launch/ route, get the job
-        # ID from the result.
+        # ID from the result. Tower says which of the fields sent it
+        # ignored; a job whose limit was ignored runs on every host.
         if supports_job_template_launch:
             job_id = result.json()['job']
+            if limit and 'limit' in result.json().get('ignored_fields', {}):
+                raise exc.TowerCLIError(
+                    'Tower ignored the limit of job %d, which will run on '
+                    'every host of the inventory.' % job_id)
 
         # If we were told to monitor the job once it started, then call
         # monitor from here.
@@ -143,14 +189,269 @@ class Resource(models.MonitorableResource):
             'id': job_id,
         }
 
-    @resources.command
+    @resources.command(use_fields_as_options=False)
+    @click.argument('job', type=int)
+    @click.option('--monitor', is_flag=True, default=False,
+                  help='If sent, wait for the new jobs to finish.')
+    @click.option('--timeout', required=False, type=int,
+                  help='If provided with --monitor, this command (not the '
+                       'jobs) will time out after the given number of '
+                       'seconds.')
+    def relaunch_failed(self, job, monitor=False, timeout=None,
+                        outfile=None):
+        """Launch the job template of a finished job again, limited to the
+        hosts that failed or were unreachable in it, with the same extra
+        variables and tags.
+
+        If the hosts do not fit in one limit, several jobs are launched.
+        The job template must prompt for a limit on launch; otherwise
+        Tower would run it on every host, so nothing is launched.
+        """
+        record = results.fetch('/jobs/%d/' % job)
+        if record['status'] not in self.finished_states:
+            raise exc.UsageError('Job %d has not finished.' % job)
+        if not record.get('job_template', None):
+            raise exc.UsageError('Job %d has no job template to launch '
+                                 'again.' % job)
+        jt = get_resource('job_template').get(record['job_template'])
+        if self._launches_job_template(jt):
+            self._check_limit_prompt(jt)
+        hosts = self.failed_hosts(job)
+        if not hosts:
+            secho('No hosts failed in job %d.' % job, file=outfile)
+            return {'changed': False}
+
+        launched = []
+        for limit in self.limits(hosts):
+            launched.append(OrderedDict((
+                ('id', self.launch(record['job_template'],
+                                   tags=record.get('job_tags', None) or None,
+                                   extra_vars=record.get('extra_vars', None),
+                                   no_input=True, limit=limit)['id']),
+                ('hosts', limit.count(',') + 1),
+            )))
+            if settings.format == 'human':
+                secho('Launched job %d for %d hosts.' % (
+                    launched[-1]['id'], launched[-1]['hosts']), file=outfile)
+        answer = OrderedDict((('changed', True), ('jobs', launched),
+                              ('hosts', hosts)))
+        if not monitor:
+            return answer
+
+        statuses = self.wait([i['id'] for i in launched], timeout=timeout)
+        for item in launched:
+            item['status'] = statuses[item['id']]['status']
+        failures = [i['id'] for i in launched
+                    if statuses[i['id']]['failed']]
+        if failures:
+            raise exc.JobFailure('Job %s failed.' % ', '.join(
+                [six.text_type(i) for i in failures]))
+        return answer
+
+    def _launches_job_template(self, jt):
+        """Return True if jobs of the given job template are launched with
+        /job_templates/N/launch/ (Tower 2.1 and later), or False if they
+        are created with /jobs/ and started with /jobs/N/start/.
+
+        Go by the Tower version if we know it, and by whether the job
+        template links to a launch endpoint otherwise.
+        """
+        version = schema.tower_version()
+        if version:
+            return version >= (2, 1)
+        return 'launch' in jt['related']
+
+    def _check_limit_prompt(self, jt):
+        """Raise `UsageError` unless a limit sent when launching the given
+        job template is kept.
+
+        Tower ignores a limit given to /job_templates/N/launch/ unless the
+        template prompts for one on launch (which cannot be set before
+        Tower 3.0); the job would then run on every host.
+        """
+        if jt.get('ask_limit_on_launch', False):
+            return
+        raise exc.UsageError(
+            'The job template %s does not prompt for a limit on launch, so '
+            'Tower would ignore the limit and run the job on every host. '
+            'Turn on "Prompt on launch" for its limit first.' % jt['name'])
+
+    def limits(self, hosts):
+        """Return limits naming the given hosts, as few as there can be
+        without any being longer than Tower allows.
+        """
+        answer, current = [], ''
+        for host in hosts:
+            if current and len(current) + 1 + len(host) > \
+                    self.limit_max_length:
+                answer.append(current)
+                current = ''
+            current = '%s,%s' % (current, host) if current else host
+        if current:
+            answer.append(current)
+        return answer
+
+    def _shard_limits(self, jt, shards=None, shard_by=None, limit=None):
+        """Return the limits of the jobs of a sharded launch of the given
+        job template: slices of the hosts of its inventory, or its
+        top-level groups, within the template's own limit and the given
+        limit, if any.
+        """
+        inventory = jt['inventory']
+        if shard_by == 'group':
+            limits = []
+            url = '/inventories/%d/root_groups/' % inventory
+            for response in read_pages(lambda page: client.get(
+                    url, params={'page': page}).json()):
+                limits += [i['name'] for i in response['results']]
+        else:
+            # Slices are given as subscripts of the `all` group, such as
+            # all[0:99], so that limits stay short however many hosts
+            # there are. Ansible's subscripts include both ends.
+            #
+            # Only enabled hosts are in `all`, so only they are counted.
+            # The slices assume that Ansible orders the hosts of `all` the
+            # same way in each of the separate jobs, which holds as long as
+            # the inventory does not change while they start.
+            if shards < 1:
+                raise exc.UsageError('There must be at least one shard.')
+            count = get_resource('host').read(
+                inventory=inventory, enabled=True,
+                query=[('page_size', 1)])['count']
+            size = -(-count // min(shards, count)) if count else 1
+            limits = ['all[%d:%d]' % (start, min(start + size, count) - 1)
+                      for start in range(0, count, size)]
+        if not limits:
+            raise exc.TowerCLIError('The inventory has no hosts to shard.')
+        for other in (jt.get('limit', None), limit):
+            if other:
+                limits = [self._intersect(i, other) for i in limits]
+        return limits
+
+    def _intersect(self, pattern, limit):
+        """Return a host pattern matching the hosts that match both the
+        given pattern and the given limit.
+
+        Ansible applies every intersection (&) to the union of all of the
+        plain terms of a pattern, so a limit naming several plain terms
+        (such as "web,db") cannot be intersected with another pattern; it
+        is refused. Its intersections and exclusions (!) are kept.
+        """
+        terms = [i.strip() for i in re.split(r'[,:](?![^\[]*\])', limit)
+                 if i.strip()]
+        plain = [i for i in terms if i[0] not in '&!']
+        if len(plain) > 1:
+            raise exc.UsageError(
+                'The limit %s names several patterns, which cannot be '
+                'combined with the slices of a sharded launch. Give one '
+                'pattern, with any intersections (&) and exclusions (!).' %
+                limit)
+        return ':'.join([pattern] + ['&%s' % i for i in plain] +
+                        [i for i in terms if i[0] in '&!'])
+
+    def _launch_shards(self, job_template, shards=None, shard_by=None,
+                       tags=None, monitor=False, timeout=None,
+                       extra_vars=None, limit=None, outfile=None):
+        """Launch a job for each shard of the given job template at once
+        (see `_shard_limits`), and, if asked, wait for them all.
+        """
+        jt = get_resource('job_template').get(job_template)
+        if self._launches_job_template(jt):
+            self._check_limit_prompt(jt)
+        limits = self._shard_limits(jt, shards=shards, shard_by=shard_by,
+                                    limit=limit)
+        if hasattr(extra_vars, 'read'):
+            extra_vars = extra_vars.read()
+        debug.log('Launching %d shards.' % len(limits), header='details')
+        launched = parallel.map(
+            lambda limit: self.launch(jt['id'], tags=tags, no_input=True,
+                                      extra_vars=extra_vars, limit=limit),
+            limits)
+        answer = OrderedDict((
+            ('changed', True),
+            ('shards', [OrderedDict((('shard', ix + 1), ('limit', limit),
+                                     ('id', job['id'])))
+                        for ix, (limit, job) in
+                        enumerate(zip(limits, launched))]),
+        ))
+        if not monitor:
+            return answer
+
+        # Wait for every shard, and gather the hosts that failed.
+        statuses = self.wait([i['id'] for i in answer['shards']],
+                             timeout=timeout)
+        failed_hosts = set()
+        for shard in answer['shards']:
+            shard['status'] = statuses[shard['id']]['status']
+            shard['failed'] = statuses[shard['id']]['failed']
+            failed_hosts.update(self.failed_hosts(shard['id']))
+        answer['failed_hosts'] = sorted(failed_hosts)
+        failures = len([i for i in answer['shards'] if i['failed']])
+
+        if settings.format == 'human':
+            secho(format_table(list(answer['shards'][0].keys()),
+                               [list(i.values()) for i in answer['shards']]),
+                  file=outfile)
+            if failed_hosts:
+                secho('Failed hosts: %s' % ', '.join(answer['failed_hosts']),
+                      fg='red', file=outfile)
+        elif failures:
+            secho(json.dumps(answer, indent=2), file=outfile)
+        if failures:
+            raise exc.JobFailure('%d of %d shards failed.' %
+                                 (failures, len(answer['shards'])))
+        return answer
+
+    def wait(self, pks, min_interval=1, max_interval=30, timeout=None):
+        """Wait for all of the given jobs to finish, and return a
+        dictionary mapping each to its status (see `status`).
+        """
+        statuses = {}
+        interval = min_interval
+        start = time.time()
+        while True:
+            pending = [i for i in pks if i not in statuses or
+                       statuses[i]['status'] not in self.finished_states]
+            if not pending:
+                return statuses
+            statuses.update(zip(pending, parallel.map(self.status, pending)))
+            if all([statuses[i]['status'] in self.finished_states
+                    for i in pending]):
+                continue
+            if timeout and time.time() - start > timeout:
+                raise exc.Timeout('Waiting aborted due to timeout.')
+            time.sleep(interval)
+            interval = min(interval * 1.5, max_interval)
+
+    def failed_hosts(self, pk):
+        """Return the names of the hosts that failed, or were unreachable,
+        in the given job, from its host summaries.
+        """
+        answer = []
+        for summary in self.host_summaries(pk):
+            if summary.get('failures', 0) or summary.get('dark', 0) or \
+                    summary.get('failed', False):
+                host = summary.get('summary_fields', {}).get('host', {})
+                answer.append(host.get('name', None) or
+                              summary.get('host_name', None) or
+                              six.text_type(summary['host']))
+        return sorted(answer)
+
+    @resources.command(offline=True)
     @click.option('--detail', is_flag=True, default=False,
                               help='Print more detail.')
     def status(self, pk, detail=False):
         """Print the current job status."""
-        # Get the job from Ansible Tower.
+        # Get the job from Ansible Tower, or, offline, from the mirror; a
+        # mirrored job that had not finished says nothing of its status now.
         debug.log('Asking for job status.', header='details')
-        job = client.get('/jobs/%d/' % pk).json()
+        if settings.offline:
+            job = mirror.serve('job', pk, {})
+            if job['status'] not in self.finished_states:
+                raise exc.TowerCLIError('Job %d had not finished when the '
+                                        'mirror was synced.' % pk)
+        else:
+            job = results.fetch('/jobs/%d/' % pk)
 
         # In most cases, we probably only want to know the status of the job
         # and the amount of time elapsed. However, if we were asked for
@@ -184,3 +485,44 @@ class Resource(models.MonitorableResource):
 
         # Return a success.
         return adict({'status': 'canceled', 'changed': changed})
+
+    @resources.command(use_fields_as_options=False)
+    @click.option('--since', default='30d', show_default=True,
+                  help='How far back to look: an age such as 30d, 12h or '
+                       '2w, or a date such as 2016-01-31.')
+    @click.option('--template', 'job_template', required=False,
+                  type=types.Related('job_template'),
+                  help='Only report on the jobs of this job template.')
+    def report(self, since='30d', job_template=None, outfile=None):
+        """Show statistics of the jobs that finished since a given time:
+        run counts, failure rates and median and 95th percentile
+        durations (in seconds), by job template and by day, and how many
+        jobs started in each hour of the day (in UTC).
+        """
+        answer = stats.job_report(since, job_template=job_template)
+        if settings.format != 'human':
+            return answer
+
+        # Print the detailed tables here; the totals are printed like
+        # any other result.
+        for title, key in (('Job templates', 'templates'), ('Days', 'days'),
+                           ('Hours of the day', 'hours')):
+            rows = answer[key]
+            if rows:
+                secho(title, bold=True, file=outfile)
+                secho(format_table(list(rows[0].keys()),
+                                   [list(i.values()) for i in rows]),
+                      file=outfile)
+                secho('', file=outfile)
+        secho('Totals', bold=True, file=outfile)
+        return answer['totals']
+
+    def host_summaries(self, pk):
+        """Return the summaries of how the job went on each host: the
+        numbers of tasks that were ok, changed, failed, and so on.
+
+        The summaries of a finished job are cached (see
+        `tower_cli.results`).
+        """
+        job = results.fetch('/jobs/%d/' % pk)
+        return results.fetch_all('/jobs/%d/job_host_summaries/' % pk, job)
@@ -17,7 +17,8 @@ from __future__ import absolute_import, unicode_literals
 
 import click
 
-from tower_cli import models, get_resource
+from tower_cli import models, get_resource, resources
+from tower_cli.api import client
 from tower_cli.utils import types
 
 
@@ -58,3 +59,29 @@ class Resource(models.Resource):
                               display=False)
     become_enabled = models.Field(type=bool, required=False,
                                   show_default=True, default=False)
+
+    @resources.command(use_fields_as_options=False)
+    @click.argument('job_template', type=types.Related('job_template'))
+    @click.option('--name', required=True,
+                  help='The name of the new job template.')
+    def copy(self, job_template, name):
+        """Copy a job template, with its survey, to a new job template."""
+        record = self.get(job_template)
+        data = {'name': name}
+        for field in self.fields:
+            key = field.key or field.name
+            if key != 'name' and record.get(key, None) is not None:
+                data[key] = record[key]
+
+        # The survey is not a field of the job template; copy it
+        # separately.
+        survey = None
+        if record.get('survey_enabled', False):
+            survey = client.get('%s%d/survey_spec/' % (self.endpoint,
+                                                       job_template)).json()
+            data['survey_enabled'] = True
+        answer = self.create(fail_on_found=True, **data)
+        if survey:
+            client.post('%s%d/survey_spec/' % (self.endpoint, answer['id']),
+                        data=survey)
+        return answer
@@ -17,7 +17,7 @@ import click
 
 from tower_cli import models, resources
 from tower_cli.api import client
-from tower_cli.utils import types
+from tower_cli.utils import exceptions as exc, types
 
 
 class Resource(models.Resource):
@@ -30,15 +30,28 @@ class Resource(models.Resource):
     @resources.command(use_fields_as_options=False)
     @click.option('--organization', type=types.Related('organization'))
     @click.option('--user', type=types.Related('user'))
-    def associate(self, organization, user):
+    @click.option('--user-file', type=types.File('r'), required=False,
+                  help='A file of users (usernames or IDs, one per line) to '
+                       'associate with the organization all at once, '
+                       'instead of --user.')
+    def associate(self, organization=None, user=None, user_file=None):
         """Associate a user with this organization."""
+        if user_file:
+            return self._organization_users(organization, user, user_file)
         return self._assoc('users', organization, user)
 
     @resources.command(use_fields_as_options=False)
     @click.option('--organization', type=types.Related('organization'))
     @click.option('--user', type=types.Related('user'))
-    def disassociate(self, organization, user):
+    @click.option('--user-file', type=types.File('r'), required=False,
+                  help='A file of users (usernames or IDs, one per line) to '
+                       'disassociate from the organization all at once, '
+                       'instead of --user.')
+    def disassociate(self, organization=None, user=None, user_file=None):
         """Disassociate a user from this organization."""
+        if user_file:
+            return self._organization_users(organization, user, user_file,
+                                            disassociate=True)
         return self._disassoc('users', organization, user)
 
     @resources.command(use_fields_as_options=False)
@@ -54,3 +67,18 @@ class Resource(models.Resource):
     def disassociate_project(self, organization, project):
         """Disassociate a project from this organization."""
         return self._disassoc('projects', organization, project)
+
+    def _organization_users(self, organization, user, user_file,
+                            disassociate=False):
+        """Associate (or disassociate) all of the users in the given file
+        with the given organization, reading its users only once.
+        """
+        if not organization:
+            raise exc.UsageError('An organization is required with '
+                                 '--user-file.')
+        if user:
+            raise exc.UsageError('Give either --user or --user-file, not '
+                                 'both.')
+        users = self._resolve_file('user', user_file)
+        return self._assoc_many('users', organization, users,
+                                disassociate=disassociate)
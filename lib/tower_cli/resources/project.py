@@ -17,7 +17,7 @@ import click
 
 from sdict import adict
 
-from tower_cli import models, resources
+from tower_cli import models, resources, results
 from tower_cli.api import client
 from tower_cli.utils import debug, exceptions as exc, types
 
@@ -137,11 +137,11 @@ class Resource(models.MonitorableResource):
         if 'current_update' in project['related']:
             debug.log('A current update exists; retrieving it.',
                       header='details')
-            job = client.get(project['related']['current_update'][7:]).json()
+            job = results.fetch(project['related']['current_update'][7:])
         elif project['related'].get('last_update', None):
             debug.log('No current update exists; retrieving the most '
                       'recent update.', header='details')
-            job = client.get(project['related']['last_update'][7:]).json()
+            job = results.fetch(project['related']['last_update'][7:])
         else:
             raise exc.NotFound('No project updates exist.')
 
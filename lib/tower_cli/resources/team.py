@@ -16,7 +16,7 @@
 import click
 
 from tower_cli import models, resources
-from tower_cli.utils import types
+from tower_cli.utils import exceptions as exc, types
 
 
 class Resource(models.Resource):
@@ -31,13 +31,39 @@ class Resource(models.Resource):
     @resources.command(use_fields_as_options=False)
     @click.option('--team', type=types.Related('team'))
     @click.option('--user', type=types.Related('user'))
-    def associate(self, team, user):
+    @click.option('--user-file', type=types.File('r'), required=False,
+                  help='A file of users (usernames or IDs, one per line) to '
+                       'associate with the team all at once, instead of '
+                       '--user.')
+    def associate(self, team=None, user=None, user_file=None):
         """Associate a user with this team."""
+        if user_file:
+            return self._team_users(team, user, user_file)
         return self._assoc('users', team, user)
 
     @resources.command(use_fields_as_options=False)
     @click.option('--team', type=types.Related('team'))
     @click.option('--user', type=types.Related('user'))
-    def disassociate(self, team, user):
+    @click.option('--user-file', type=types.File('r'), required=False,
+                  help='A file of users (usernames or IDs, one per line) to '
+                       'disassociate from the team all at once, instead of '
+                       '--user.')
+    def disassociate(self, team=None, user=None, user_file=None):
         """Disassociate a user from this team."""
+        if user_file:
+            return self._team_users(team, user, user_file,
+                                    disassociate=True)
         return self._disassoc('users', team, user)
+
+    def _team_users(self, team, user, user_file, disassociate=False):
+        """Associate (or disassociate) all of the users in the given file
+        with the given team, reading the team's users only once.
+        """
+        if not team:
+            raise exc.UsageError('A team is required with --user-file.')
+        if user:
+            raise exc.UsageError('Give either --user or --user-file, not '
+                                 'both.')
+        users = self._resolve_file('user', user_file)
+        return self._assoc_many('users', team, users,
+                                disassociate=disassociate)
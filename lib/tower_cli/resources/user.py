@@ -13,7 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from tower_cli import models
+import click
+
+from tower_cli import models, reconcile, resources
+from tower_cli.utils import types
 
 
 class Resource(models.Resource):
@@ -27,3 +30,29 @@ class Resource(models.Resource):
     first_name = models.Field(required=False)
     last_name = models.Field(required=False)
     is_superuser = models.Field(required=False, type=bool)
+
+    @resources.command(use_fields_as_options=False)
+    @click.option('source', '--file', type=types.File('r'), required=True,
+                  help='A CSV, JSON or YAML file of users, with their '
+                       'organizations and teams.')
+    @click.option('--dry-run', is_flag=True, default=False,
+                  help='Only print the changes that would be made.')
+    @click.option('--keep-extra', is_flag=True, default=False,
+                  help='Do not remove users from the organizations and '
+                       'teams named in the file that their rows do not '
+                       'list.')
+    @click.option('--workers', type=int, required=False,
+                  help='The number of changes to make at once. Defaults to '
+                       'the `concurrency` setting.')
+    def sync(self, source, dry_run=False, keep_extra=False, workers=None,
+             outfile=None):
+        """Create and update users, and their memberships of organizations
+        and teams, to match a file.
+
+        In a CSV file, the columns are `username`, `email`, `first_name`,
+        `last_name`, `is_superuser`, `password` (used only for new users),
+        and `organizations` and `teams`, separated by semicolons.
+        """
+        return reconcile.sync_users(source, dry_run=dry_run,
+                                    keep_extra=keep_extra, workers=workers,
+                                    outfile=outfile)
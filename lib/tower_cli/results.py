@@ -0,0 +1,136 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A local cache of the records of finished jobs, project updates and
+inventory updates, and of their host summaries.
+
+Once a task has finished, nothing about it changes, so its records are
+kept with no expiry; the cache holds at most `result_cache_size` of them
+(in a SQLite file in the cache directory, per host), forgetting the least
+recently used first. Setting `result_cache_size` to 0 turns it off.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import json
+import threading
+import time
+
+from tower_cli.api import client
+from tower_cli.conf import settings
+from tower_cli.index import read_pages
+from tower_cli.utils import debug
+from tower_cli.utils.sqlite import Transaction
+
+
+# The states in which a task is done, and no longer changes.
+FINISHED_STATES = ('successful', 'failed', 'error', 'canceled')
+
+
+class ResultCache(object):
+    """The records of finished tasks of one Tower host, by URL."""
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, filename):
+        self.filename = filename
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS results ('
+                       'url TEXT PRIMARY KEY, body TEXT, used REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS results_used ON '
+                       'results (used)')
+
+    @classmethod
+    def get_cache(cls):
+        """Return the cache of the configured host."""
+        slug = hashlib.sha1(settings.host.encode('utf8')).hexdigest()
+        filename = settings.cache_path('results', '%s.db' % slug[:16])
+        with cls._caches_lock:
+            if filename not in cls._caches:
+                cls._caches[filename] = cls(filename)
+            return cls._caches[filename]
+
+    def _connect(self):
+        return Transaction(self.filename)
+
+    def get(self, url):
+        """Return the cached record at the given URL, or None, marking it
+        as just used.
+        """
+        with self._connect() as db:
+            row = db.execute('SELECT body FROM results WHERE url = ?',
+                             (url,)).fetchone()
+            if row is None:
+                return None
+            db.execute('UPDATE results SET used = ? WHERE url = ?',
+                       (time.time(), url))
+        return json.loads(row[0])
+
+    def put(self, url, record, size):
+        """Cache the given record, and forget the least recently used ones
+        beyond the given number.
+        """
+        with self._connect() as db:
+            db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                       (url, json.dumps(record), time.time()))
+            db.execute('DELETE FROM results WHERE url IN (SELECT url FROM '
+                       'results ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                       (size,))
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute('SELECT count(*) FROM results').fetchone()[0]
+
+
+def finished(record):
+    """Return True if the given task record is in a finished state."""
+    return record.get('status', None) in FINISHED_STATES
+
+
+def fetch(url):
+    """Return the task record at the given URL, from the cache if it is
+    there; a record that is finished is cached.
+    """
+    return _fetch(url, lambda: client.get(url).json(), finished)
+
+
+def fetch_all(url, task):
+    """Return all the records of the list at the given URL, such as the
+    host summaries of a task, reading every page; the list is cached if
+    the given task record is finished.
+    """
+    def read():
+        answer = []
+        for response in read_pages(lambda page: client.get(
+                url, params={'page': page}).json()):
+            answer += response['results']
+        return answer
+    return _fetch(url, read, lambda records: finished(task))
+
+
+def _fetch(url, read, cacheable):
+    size = settings.result_cache_size
+    if not size:
+        return read()
+    cache = ResultCache.get_cache()
+    answer = cache.get(url)
+    if answer is not None:
+        debug.log('Found %s in the result cache.' % url, header='details')
+        return answer
+    answer = read()
+    if cacheable(answer):
+        cache.put(url, answer, size)
+    return answer
@@ -0,0 +1,180 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""What we know about the API of the Tower we are talking to: its version,
+and the fields each endpoint accepts (from the endpoint's OPTIONS
+metadata).
+
+This is fetched once and cached on disk, per host and Tower version, so
+that capabilities can be decided and writes validated without extra
+requests. The version is checked again every `schema_ttl` seconds; if it
+has changed, the cached metadata is discarded.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import six
+
+from tower_cli.api import client
+from tower_cli.conf import settings
+from tower_cli.utils import debug, exceptions as exc
+
+
+class Schema(object):
+    """The version and endpoint metadata of one Tower host."""
+    _schemas = {}
+    _schemas_lock = threading.Lock()
+
+    def __init__(self, host):
+        self.host = host
+        self.version = None
+        self.checked = 0
+        self.endpoints = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    @classmethod
+    def get(cls):
+        """Return the schema for the configured host."""
+        with cls._schemas_lock:
+            if settings.host not in cls._schemas:
+                cls._schemas[settings.host] = cls(settings.host)
+            return cls._schemas[settings.host]
+
+    @property
+    def filename(self):
+        slug = hashlib.sha1(self.host.encode('utf8')).hexdigest()[:16]
+        return settings.cache_path('schema', '%s.json' % slug)
+
+    def _load(self):
+        try:
+            with open(self.filename) as f:
+                cached = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        self.version = cached.get('version', None)
+        self.checked = cached.get('checked', 0)
+        self.endpoints = cached.get('endpoints', {})
+
+    def _save(self):
+        # Write to a temporary file and move it into place, so that other
+        # processes never read a half-written file.
+        filename = self.filename
+        temp = '%s.%d.tmp' % (filename, os.getpid())
+        try:
+            with open(temp, 'w') as f:
+                json.dump({'version': self.version, 'checked': self.checked,
+                           'endpoints': self.endpoints}, f)
+            if os.name == 'nt' and os.path.exists(filename):
+                os.remove(filename)
+            os.rename(temp, filename)
+        except (IOError, OSError):
+            debug.log('Could not write the schema cache.', header='details')
+
+    def _refresh(self):
+        """Check the version of Tower if it has not been checked recently,
+        discarding the cached metadata if the version has changed.
+        """
+        if time.time() - self.checked < settings.schema_ttl:
+            return
+        try:
+            version = client.get('/config/').json().get('version', None)
+        except exc.TowerCLIError:
+            version = None
+        if version != self.version:
+            self.endpoints = {}
+        self.version = version
+        self.checked = time.time()
+        self._save()
+
+    def tower_version(self):
+        """Return the version of Tower as a tuple of integers, or None if
+        it is not known.
+        """
+        with self._lock:
+            self._refresh()
+            if not self.version:
+                return None
+            return tuple([int(i) for i in re.findall(r'\d+', self.version)])
+
+    def fields(self, endpoint):
+        """Return a dictionary describing the fields that may be written
+        to the given list endpoint, from its OPTIONS metadata, or None if
+        Tower does not provide it.
+        """
+        with self._lock:
+            self._refresh()
+            if endpoint not in self.endpoints:
+                try:
+                    r = client.options(endpoint)
+                    actions = r.json().get('actions', {})
+                    self.endpoints[endpoint] = actions.get('POST', None)
+                except (exc.TowerCLIError, ValueError):
+                    self.endpoints[endpoint] = None
+                self._save()
+            return self.endpoints[endpoint]
+
+
+def tower_version():
+    """Return the version of the configured Tower as a tuple of integers,
+    or None if it is not known (or the schema is disabled).
+    """
+    if not settings.schema:
+        return None
+    return Schema.get().tower_version()
+
+
+def validate(endpoint, data, create=False):
+    """Check the given data against the fields that the given endpoint
+    accepts, and raise `ValidationError` listing every problem found:
+    unknown fields, values that are not among a field's choices, and (if
+    `create` is set) required fields that are missing.
+
+    If the schema is disabled or unavailable, do nothing; the server still
+    validates the data.
+    """
+    if not settings.schema:
+        return
+    fields = Schema.get().fields(endpoint)
+    if not fields:
+        return
+
+    errors = []
+    for key, value in data.items():
+        if key not in fields:
+            errors.append('Unknown field "%s".' % key)
+            continue
+        choices = fields[key].get('choices', None)
+        if choices and value is not None:
+            allowed = [six.text_type(i.get('value', i)) if
+                       isinstance(i, dict) else six.text_type(i[0])
+                       for i in choices]
+            if six.text_type(value) not in allowed:
+                errors.append('Invalid value for "%s": %s (choose from %s).'
+                              % (key, value, ', '.join(allowed)))
+    if create:
+        for key, field in fields.items():
+            if field.get('required', False) and key not in data and \
+                    not field.get('read_only', False):
+                errors.append('Missing required field "%s".' % key)
+    if errors:
+        raise exc.ValidationError(' '.join(errors))
@@ -0,0 +1,185 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Statistics of job history, gathered from a stream of job records in
+constant memory: run counts, failure rates, and estimated percentiles of
+durations, by job template, by day and by hour of the day.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import re
+from datetime import datetime, timedelta
+
+import tower_cli
+from tower_cli.index import read_pages
+from tower_cli.utils import debug, exceptions as exc
+from tower_cli.utils.data_structures import OrderedDict
+
+
+class Quantile(object):
+    """An estimate of the `p` quantile of a stream of numbers, kept in
+    constant memory with the P-square algorithm (Jain and Chlamtac, 1985):
+    five markers, whose heights are adjusted as numbers arrive.
+    """
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q, n = self.heights, self.positions
+
+        # The first five numbers are the markers.
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell the number falls in, moving an extreme marker if
+        # it falls outside them.
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = max([i for i in range(4) if q[i] <= x])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions.
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or \
+                    (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        """Return the estimate, or None if no numbers have arrived."""
+        q = self.heights
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[int(round(self.p * (len(q) - 1)))]
+        return q[2]
+
+
+class Summary(object):
+    """The run count, failures and duration percentiles of some jobs."""
+    def __init__(self):
+        self.jobs = 0
+        self.failed = 0
+        self.p50 = Quantile(0.5)
+        self.p95 = Quantile(0.95)
+
+    def add(self, job):
+        self.jobs += 1
+        if job.get('failed', False):
+            self.failed += 1
+        if job.get('elapsed', None) is not None:
+            self.p50.add(float(job['elapsed']))
+            self.p95.add(float(job['elapsed']))
+
+    def row(self, **keys):
+        """Return the summary as an ordered dictionary, after the given
+        keys.
+        """
+        answer = OrderedDict(sorted(keys.items()))
+        answer['jobs'] = self.jobs
+        answer['failed'] = self.failed
+        answer['failure_rate'] = round(100.0 * self.failed / self.jobs, 1) \
+            if self.jobs else 0.0
+        for name in ('p50', 'p95'):
+            value = getattr(self, name).value()
+            answer[name] = None if value is None else round(value, 1)
+        return answer
+
+
+def parse_since(text, now=None):
+    """Return the moment that `--since` means, as an ISO 8601 timestamp:
+    either an age, such as "30d", "12h" or "2w", or a date.
+    """
+    now = now or datetime.utcnow()
+    match = re.match(r'^(\d+)([mhdw])$', text.strip())
+    if match:
+        unit = {'m': 'minutes', 'h': 'hours', 'd': 'days',
+                'w': 'weeks'}[match.group(2)]
+        moment = now - timedelta(**{unit: int(match.group(1))})
+        return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if re.match(r'^\d{4}-\d{2}-\d{2}([T ][\d:.]+Z?)?$', text.strip()):
+        return text.strip()
+    raise exc.UsageError('Cannot tell when "%s" is; give an age such as '
+                         '30d, or a date such as 2016-01-31.' % text)
+
+
+def job_report(since, job_template=None, page_size=200):
+    """Read the jobs that finished since the given moment (see
+    `parse_since`), of the given job template if any, a page at a time,
+    and return their statistics: the `totals`, and lists of the
+    statistics by `templates`, by `days` and by `hours` of the day (in
+    UTC) that the jobs started in.
+    """
+    query = [('finished__gte', parse_since(since))]
+    if job_template:
+        query.append(('job_template', job_template))
+    query += [('order_by', 'id'), ('page_size', page_size)]
+
+    totals = Summary()
+    templates, days = {}, {}
+    hours = [[0, 0.0] for i in range(24)]
+    resource = tower_cli.get_resource('job')
+    for response in read_pages(lambda page: resource.read(page=page,
+                                                          query=query)):
+        for job in response['results']:
+            totals.add(job)
+            name = job.get('summary_fields', {}).get(
+                'job_template', {}).get('name', job.get('name', ''))
+            templates.setdefault(name, Summary()).add(job)
+            days.setdefault((job.get('finished', None) or '')[:10],
+                            Summary()).add(job)
+            started = job.get('started', None) or job.get('finished', None)
+            if started and len(started) >= 13:
+                hour = hours[int(started[11:13])]
+                hour[0] += 1
+                hour[1] += float(job.get('elapsed', None) or 0)
+    debug.log('Read %d jobs.' % totals.jobs, header='details')
+
+    return OrderedDict((
+        ('since', query[0][1]),
+        ('totals', totals.row()),
+        ('templates', sorted([v.row(template=k) for k, v in templates.items()],
+                             key=lambda i: (-i['jobs'], i['template']))),
+        ('days', [days[k].row(day=k) for k in sorted(days)]),
+        ('hours', [OrderedDict((('hour', ix), ('jobs', v[0]),
+                                ('busy_seconds', round(v[1], 1))))
+                   for ix, v in enumerate(hours) if v[0]]),
+    ))
@@ -0,0 +1,239 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tables of the records of a resource, for spreadsheets and data frames:
+CSV or TSV (with the standard library alone), or Parquet (if pyarrow is
+installed).
+
+The columns are the resource's fields, typed after them, plus chosen
+`summary_fields` of related records, such as `inventory.name` (written as
+the column `inventory_name`). Records are read and written a page at a
+time, so tables of any size take little memory.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import csv
+import io
+import json
+
+import six
+
+from tower_cli.index import read_pages
+from tower_cli.utils import debug, exceptions as exc
+from tower_cli.utils.types import Related
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional.
+    pyarrow = None
+
+
+FORMATS = ('csv', 'tsv', 'parquet')
+
+
+class Column(object):
+    """A column of a table: its name, its type ("integer", "float",
+    "boolean" or "string"), and the path to its value in a record.
+    """
+    def __init__(self, name, type, path):
+        self.name = name
+        self.type = type
+        self.path = path
+
+    def value(self, record):
+        for key in self.path:
+            if not isinstance(record, dict):
+                return None
+            record = record.get(key, None)
+        if record is None:
+            return None
+        if self.type == 'string' and isinstance(record, (dict, list)):
+            return json.dumps(record)
+        return record
+
+
+def field_type(field):
+    """Return the column type of the given field."""
+    if isinstance(field.type, Related) or field.type is int:
+        return 'integer'
+    if field.type is bool:
+        return 'boolean'
+    if field.type is float:
+        return 'float'
+    return 'string'
+
+
+def value_type(value):
+    """Return the column type of the given value."""
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, six.integer_types):
+        return 'integer'
+    if isinstance(value, float):
+        return 'float'
+    return 'string'
+
+
+def columns(resource, summary_fields=None, sample=None):
+    """Return the columns of a table of the given resource: `id` and its
+    fields, and the given summary fields ("related.field" paths); by
+    default, the name of each related record.
+
+    A resource with no fields (such as jobs) has the columns of the
+    scalar values of the `sample` record instead, typed after them.
+    """
+    answer = [Column('id', 'integer', ('id',))]
+    for field in resource.fields:
+        key = field.key or field.name
+        answer.append(Column(key, field_type(field), (key,)))
+    if not resource.fields and sample:
+        answer += [Column(k, value_type(v), (k,)) for k, v in sample.items()
+                   if k != 'id' and not isinstance(v, (dict, list))]
+
+    if summary_fields is None:
+        summary_fields = ['%s.name' % (i.key or i.name)
+                          for i in resource.fields
+                          if isinstance(i.type, Related)]
+    for path in summary_fields:
+        related, _, key = path.partition('.')
+        if not key:
+            raise exc.UsageError('Summary fields are given as related.field,'
+                                 ' such as inventory.name; not %s.' % path)
+        sample_value = ((sample or {}).get('summary_fields', {})
+                        .get(related, {}).get(key, ''))
+        answer.append(Column('%s_%s' % (related, key),
+                             value_type(sample_value),
+                             ('summary_fields', related, key)))
+    return answer
+
+
+class DelimitedWriter(object):
+    """Write rows to a binary file as CSV (or TSV)."""
+    def __init__(self, fileobj, columns, delimiter=','):
+        if six.PY2:
+            self._file = fileobj
+        else:
+            self._file = io.TextIOWrapper(fileobj, encoding='utf8',
+                                          newline='')
+        self._csv = csv.writer(self._file, delimiter=str(delimiter),
+                               lineterminator='\n')
+        self._write([i.name for i in columns])
+
+    def _write(self, values):
+        row = []
+        for value in values:
+            if value is None:
+                value = ''
+            elif isinstance(value, bool):
+                value = 'true' if value else 'false'
+            value = six.text_type(value)
+            row.append(value.encode('utf8') if six.PY2 else value)
+        self._csv.writerow(row)
+
+    def write(self, rows):
+        for row in rows:
+            self._write(row)
+
+    def close(self):
+        self._file.flush()
+        if not six.PY2:
+            # Leave the underlying file open; it belongs to the caller.
+            self._file.detach()
+
+
+class ParquetWriter(object):
+    """Write rows to a binary file as Parquet, a row group per batch."""
+    TYPES = {'integer': 'int64', 'float': 'float64', 'boolean': 'bool_',
+             'string': 'string'}
+
+    def __init__(self, fileobj, columns):
+        if pyarrow is None:
+            raise exc.TowerCLIError('Writing Parquet requires the pyarrow '
+                                    'library.')
+        self._columns = columns
+        self._schema = pyarrow.schema([
+            (i.name, getattr(pyarrow, self.TYPES[i.type])())
+            for i in columns
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(fileobj, self._schema)
+
+    def write(self, rows):
+        if not rows:
+            return
+        arrays = [pyarrow.array([_coerce(column.type, row[ix])
+                                 for row in rows],
+                                type=self._schema.field(ix).type)
+                  for ix, column in enumerate(self._columns)]
+        self._writer.write_table(pyarrow.Table.from_arrays(
+            arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _coerce(column_type, value):
+    """Return a value as the given column type wants it, or None if it
+    cannot be.
+    """
+    if value is None:
+        return None
+    try:
+        if column_type == 'integer':
+            return int(value)
+        if column_type == 'float':
+            return float(value)
+        if column_type == 'boolean':
+            return bool(value)
+    except (TypeError, ValueError):
+        return None
+    return six.text_type(value)
+
+
+def export_table(resource, fileobj, table_format='csv',
+                 summary_fields=None, page_size=200, **kwargs):
+    """Write the records of the given resource that match the given
+    filters (as for `read`) to a table in the given binary file, and
+    return the number of records written.
+    """
+    if table_format not in FORMATS:
+        raise exc.UsageError('Tables may be written as %s; not %s.' %
+                             (', '.join(FORMATS), table_format))
+    query = list(kwargs.pop('query', ())) + [('page_size', page_size),
+                                             ('order_by', 'id')]
+    writer = None
+    count = 0
+    try:
+        for response in read_pages(lambda page: resource.read(
+                page=page, query=query, **dict(kwargs))):
+            results = response['results']
+            if writer is None:
+                table = columns(resource, summary_fields=summary_fields,
+                                sample=results[0] if results else None)
+                if table_format == 'parquet':
+                    writer = ParquetWriter(fileobj, table)
+                else:
+                    writer = DelimitedWriter(
+                        fileobj, table,
+                        delimiter='\t' if table_format == 'tsv' else ',')
+            writer.write([[i.value(record) for i in table]
+                          for record in results])
+            count += len(results)
+    finally:
+        if writer is not None:
+            writer.close()
+    debug.log('Wrote %d records.' % count, header='details')
+    return count
@@ -16,6 +16,7 @@
 import functools
 
 import click
+import six
 
 from tower_cli.conf import settings
 
@@ -33,3 +34,22 @@ def secho(message, **kwargs):
 
     # Okay, now call click.secho normally.
     return click.secho(message, **kwargs)
+
+
+def format_table(columns, rows):
+    """Return the given rows (sequences of values, in the order of the
+    given column names) as an ASCII table, in the same form as the tables
+    of resource commands.
+    """
+    rows = [['' if i is None else six.text_type(i).lower()
+             if isinstance(i, bool) else six.text_type(i) for i in row]
+            for row in rows]
+    widths = [max([len(six.text_type(col))] + [len(row[ix]) for row in rows])
+              for ix, col in enumerate(columns)]
+    divider = ' '.join(['=' * i for i in widths])
+    header = ' '.join([('{0:^%d}' % width).format(col)
+                       for col, width in zip(columns, widths)])
+    lines = [' '.join([('{0:%d}' % width).format(value)
+                       for value, width in zip(row, widths)]).rstrip()
+             for row in rows]
+    return '\n'.join([divider, header, divider] + lines + [divider])
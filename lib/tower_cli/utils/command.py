@@ -13,8 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import absolute_import
+
 import click
 
+from tower_cli.conf import settings
+from tower_cli.utils.types import resolve_deferred
+
 
 class Command(click.Command):
     """A Command subclass that adds support for the concept that invocation
@@ -22,7 +27,16 @@ class Command(click.Command):
 
     This code is adapted by taking code from click.MultiCommand and placing
     it here, to get just the --help functionality and nothing else.
+
+    Related options given by name are not looked up one at a time as they
+    are parsed; instead, once parsing is done, they are all looked up
+    concurrently (see `resolve_deferred`), before the command is invoked. Commands run against
+    several Tower profiles (with `--hosts`) get the names instead, since
+    each Tower has primary keys of its own; see `tower_cli.fleet`. Commands
+    run with `--offline` look them up in the mirror.
     """
+    defer_related = True
+
     def __init__(self, name=None, no_args_is_help=True, **kwargs):
         self.no_args_is_help = no_args_is_help
         super(Command, self).__init__(name=name, **kwargs)
@@ -41,3 +55,13 @@ class Command(click.Command):
             click.echo(ctx.get_help())
             ctx.exit()
         return super(Command, self).parse_args(ctx, args)
+
+    def invoke(self, ctx):
+        """Look up any related options given by name, and then invoke the
+        command.
+        """
+        if not ctx.params.get('hosts', None):
+            offline = ctx.params.get('offline', None) or None
+            with settings.runtime_values(offline=offline):
+                ctx.params.update(resolve_deferred(ctx.params))
+        return super(Command, self).invoke(ctx)
@@ -0,0 +1,68 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from concurrent import futures
+
+from tower_cli.api import inherit_context
+from tower_cli.conf import settings
+
+
+def imap(func, items, workers=None):
+    """Call `func` on each of the given items using a bounded pool of
+    threads, and yield a `(item, result, error)` tuple for each item, in
+    the order of the items.
+
+    Exactly one of `result` and `error` is meaningful: if the call raised
+    an exception, it is in `error` (and `result` is None); otherwise,
+    `error` is None. Failures never stop the remaining calls.
+
+    The calls run with the context and runtime settings of the caller.
+    The number of threads defaults to the `concurrency` setting.
+    """
+    items = list(items)
+    if not items:
+        return
+    workers = min(workers or settings.concurrency, len(items))
+    func = inherit_context(func)
+
+    def call(item):
+        try:
+            return func(item), None
+        except Exception as ex:
+            return None, ex
+
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for item, (result, error) in zip(items, executor.map(call, items)):
+            yield item, result, error
+
+
+def map(func, items, workers=None):
+    """Call `func` on each of the given items using a bounded pool of
+    threads, and return the list of results, in the order of the items.
+
+    If any call raises an exception, the first such exception is raised
+    once all calls are done.
+    """
+    results = []
+    first_error = None
+    for item, result, error in imap(func, items, workers=workers):
+        if error is not None and first_error is None:
+            first_error = error
+        results.append(result)
+    if first_error is not None:
+        raise first_error
+    return results
@@ -0,0 +1,52 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import sqlite3
+
+
+class Transaction(object):
+    """Open the SQLite database at the given path, run the enclosed
+    statements as one transaction, and close the connection afterwards.
+
+    The transaction is committed if the enclosed statements succeed, and
+    rolled back otherwise. An `immediate` transaction takes the database's
+    write lock as it begins, rather than at its first write, so that
+    processes reading and then writing the same rows are serialized.
+    """
+    def __init__(self, filename, timeout=30, immediate=False):
+        self.filename = filename
+        self.timeout = timeout
+        self.immediate = immediate
+        self.db = None
+
+    def __enter__(self):
+        # Transactions are begun and ended explicitly, rather than by the
+        # sqlite3 module's guesses.
+        self.db = sqlite3.connect(self.filename, timeout=self.timeout,
+                                  isolation_level=None)
+        try:
+            self.db.execute('BEGIN IMMEDIATE' if self.immediate else 'BEGIN')
+        except Exception:
+            self.db.close()
+            raise
+        return self.db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.db.close()
@@ -14,13 +14,16 @@
 # limitations under the License.
 
 from __future__ import absolute_import, unicode_literals
+from copy import copy
 import os
 import re
 
 import click
 
+import six
+
 import tower_cli
-from tower_cli.utils import debug, exceptions as exc
+from tower_cli.utils import debug, exceptions as exc, parallel
 from tower_cli.utils.compat import OrderedDict
 
 
@@ -64,12 +67,17 @@ class MappedChoice(click.Choice):
 class Related(click.types.ParamType):
     """A subclass of click.types.ParamType that represents a value
     related to another resource.
+
+    If `multiple` is set, the value is a comma-separated list of names or
+    IDs (or a list of them), converted to a list of primary keys with one
+    batched lookup rather than one lookup per name.
     """
     name = 'related'
 
-    def __init__(self, resource_name):
+    def __init__(self, resource_name, multiple=False):
         super(Related, self).__init__()
         self.resource_name = resource_name
+        self.multiple = multiple
 
     def convert(self, value, param, ctx):
         """Return the appropriate interger value. If a non-integer is
@@ -82,6 +90,16 @@ class Related(click.types.ParamType):
         if value is None:
             return None
 
+        deferred = ctx is not None and getattr(ctx.command, 'defer_related',
+                                               False)
+        if self.multiple:
+            # Other identity fields given by name may not be looked up
+            # yet; commands that defer lookups look these up after them.
+            if deferred:
+                return DeferredRelated(self, value, param)
+            return self.convert_many(resource, value,
+                                     getattr(ctx, 'params', None))
+
         # If we were already given an integer, do nothing.
         # This ensures that the convert method is idempotent.
         if isinstance(value, int):
@@ -92,6 +110,19 @@ class Related(click.types.ParamType):
         if re.match(r'^[\d]+$', value):
             return int(value)
 
+        # Commands that resolve their related options all at once (see
+        # `tower_cli.utils.command.Command`) get the name back, to be looked
+        # up later.
+        if deferred:
+            return DeferredRelated(self, value, param)
+        return self.lookup(value, param)
+
+    def lookup(self, value, param):
+        """Look up the given name, and return the primary key of the
+        object it names.
+        """
+        resource = tower_cli.get_resource(self.resource_name)
+
         # Okay, we have a string. Try to do a name-based lookup on the
         # resource, and return back the ID that we get from that.
         #
@@ -116,5 +147,69 @@ class Related(click.types.ParamType):
         # Done! Return the ID.
         return rel['id']
 
+    def convert_many(self, resource, value, params=None):
+        """Return the list of primary keys for a list of names or IDs.
+
+        Other identity fields among the given parameters (such as the
+        inventory, for hosts) narrow the lookup.
+        """
+        if isinstance(value, six.string_types):
+            value = [i.strip() for i in value.split(',') if i.strip()]
+
+        scope = {}
+        params = params or {}
+        for field_name in resource.identity[:-1]:
+            if isinstance(params.get(field_name, None), int):
+                scope[field_name] = params[field_name]
+
+        debug.log('The %s are given as names; looking them up.' %
+                  self.resource_name, header='details')
+        pks = resource.resolve(value, **scope)
+        return [pks[i] for i in value]
+
     def get_metavar(self, param):
+        if self.multiple:
+            return '%sS' % self.resource_name.upper()
         return self.resource_name.upper()
+
+
+class DeferredRelated(object):
+    """A related value given by name, whose lookup has been put off until
+    all of a command's options are parsed, so that it can be made
+    concurrently with the others.
+    """
+    def __init__(self, related, value, param):
+        self.related = related
+        self.value = value
+        self.param = param
+
+    def resolve(self, params=None):
+        """Look up the name, and return the primary key it names (or, for
+        a list of names, the primary keys, within the scope of the given
+        parameters).
+        """
+        if self.related.multiple:
+            resource = tower_cli.get_resource(self.related.resource_name)
+            return self.related.convert_many(resource, self.value, params)
+        return self.related.lookup(self.value, self.param)
+
+
+def resolve_deferred(params):
+    """Return a copy of the given parameters, with the related values
+    given by name (see `DeferredRelated`) looked up.
+
+    Single values are looked up first, concurrently; lists of values are
+    looked up afterwards, since the other parameters (such as the
+    inventory, for hosts) narrow their lookups.
+    """
+    answer = copy(params)
+    for multiple in (False, True):
+        deferred = [(k, v) for k, v in answer.items()
+                    if isinstance(v, DeferredRelated) and
+                    v.related.multiple == multiple]
+        if not deferred:
+            continue
+        pks = parallel.map(lambda item: item[1].resolve(answer), deferred)
+        for (key, _), pk in zip(deferred, pks):
+            answer[key] = pk
+    return answer
@@ -0,0 +1,184 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+
+from six.moves import BaseHTTPServer, socketserver
+
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest
+
+try:
+    import asyncio
+    from tower_cli import aio
+except (ImportError, SyntaxError):  # Python < 3.5
+    aio = None
+if aio is not None and aio.aiohttp is None:
+    aio = None
+
+
+class FauxTower(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """A local HTTP server standing in for Ansible Tower, answering
+    registered (method, path) pairs with canned JSON.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           FauxTowerHandler)
+
+    def register(self, path, payload, method='GET', status_code=200):
+        self.routes[(method, '/api/v1' + path)] = (status_code, payload)
+
+    @property
+    def host(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+
+class FauxTowerHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def _respond(self):
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        body = self.rfile.read(length) if length else b''
+        self.server.requests.append((self.command, self.path, body))
+        status, payload = self.server.routes.get((self.command, self.path),
+                                                 (404, {}))
+        content = json.dumps(payload).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(aio is None, 'Requires Python 3.5+ and aiohttp.')
+class AsyncTests(unittest.TestCase):
+    """A set of tests to establish that the asynchronous client and
+    resources work in the way that we expect, against a local server.
+    """
+    def setUp(self):
+        self.server = FauxTower()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.loop.close()
+
+    def run_async(self, resource_name, method, *args, **kwargs):
+        """Call the given method on the async version of the resource
+        against the local server, and return its result.
+        """
+        client = aio.AsyncClient(concurrency=2)
+        res = aio.get_resource(resource_name, client)
+        with settings.runtime_values(host=self.server.host, username='meagan',
+                                     password='wine', verbose=False):
+            try:
+                return self.loop.run_until_complete(
+                    getattr(res, method)(*args, **kwargs))
+            finally:
+                self.loop.run_until_complete(client.close())
+
+    def test_get(self):
+        """Establish that an object can be retrieved by primary key."""
+        self.server.register('/users/1/', {'id': 1, 'username': 'bob'})
+        result = self.run_async('user', 'get', 1)
+        self.assertEqual(result, {'id': 1, 'username': 'bob'})
+
+    def test_list_all_pages(self):
+        """Establish that all pages are collated when requested."""
+        self.server.register('/users/', {
+            'count': 3, 'next': '/api/v1/users/?page=2', 'previous': None,
+            'results': [{'id': 1}],
+        })
+        for page in (2, 3):
+            self.server.register('/users/?page=%d' % page, {
+                'count': 3, 'next': None, 'previous': None,
+                'results': [{'id': page}],
+            })
+        result = self.run_async('user', 'list', all_pages=True)
+        self.assertEqual([i['id'] for i in result['results']], [1, 2, 3])
+
+    def test_create(self):
+        """Establish that create looks for an existing record, and then
+        posts a new one.
+        """
+        self.server.register('/users/?username=bob',
+                             {'count': 0, 'results': []})
+        self.server.register('/users/', {'id': 42, 'username': 'bob'},
+                             method='POST')
+        result = self.run_async('user', 'create', username='bob',
+                                email='bob@example.com')
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['id'], 42)
+        self.assertEqual(json.loads(self.server.requests[1][2].decode()),
+                         {'username': 'bob', 'email': 'bob@example.com'})
+
+    def test_delete_missing(self):
+        """Establish that deleting a missing record is not a change."""
+        result = self.run_async('user', 'delete', 7)
+        self.assertEqual(result, {'changed': False})
+
+    def test_error_mapping(self):
+        """Establish that errors map to the same exceptions as they do for
+        the synchronous client.
+        """
+        self.server.register('/users/1/', {}, status_code=500)
+        with self.assertRaises(exc.ServerError):
+            self.run_async('user', 'get', 1)
+        self.server.register('/users/1/', {}, status_code=401)
+        with self.assertRaises(exc.AuthError):
+            self.run_async('user', 'get', 1)
+        with self.assertRaises(exc.NotFound):
+            self.run_async('user', 'get', 2)
+
+    def test_monitor(self):
+        """Establish that monitoring returns once a job succeeds, and
+        raises JobFailure if it fails.
+        """
+        self.server.register('/jobs/1/', {'elapsed': 1, 'failed': False,
+                                          'status': 'successful'})
+        result = self.run_async('job', 'monitor', 1)
+        self.assertEqual(result['status'], 'successful')
+
+        self.server.register('/jobs/2/', {'elapsed': 1, 'failed': True,
+                                          'status': 'failed'})
+        with self.assertRaises(exc.JobFailure):
+            self.run_async('job', 'monitor', 2)
+
+    def test_project_status(self):
+        """Establish that project status follows the project's most recent
+        update.
+        """
+        self.server.register('/projects/1/', {
+            'related': {'last_update': '/api/v1/project_updates/4/'},
+        })
+        self.server.register('/project_updates/4/', {
+            'elapsed': 3, 'failed': False, 'status': 'successful',
+        })
+        result = self.run_async('project', 'status', 1)
+        self.assertEqual(result['status'], 'successful')
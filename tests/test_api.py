@@ -13,12 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+
 import requests
 from requests.sessions import Session
 
 from fauxquests.response import Resp
 
-from tower_cli.api import APIResponse, client
+from tower_cli.api import (APIResponse, Context, NodePool, client,
+                           inherit_context)
 from tower_cli.conf import settings
 from tower_cli.utils import debug, exceptions as exc
 from tower_cli.utils.data_structures import OrderedDict
@@ -167,3 +170,148 @@ class ClientTests(unittest.TestCase):
                 with settings.runtime_values(insecure=False):
                     client.get('/ping/')
                     assert g.called
+
+
+class ContextTests(unittest.TestCase):
+    """A set of tests to establish that contexts scope settings and clients
+    to a thread in the way that we expect.
+    """
+    def test_context_settings(self):
+        """Establish that activating a context applies its settings, and
+        that they are reverted afterwards.
+        """
+        ctx = Context(host='10.0.0.1', username='alice')
+        with settings.runtime_values(host='10.0.0.2'):
+            with ctx:
+                self.assertEqual(client.prefix, 'https://10.0.0.1/api/v1/')
+                self.assertEqual(settings.username, 'alice')
+                self.assertIs(Context.current(), ctx)
+            self.assertEqual(client.prefix, 'https://10.0.0.2/api/v1/')
+            self.assertIsNot(Context.current(), ctx)
+
+    def test_client_per_thread(self):
+        """Establish that each thread gets its own client from a context,
+        but that those clients share the context's adapters.
+        """
+        ctx = Context(host='10.0.0.1')
+        clients = []
+        thread = threading.Thread(target=lambda: clients.append(ctx.client))
+        thread.start()
+        thread.join()
+        self.assertIsNot(clients[0], ctx.client)
+        self.assertIs(clients[0].adapters, ctx.client.adapters)
+
+    def test_threads_isolated(self):
+        """Establish that contexts active in other threads do not affect
+        the settings seen by this thread.
+        """
+        entered = threading.Event()
+        release = threading.Event()
+
+        def other_thread():
+            with Context(host='10.9.9.9'):
+                entered.set()
+                release.wait()
+
+        thread = threading.Thread(target=other_thread)
+        with settings.runtime_values(host='10.0.0.2'):
+            thread.start()
+            entered.wait()
+            try:
+                self.assertEqual(client.prefix, 'https://10.0.0.2/api/v1/')
+            finally:
+                release.set()
+                thread.join()
+
+    def test_inherit_context(self):
+        """Establish that functions wrapped with `inherit_context` run with
+        the calling thread's settings and context in other threads.
+        """
+        results = []
+        ctx = Context(host='10.0.0.1')
+        with ctx:
+            with settings.runtime_values(username='bob'):
+                func = inherit_context(
+                    lambda: results.append((Context.current(), client.prefix,
+                                            settings.username)),
+                )
+        thread = threading.Thread(target=func)
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [(ctx, 'https://10.0.0.1/api/v1/', 'bob')])
+
+    def test_bound_resource(self):
+        """Establish that a resource bound to a context makes its requests
+        through that context.
+        """
+        ctx = Context(host='10.0.0.1')
+        res = ctx.get_resource('user')
+        with client.test_mode as t:
+            t.register_json('/users/1/', {'id': 1, 'username': 'bob'})
+            with mock.patch.object(type(res.resource), 'read') as read:
+                read.side_effect = lambda *a, **k: {
+                    'count': 1, 'results': [{'prefix': client.prefix}],
+                }
+                self.assertEqual(res.get(1),
+                                 {'prefix': 'https://10.0.0.1/api/v1/'})
+
+
+class NodePoolTests(unittest.TestCase):
+    """A set of tests to establish that reads are spread across the nodes
+    of a Tower cluster in the way that we expect.
+    """
+    def test_round_robin(self):
+        """Establish that the round-robin strategy rotates through the
+        healthy nodes, and offers down nodes only as a last resort.
+        """
+        pool = NodePool(['a', 'b', 'c'])
+        self.assertEqual(pool.candidates(), ['a', 'b', 'c'])
+        self.assertEqual(pool.candidates(), ['b', 'c', 'a'])
+        pool.mark_down('c')
+        self.assertEqual(pool.candidates()[-1], 'c')
+        pool.mark_up('c')
+        self.assertEqual(sorted(pool.candidates()), ['a', 'b', 'c'])
+
+    def test_latency(self):
+        """Establish that the latency strategy prefers the fastest node."""
+        pool = NodePool(['a', 'b'], strategy='latency')
+        pool.mark_up('a', latency=0.5)
+        pool.mark_up('b', latency=0.1)
+        self.assertEqual(pool.candidates(), ['b', 'a'])
+
+    def test_check(self):
+        """Establish that health checks ping each node and record the
+        result.
+        """
+        pool = NodePool(['a', 'b'])
+        ok = mock.MagicMock(status_code=200)
+        with mock.patch.object(requests, 'get') as get:
+            get.side_effect = [ok, requests.exceptions.ConnectionError]
+            pool.check()
+            self.assertEqual(get.call_args_list[0][0][0],
+                             'https://a/api/v1/ping/')
+        self.assertEqual(pool.healthy, {'a': True, 'b': False})
+
+    def test_failover(self):
+        """Establish that a read fails over to another node if one cannot
+        be reached, and that writes go to the configured host.
+        """
+        with client.test_mode as t:
+            t.register_json('/ping/', {'status': 'ok'})
+            t.register_json('/ping/', {'status': 'ok'}, method='POST')
+            pool = NodePool(['bogus', '20.12.4.21'])
+            with mock.patch.object(NodePool, 'get', return_value=pool):
+                with settings.runtime_values(nodes='bogus,20.12.4.21'):
+                    send = t.send
+
+                    def flaky_send(request, **kwargs):
+                        if '//bogus/' in request.url:
+                            raise requests.exceptions.ConnectionError
+                        return send(request, **kwargs)
+
+                    with mock.patch.object(t, 'send', flaky_send):
+                        r = client.get('/ping/')
+                        self.assertEqual(r.json(), {'status': 'ok'})
+                        self.assertFalse(pool.healthy['bogus'])
+                        client.post('/ping/', {})
+                        self.assertIn('20.12.4.21', t.requests[-1].url)
@@ -0,0 +1,190 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from tower_cli import archive
+from tower_cli.api import client
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest
+
+
+def page(results, count=None, next=None):
+    return {'count': len(results) if count is None else count,
+            'next': next, 'previous': None, 'results': results}
+
+
+class ArchiveTests(unittest.TestCase):
+    """A set of tests to establish that archives are written and read in
+    the way that we expect.
+    """
+    def test_levels(self):
+        """Establish that resources are ordered so that each comes after
+        the resources it refers to.
+        """
+        levels = archive.levels()
+        position = dict([(name, ix) for ix, level in enumerate(levels)
+                         for name in level])
+        for name, deps in archive.dependencies().items():
+            for dep in deps:
+                self.assertLess(position[dep], position[name])
+        self.assertEqual(levels[0], ['organization', 'user'])
+
+    def test_export(self):
+        """Establish that every page of every resource is exported, with
+        related records referred to by identity, and without secrets.
+        """
+        url = '/%s/?page=%d&page_size=2&order_by=id'
+        output = io.BytesIO()
+        with client.test_mode as t:
+            t.register_json(url % ('organizations', 1), page([
+                {'id': 1, 'name': 'Acme', 'description': ''},
+            ]))
+            t.register_json(url % ('credentials', 1), page([
+                {'id': 4, 'name': 'key', 'kind': 'ssh', 'user': None,
+                 'team': None, 'password': '$encrypted$',
+                 'ssh_key_data': '$encrypted$'},
+            ]))
+            t.register_json(url % ('inventories', 1), page([
+                {'id': 5, 'name': 'prod', 'organization': 1},
+            ]))
+            t.register_json(url % ('hosts', 1), page([
+                {'id': 1, 'name': 'web1', 'inventory': 5},
+                {'id': 2, 'name': 'web2', 'inventory': 5},
+            ], count=3, next='/api/v1/hosts/?page=2'))
+            t.register_json(url % ('hosts', 2), page([
+                {'id': 3, 'name': 'web3', 'inventory': 9},
+            ], count=3))
+            counts = archive.export(output, names=(
+                'organization', 'credential', 'inventory', 'host',
+            ), page_size=2)
+        self.assertEqual(dict(counts), {'organization': 1, 'credential': 1,
+                                        'inventory': 1, 'host': 3})
+
+        output.seek(0)
+        header, records = archive.read(output)
+        self.assertEqual(header['resources'],
+                         ['organization', 'credential', 'inventory', 'host'])
+        records = list(records)
+        self.assertEqual(len(records), 6)
+        hosts = [r for name, r in records if name == 'host']
+        self.assertEqual(hosts[0]['inventory'], {
+            'name': 'prod', 'organization': {'name': 'Acme'},
+        })
+        self.assertEqual(hosts[2]['inventory'], {'id': 9})
+        credential = [r for name, r in records if name == 'credential'][0]
+        self.assertNotIn('password', credential)
+        self.assertNotIn('ssh_key_data', credential)
+        self.assertNotIn('id', credential)
+
+    def test_restore(self):
+        """Establish that records are created or updated in dependency
+        order, with references resolved to the IDs of the target Tower.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        filename = os.path.join(directory, 'archive.jsonl.gz')
+        acme = {'name': 'Acme'}
+        prod = {'name': 'prod', 'organization': acme}
+        with open(filename, 'wb') as f:
+            writer = archive.Writer(f, resources=['host', 'inventory',
+                                                  'organization'])
+            writer.write('host', [
+                {'name': 'web1', 'inventory': prod},
+                {'name': 'web2', 'inventory': {'name': 'qa',
+                                               'organization': acme}},
+            ])
+            writer.write('organization', [acme])
+            writer.write('inventory', [dict(prod, description='Prod')])
+            writer.close()
+
+        url = '/%s/?page=1&page_size=200&order_by=id'
+        outfile = io.StringIO()
+        with client.test_mode as t:
+            t.register_json(url % 'organizations', page([
+                {'id': 1, 'name': 'Acme', 'description': ''},
+            ]))
+            t.register_json(url % 'inventories', page([
+                {'id': 5, 'name': 'prod', 'organization': 1,
+                 'description': ''},
+            ]))
+            t.register_json('/inventories/5/', {'id': 5}, method='PATCH')
+            t.register_json(url % 'hosts', page([]))
+            t.register_json('/hosts/', {'id': 3, 'name': 'web1'},
+                            method='POST')
+            answer = archive.restore(filename, outfile=outfile)
+
+        self.assertEqual(list(answer.keys()),
+                         ['organization', 'inventory', 'host'])
+        self.assertEqual(answer['organization']['unchanged'], 1)
+        self.assertEqual(answer['inventory']['modified'], 1)
+        self.assertEqual(answer['host']['created'], 1)
+        self.assertEqual(answer['host']['failed'], 1)
+        self.assertIn('Could not find the inventory', outfile.getvalue())
+        # Each resource is listed to match the records being restored,
+        # and those that are referred to are listed again once written,
+        # to index them; there is one write per change, and no record is
+        # read again before it is written.
+        self.assertEqual(len(t.requests), 7)
+        self.assertEqual([i.method for i in t.requests],
+                         ['GET', 'GET', 'GET', 'PATCH', 'GET', 'GET', 'POST'])
+        posts = [i for i in t.requests if i.method == 'POST']
+        self.assertEqual(json.loads(posts[0].body),
+                         {'name': 'web1', 'inventory': 5})
+
+    def test_restore_users(self):
+        """Establish that new users are given a password, and that users
+        who exist already are not.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        filename = os.path.join(directory, 'archive.jsonl.gz')
+        with open(filename, 'wb') as f:
+            writer = archive.Writer(f, resources=['user'])
+            writer.write('user', [
+                {'username': 'alice', 'email': 'alice@example.com'},
+                {'username': 'bob', 'email': 'bob@example.com'},
+            ])
+            writer.close()
+
+        url = '/users/?page=1&page_size=200&order_by=id'
+        for password in ('changeme', None):
+            with client.test_mode as t:
+                t.register_json(url, page([{'id': 1, 'username': 'alice'}]))
+                t.register_json('/users/1/', {'id': 1}, method='PATCH')
+                t.register_json('/users/', {'id': 2, 'username': 'bob'},
+                                method='POST')
+                answer = archive.restore(filename, user_password=password,
+                                         outfile=io.StringIO())
+            self.assertEqual(answer['user']['modified'], 1)
+            self.assertEqual(answer['user']['created'], 1)
+            writes = dict([(i.method, json.loads(i.body))
+                           for i in t.requests if i.method != 'GET'])
+            self.assertNotIn('password', writes['PATCH'])
+            self.assertEqual(writes['POST']['username'], 'bob')
+            if password:
+                self.assertEqual(writes['POST']['password'], password)
+            else:
+                self.assertEqual(len(writes['POST']['password']), 32)
+
+    def test_read_other_files(self):
+        """Establish that a file that is not an archive is rejected."""
+        with self.assertRaises(exc.UsageError):
+            archive.read(io.BytesIO(b'not an archive'))
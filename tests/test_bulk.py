@@ -0,0 +1,157 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import click
+from click.testing import CliRunner
+
+from six.moves import StringIO
+
+import tower_cli
+from tower_cli import bulk
+from tower_cli.api import client
+
+from tests.compat import unittest, mock
+
+
+HOSTS = {'count': 2, 'next': None, 'previous': None, 'results': [
+    {'id': 1, 'name': 'web1', 'inventory': 5, 'enabled': True},
+    {'id': 2, 'name': 'web2', 'inventory': 5, 'enabled': True},
+]}
+
+
+class BulkTests(unittest.TestCase):
+    """A set of tests to establish that bulk operations work in the way
+    that we expect.
+    """
+    def setUp(self):
+        self.host = tower_cli.get_resource('host')
+
+    def run_bulk(self, *operations):
+        return list(bulk.run(self.host, operations, workers=2))
+
+    def test_operations(self):
+        """Establish that existing records are listed once, and that each
+        operation writes only what it needs to.
+        """
+        with client.test_mode as t:
+            t.register_json('/hosts/?page=1&page_size=200&order_by=id', HOSTS)
+            t.register_json('/hosts/', {'id': 3, 'name': 'web3'},
+                            method='POST')
+            t.register_json('/hosts/2/', {'id': 2, 'enabled': False},
+                            method='PATCH')
+            t.register_json('/hosts/1/', {}, method='DELETE')
+            results = self.run_bulk(
+                {'action': 'create', 'name': 'web3', 'inventory': 5},
+                {'action': 'create', 'name': 'web1', 'inventory': 5},
+                {'action': 'modify', 'name': 'web2', 'inventory': 5,
+                 'enabled': False},
+                {'action': 'delete', 'id': 1},
+                {'action': 'delete', 'name': 'web9', 'inventory': 5},
+            )
+        self.assertEqual([(i['result'], i['id']) for i in results], [
+            ('created', 3), ('unchanged', 1), ('modified', 2),
+            ('deleted', 1), ('unchanged', None),
+        ])
+        self.assertEqual(len(t.requests), 4)
+
+    def test_failures_do_not_stop_others(self):
+        """Establish that a failed operation is reported, and that the
+        others still run.
+        """
+        with client.test_mode as t:
+            t.register_json('/hosts/?page=1&page_size=200&order_by=id', HOSTS)
+            results = self.run_bulk(
+                {'action': 'frobnicate'},
+                {'action': 'modify', 'name': 'web9', 'inventory': 5},
+                {'action': 'modify', 'name': 'web1', 'inventory': 5,
+                 'enabled': True},
+            )
+        self.assertEqual([i['result'] for i in results],
+                         ['failed', 'failed', 'unchanged'])
+        self.assertIn('Unknown action', results[0]['error'])
+        self.assertIn('could not be found', results[1]['error'])
+
+    def test_related_names(self):
+        """Establish that related fields given by name are all looked up
+        at once, and that unknown names fail only their operations.
+        """
+        with client.test_mode as t:
+            t.register_json(
+                '/inventories/?name__in=nope%2Cprod&page_size=100', {
+                    'count': 1, 'next': None, 'previous': None,
+                    'results': [{'id': 5, 'name': 'prod'}],
+                })
+            t.register_json('/hosts/?page=1&page_size=200&order_by=id', HOSTS)
+            results = self.run_bulk(
+                {'action': 'create', 'name': 'web1', 'inventory': 'prod'},
+                {'action': 'create', 'name': 'web1', 'inventory': 'nope'},
+            )
+            lookups = [r for r in t.requests if '/inventories/' in r.url]
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(results[0]['result'], 'unchanged')
+        self.assertEqual(results[1]['result'], 'failed')
+        self.assertIn('nope', results[1]['error'])
+
+    def test_read_operations(self):
+        """Establish that operations are read from lines of JSON, and that
+        invalid lines become failures.
+        """
+        lines = StringIO('{"action": "delete", "id": 1}\n\nnot json\n[]\n')
+        operations = list(bulk.read_operations(lines))
+        self.assertEqual(operations[0], {'action': 'delete', 'id': 1})
+        self.assertIn('error', operations[1])
+        self.assertIn('error', operations[2])
+
+    def test_summarize(self):
+        """Establish that the summary counts each outcome."""
+        summary = bulk.summarize([{'result': 'created'},
+                                  {'result': 'failed'},
+                                  {'result': 'unchanged'}])
+        self.assertEqual(summary['total'], 3)
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(summary['failed'], 1)
+
+    def test_command(self):
+        """Establish that the bulk command writes each result as a line of
+        JSON, and returns the summary.
+        """
+        operations = StringIO('{"action": "delete", "id": 1}\n')
+        results = StringIO()
+        with client.test_mode as t:
+            t.register_json('/hosts/?page=1&page_size=200&order_by=id', HOSTS)
+            t.register_json('/hosts/1/', {}, method='DELETE')
+            summary = self.host.bulk(operations, results=results)
+        self.assertEqual(summary['deleted'], 1)
+        self.assertEqual(json.loads(results.getvalue())['result'],
+                         'deleted')
+
+    def test_command_summary_to_stderr(self):
+        """Establish that the bulk command prints its summary to standard
+        error, apart from the results written to standard output.
+        """
+        command = self.host.as_command().get_command(None, 'bulk')
+        with client.test_mode as t:
+            t.register_json('/hosts/?page=1&page_size=200&order_by=id', HOSTS)
+            t.register_json('/hosts/1/', {}, method='DELETE')
+            with mock.patch.object(click, 'secho') as secho:
+                result = CliRunner().invoke(
+                    command, ['--file', '-'],
+                    input='{"action": "delete", "id": 1}\n')
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(json.loads(result.output)['result'], 'deleted')
+        self.assertEqual(secho.call_count, 1)
+        self.assertTrue(secho.call_args[1]['err'])
@@ -0,0 +1,179 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import threading
+
+from tower_cli.api import client
+from tower_cli.coalesce import ProcessCoordinator, SingleFlight
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest, mock
+
+
+class SingleFlightTests(unittest.TestCase):
+    """A set of tests to establish that concurrent identical calls within
+    one process are coalesced in the way that we expect.
+    """
+    def _run_concurrently(self, flight, func, count=4):
+        """Call `func` through the given flight from several threads at
+        once, and return the list of (result, error) pairs.
+        """
+        outcomes = []
+
+        def target():
+            try:
+                outcomes.append((flight.do('key', func), None))
+            except Exception as ex:
+                outcomes.append((None, ex))
+        threads = [threading.Thread(target=target) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, outcomes
+
+    def test_concurrent_calls_run_once(self):
+        """Establish that calls made while one is in flight wait for it
+        and share its result.
+        """
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            release.wait()
+            return 'answer'
+        threads, outcomes = self._run_concurrently(flight, func)
+        while not calls:
+            release.wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, [('answer', None)] * 4)
+
+    def test_error_is_shared(self):
+        """Establish that an error raised by the call in flight is raised
+        for every caller waiting on it.
+        """
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def func():
+            release.wait()
+            raise exc.ServerError('Boom.')
+        threads, outcomes = self._run_concurrently(flight, func, count=2)
+        release.wait(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(isinstance(i[1], exc.ServerError)
+                            for i in outcomes))
+
+    def test_sequential_calls(self):
+        """Establish that calls that do not overlap are each made."""
+        flight = SingleFlight()
+        func = mock.MagicMock(return_value=1)
+        flight.do('key', func)
+        flight.do('key', func)
+        self.assertEqual(func.call_count, 2)
+
+
+class ProcessCoordinatorTests(unittest.TestCase):
+    """A set of tests to establish that identical requests are coalesced
+    across processes in the way that we expect.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'flights.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_reuses_recent_response(self):
+        """Establish that a response stored by another process within the
+        grace period is rebuilt rather than requested again.
+        """
+        first = ProcessCoordinator(self.filename)
+        second = ProcessCoordinator(self.filename)
+        response = mock.MagicMock(status_code=200, content=b'{"id": 1}',
+                                  headers={'Content-Type': 'text/json'})
+        self.assertIs(first.do('key', lambda: response, None), response)
+
+        send = mock.MagicMock()
+        build = mock.MagicMock(return_value='rebuilt')
+        self.assertEqual(second.do('key', send, build), 'rebuilt')
+        self.assertFalse(send.called)
+        build.assert_called_once_with(200, {'Content-Type': 'text/json'},
+                                      b'{"id": 1}')
+
+    def test_stale_response_is_not_reused(self):
+        """Establish that a response older than the grace period is not
+        reused.
+        """
+        coordinator = ProcessCoordinator(self.filename, grace=0)
+        response = mock.MagicMock(status_code=200, content=b'{}', headers={})
+        coordinator.do('key', lambda: response, None)
+        send = mock.MagicMock(return_value=response)
+        coordinator.do('key', send, None)
+        self.assertTrue(send.called)
+
+    def test_failed_send_releases_claim(self):
+        """Establish that a request that fails is not waited on by other
+        processes.
+        """
+        coordinator = ProcessCoordinator(self.filename, wait=0.5)
+        with self.assertRaises(exc.ConnectionError):
+            coordinator.do('key', mock.MagicMock(
+                side_effect=exc.ConnectionError('Down.')), None)
+        response = mock.MagicMock(status_code=200, content=b'{}', headers={})
+        send = mock.MagicMock(return_value=response)
+        self.assertIs(coordinator.do('key', send, None), response)
+
+
+class ClientCoalesceTests(unittest.TestCase):
+    """A set of tests to establish that the API client coalesces GET
+    requests in the way that we expect.
+    """
+    def test_get_rebuilt_from_other_process(self):
+        """Establish that a GET request answered by another process yields
+        a normal API response.
+        """
+        tmp = tempfile.mkdtemp()
+        try:
+            with client.test_mode as t:
+                t.register_json('/users/1/', {'id': 1})
+                with settings.runtime_values(cache_dir=tmp,
+                                             coalesce_across_processes=True):
+                    first = client.get('/users/1/')
+                    t.register_json('/users/1/', {'id': 2})
+                    second = client.get('/users/1/')
+            self.assertEqual(first.json(), {'id': 1})
+            self.assertEqual(second.json(), {'id': 1})
+            self.assertEqual(len(t.requests), 1)
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_writes_not_coalesced(self):
+        """Establish that requests other than GET are always sent."""
+        with client.test_mode as t:
+            t.register_json('/users/1/', {}, method='DELETE')
+            with mock.patch('tower_cli.coalesce.singleflight') as flight:
+                client.delete('/users/1/')
+            self.assertFalse(flight.do.called)
+            self.assertEqual(len(t.requests), 1)
@@ -185,6 +185,30 @@ class ConfigTests(unittest.TestCase):
         self.assertNotIn(mock.call().write('username = luke\n'),
                          mock_open.mock_calls)
 
+    def test_write_profile_setting(self):
+        """Establish that a setting can be written to a named profile."""
+        mock_open = mock.mock_open()
+        with mock.patch('tower_cli.commands.config.open', mock_open,
+                        create=True):
+            with mock.patch.object(os, 'chmod'):
+                result = self.runner.invoke(config, ['host', 'tower.prod',
+                                                     '--profile', 'prod'])
+        self.assertEqual(result.exit_code, 0)
+        written = ''.join([c[1][0] for c in mock_open.mock_calls
+                           if c[0] == '().write'])
+        self.assertIn('[profile prod]\nhost = tower.prod\n', written)
+
+    def test_read_profile(self):
+        """Establish that the settings of a profile are printed if no value
+        is given.
+        """
+        with mock.patch.object(type(settings), 'profile') as profile:
+            profile.return_value = {'host': 'tower.prod', 'username': 'bob'}
+            result = self.runner.invoke(config, ['--profile', 'prod'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output.strip(),
+                         'host: tower.prod\nusername: bob')
+
     def test_error_invalid_key(self):
         """Establish that if `tower-cli config` is sent an invalid key,
         that we raise an exception.
@@ -0,0 +1,61 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import OrderedDict
+import importlib
+
+from click.testing import CliRunner
+
+from tests.compat import unittest, mock
+
+
+import_ = importlib.import_module('tower_cli.commands.import').import_
+
+
+class ImportTests(unittest.TestCase):
+    """A set of tests to ensure that the import command reports what it
+    restored.
+    """
+    def setUp(self):
+        self.runner = CliRunner()
+        self.filesystem = self.runner.isolated_filesystem()
+        self.filesystem.__enter__()
+        self.addCleanup(self.filesystem.__exit__, None, None, None)
+        open('archive.jsonl.gz', 'wb').close()
+
+    def test_import(self):
+        """Establish that the import command passes its options through,
+        and succeeds when every record is imported.
+        """
+        answer = OrderedDict([('user', {'created': 2, 'failed': 0})])
+        with mock.patch('tower_cli.archive.restore') as restore:
+            restore.return_value = answer
+            result = self.runner.invoke(import_, [
+                'archive.jsonl.gz', '--user-password', 'changeme',
+            ])
+        self.assertEqual(result.exit_code, 0)
+        restore.assert_called_once_with('archive.jsonl.gz', workers=None,
+                                        user_password='changeme')
+
+    def test_import_failures(self):
+        """Establish that the import command fails if any record could
+        not be imported.
+        """
+        answer = OrderedDict([('user', {'created': 1, 'failed': 2}),
+                              ('team', {'created': 1, 'failed': 1})])
+        with mock.patch('tower_cli.archive.restore') as restore:
+            restore.return_value = answer
+            result = self.runner.invoke(import_, ['archive.jsonl.gz'])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('3 records could not be imported.', result.output)
@@ -16,6 +16,7 @@
 import os
 import os.path
 import stat
+import threading
 import warnings
 
 from six.moves import StringIO
@@ -48,6 +49,46 @@ class SettingsTests(unittest.TestCase):
                             RuntimeWarning,
                         )
 
+    def test_runtime_values_nested(self):
+        """Establish that nested runtime values layer over the enclosing
+        ones rather than replacing them.
+        """
+        settings = Settings()
+        with settings.runtime_values(host='foo', username='bar'):
+            with settings.runtime_values(host='baz'):
+                self.assertEqual(settings.host, 'baz')
+                self.assertEqual(settings.username, 'bar')
+            self.assertEqual(settings.host, 'foo')
+
+    def test_runtime_values_thread_local(self):
+        """Establish that runtime values set in one thread are not visible
+        from other threads.
+        """
+        settings = Settings()
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(settings.host))
+        with settings.runtime_values(host='foo'):
+            thread.start()
+            thread.join()
+            self.assertEqual(settings.host, 'foo')
+        self.assertNotEqual(seen, ['foo'])
+
+    def test_profiles(self):
+        """Establish that profiles are read from `[profile NAME]` sections,
+        with the usual precedence between configuration files.
+        """
+        settings = Settings()
+        read_file = getattr(Parser, 'read_file', Parser.readfp)
+        read_file(settings._user, StringIO(
+            '[profile prod]\nhost: tower.prod\nusername: bob\n'
+            '[profile stage]\nhost: tower.stage\n'))
+        read_file(settings._local, StringIO(
+            '[profile prod]\nusername: alice\n'))
+        self.assertEqual(settings.profiles(), ['prod', 'stage'])
+        self.assertEqual(settings.profile('prod'),
+                         {'host': 'tower.prod', 'username': 'alice'})
+        self.assertIsNone(settings.profile('bogus'))
+
 
 class ParserTests(unittest.TestCase):
     """A set of tests to establish that our Parser subclass works in the
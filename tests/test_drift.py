@@ -0,0 +1,107 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+
+from tower_cli import archive, drift
+from tower_cli.api import client
+
+from tests.compat import unittest, mock
+
+
+PROD = {'name': 'prod', 'organization': {'name': 'Acme'}}
+
+
+class DriftTests(unittest.TestCase):
+    """A set of tests to establish that differences between Towers and
+    archives are found in the way that we expect.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, filename, hosts):
+        filename = os.path.join(self.directory, filename)
+        with open(filename, 'wb') as f:
+            writer = archive.Writer(f, resources=['host'])
+            writer.write('host', hosts)
+            writer.close()
+        return filename
+
+    def test_label(self):
+        """Establish that references are named by their identity fields,
+        related records first.
+        """
+        self.assertEqual(drift.label({'name': 'web1', 'inventory': PROD}),
+                         'Acme/prod/web1')
+
+    def test_compare(self):
+        """Establish that added, removed and changed records are found,
+        with the fields that changed, and that ignored fields and
+        unchanged records are not reported.
+        """
+        old = self.write('old.jsonl.gz', [
+            {'name': 'web1', 'inventory': PROD, 'enabled': True},
+            {'name': 'web2', 'inventory': PROD, 'enabled': True},
+            {'name': 'web3', 'inventory': PROD, 'enabled': True,
+             'modified': '2016-01-01'},
+        ])
+        new = self.write('new.jsonl.gz', [
+            {'name': 'web4', 'inventory': PROD, 'enabled': True},
+            {'name': 'web3', 'inventory': PROD, 'enabled': True,
+             'modified': '2016-02-01'},
+            {'name': 'web2', 'inventory': PROD, 'enabled': False},
+        ])
+        differences = drift.compare(old, new)
+        self.assertEqual([(i['change'], i['identity']) for i in differences],
+                         [('removed', 'Acme/prod/web1'),
+                          ('changed', 'Acme/prod/web2'),
+                          ('added', 'Acme/prod/web4')])
+        self.assertEqual(differences[1]['fields'],
+                         {'enabled': [True, False]})
+
+    def test_diff_live(self):
+        """Establish that the configured Tower is exported to be compared
+        with an archive, and that the export is removed afterwards.
+        """
+        old = self.write('old.jsonl.gz', [
+            {'name': 'web1', 'inventory': PROD, 'enabled': True},
+        ])
+        url = '/%s/?page=1&page_size=200&order_by=id'
+        with client.test_mode as t:
+            t.register_json(url % 'organizations', {'count': 1, 'results': [
+                {'id': 1, 'name': 'Acme'},
+            ]})
+            t.register_json(url % 'inventories', {'count': 1, 'results': [
+                {'id': 5, 'name': 'prod', 'organization': 1},
+            ]})
+            t.register_json(url % 'hosts', {'count': 1, 'results': [
+                {'id': 1, 'name': 'web1', 'inventory': 5, 'enabled': True},
+            ]})
+            mkstemp = tempfile.mkstemp
+            with mock.patch.object(tempfile, 'mkstemp') as temp:
+                temp.side_effect = lambda suffix: mkstemp(
+                    suffix=suffix, dir=self.directory)
+                differences = drift.diff(old, '-', names=(
+                    'organization', 'inventory', 'host'))
+        self.assertEqual(differences, [
+            {'change': 'added', 'resource': 'organization',
+             'identity': 'Acme'},
+            {'change': 'added', 'resource': 'inventory',
+             'identity': 'Acme/prod'},
+        ])
+        self.assertEqual(os.listdir(self.directory), ['old.jsonl.gz'])
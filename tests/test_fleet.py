@@ -0,0 +1,157 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from click.testing import CliRunner
+
+import tower_cli
+from tower_cli import fleet
+from tower_cli.api import client
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest, mock
+
+
+PROFILES = {
+    'prod': {'host': 'tower.prod'},
+    'stage': {'host': 'tower.stage'},
+}
+
+
+class FanOutTests(unittest.TestCase):
+    """A set of tests to establish that read commands can be run across
+    several Tower profiles in the way that we expect.
+    """
+    def setUp(self):
+        self.res = tower_cli.get_resource('user')
+        patches = (
+            mock.patch.object(type(settings), 'profiles',
+                              return_value=sorted(PROFILES)),
+            mock.patch.object(type(settings), 'profile',
+                              side_effect=PROFILES.get),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def read(self, **kwargs):
+        """Stand in for a resource method, answering with the host it was
+        called against (or failing on "tower.stage" if asked to).
+        """
+        if kwargs.get('fail') and settings.host == 'tower.stage':
+            raise exc.ServerError('Boom.')
+        if kwargs.get('missing') and settings.host == 'tower.stage':
+            raise exc.NotFound('Not here.')
+        return {'count': 1, 'results': [{'id': 1, 'host': settings.host}]}
+
+    def test_merge(self):
+        """Establish that results from each Tower are merged, and tagged
+        with the profile they came from.
+        """
+        result = fleet.fan_out(self.read, 'all')
+        self.assertEqual(result['count'], 2)
+        self.assertEqual(
+            [(i['tower_host'], i['host']) for i in result['results']],
+            [('prod', 'tower.prod'), ('stage', 'tower.stage')],
+        )
+        self.assertEqual(result['errors'], [])
+
+    def test_errors_do_not_abort(self):
+        """Establish that an error on one Tower is reported, and that the
+        other Towers' results are still returned.
+        """
+        result = fleet.fan_out(self.read, 'prod,stage', fail=True)
+        self.assertEqual(result['count'], 1)
+        self.assertEqual(result['errors'],
+                         [{'tower_host': 'stage', 'error': 'Boom.'}])
+
+    def test_not_found_is_empty(self):
+        """Establish that an object missing on some Tower contributes no
+        results, and that the Tower is named as missing it.
+        """
+        result = fleet.fan_out(self.read, 'all', missing=True)
+        self.assertEqual(result['count'], 1)
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(result['missing'], ['stage'])
+
+    def test_all_fail(self):
+        """Establish that if every Tower fails, the error is raised."""
+        with self.assertRaises(exc.ServerError):
+            fleet.fan_out(self.read, 'stage', fail=True)
+
+    def test_unknown_profile(self):
+        """Establish that an unknown profile is a usage error."""
+        with self.assertRaises(exc.UsageError):
+            fleet.fan_out(self.read, 'prod,bogus')
+
+    def test_list_command(self):
+        """Establish that `list --hosts` runs against each Tower and prints
+        a merged table with a tower_host column.
+        """
+        with client.test_mode as t:
+            t.register_json('/users/', {
+                'count': 1, 'next': None, 'previous': None,
+                'results': [{'id': 1, 'username': 'bob', 'email': '',
+                             'first_name': '', 'last_name': '',
+                             'is_superuser': False}],
+            })
+            with mock.patch.object(fleet, 'contexts') as contexts:
+                contexts.return_value = {'prod': mock.MagicMock(),
+                                         'stage': mock.MagicMock()}
+                command = self.res.as_command().get_command(None, 'list')
+                result = CliRunner().invoke(command, ['--hosts', 'all',
+                                                      '--format', 'json'])
+        self.assertEqual(result.exit_code, 0)
+        payload = json.loads(result.output)
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(sorted([i['tower_host'] for i in payload['results']]),
+                         ['prod', 'stage'])
+
+    def test_related_resolved_per_tower(self):
+        """Establish that a related record given by name is looked up on
+        each Tower, rather than its primary key on one Tower being sent
+        to all of them.
+        """
+        res = tower_cli.get_resource('job_template')
+        empty = {'count': 0, 'next': None, 'previous': None, 'results': []}
+        with client.test_mode as t:
+            with mock.patch.object(t, '_url_pattern', '%s'):
+                for host, pk in (('tower.prod', 3), ('tower.stage', 7)):
+                    prefix = 'https://%s/api/v1' % host
+                    t.register_json('%s/projects/?name=web' % prefix, {
+                        'count': 1, 'next': None, 'previous': None,
+                        'results': [{'id': pk, 'name': 'web'}],
+                    })
+                    t.register_json('%s/job_templates/?project=%d' %
+                                    (prefix, pk), empty)
+            with mock.patch.object(fleet, 'contexts') as contexts:
+                contexts.return_value = {
+                    'prod': settings.runtime_values(host='tower.prod'),
+                    'stage': settings.runtime_values(host='tower.stage'),
+                }
+                command = res.as_command().get_command(None, 'list')
+                result = CliRunner().invoke(command, [
+                    '--project', 'web', '--hosts', 'all', '--format', 'json',
+                ])
+            urls = sorted(r.url for r in t.requests)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(urls, [
+            'https://tower.prod/api/v1/job_templates/?project=3&page=1',
+            'https://tower.prod/api/v1/projects/?name=web',
+            'https://tower.stage/api/v1/job_templates/?project=7&page=1',
+            'https://tower.stage/api/v1/projects/?name=web',
+        ])
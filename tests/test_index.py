@@ -0,0 +1,119 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tower_cli
+from tower_cli.api import client
+from tower_cli.index import IdentityIndex, read_pages
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest
+
+
+class ReadPagesTests(unittest.TestCase):
+    """A set of tests to establish that listings are read a page at a
+    time.
+    """
+    def test_read_pages(self):
+        """Establish that each page is read only when the one before it
+        has been handled, and that reading stops at the last page.
+        """
+        read = []
+
+        def fetch(page):
+            read.append(page)
+            return {'next': page < 3, 'results': [page]}
+
+        pages = read_pages(fetch)
+        self.assertEqual(next(pages)['results'], [1])
+        self.assertEqual(read, [1])
+        self.assertEqual([i['results'] for i in pages], [[2], [3]])
+        self.assertEqual(read, [1, 2, 3])
+
+
+class IdentityIndexTests(unittest.TestCase):
+    """A set of tests to establish that the identity index works in the
+    way that we expect.
+    """
+    def setUp(self):
+        self.host = tower_cli.get_resource('host')
+
+    def build(self, t):
+        t.register_json('/hosts/?page=1&page_size=200&order_by=id', {
+            'count': 3, 'next': '/api/v1/hosts/?page=2', 'previous': None,
+            'results': [
+                {'id': 1, 'name': 'web', 'inventory': 5,
+                 'modified': '2015-01-01T00:00:00Z'},
+                {'id': 2, 'name': 'web', 'inventory': 6,
+                 'modified': '2015-01-03T00:00:00Z'},
+            ],
+        })
+        t.register_json('/hosts/?page=2&page_size=200&order_by=id', {
+            'count': 3, 'next': None, 'previous': '/api/v1/hosts/?page=1',
+            'results': [
+                {'id': 3, 'name': 'db', 'inventory': 5,
+                 'modified': '2015-01-02T00:00:00Z'},
+            ],
+        })
+        return IdentityIndex(self.host)
+
+    def test_lookup(self):
+        """Establish that records are found by primary key and by
+        identity, without further requests.
+        """
+        with client.test_mode as t:
+            index = self.build(t)
+        self.assertEqual(len(t.requests), 2)
+        self.assertEqual(index.lookup(3)['name'], 'db')
+        self.assertEqual(index.lookup(name='web', inventory=6)['id'], 2)
+        self.assertEqual(index.lookup(name='db')['id'], 3)
+        self.assertIsNone(index.lookup(name='app', inventory=5))
+        self.assertEqual(index.last_modified, '2015-01-03T00:00:00Z')
+
+    def test_lookup_ambiguous(self):
+        """Establish that a lookup matching several records fails, and one
+        with no identity fields is refused.
+        """
+        with client.test_mode as t:
+            index = self.build(t)
+        with self.assertRaises(exc.MultipleResults):
+            index.lookup(name='web')
+        with self.assertRaises(exc.BadRequest):
+            index.lookup(enabled=True)
+
+    def test_add_and_remove(self):
+        """Establish that the index can be kept up to date by hand."""
+        with client.test_mode as t:
+            index = self.build(t)
+        index.add({'id': 1, 'name': 'app', 'inventory': 5})
+        self.assertIsNone(index.lookup(name='web', inventory=5))
+        self.assertEqual(index.lookup(name='app', inventory=5)['id'], 1)
+        index.remove(1)
+        self.assertIsNone(index.lookup(name='app', inventory=5))
+        self.assertEqual([i['id'] for i in index.find(inventory=5)], [3])
+
+    def test_refresh(self):
+        """Establish that refreshing lists only the records modified since
+        the index was last brought up to date.
+        """
+        with client.test_mode as t:
+            index = self.build(t)
+            t.register_json('/hosts/?page=1&page_size=200&order_by=id&'
+                            'modified__gt=2015-01-03T00%3A00%3A00Z', {
+                                'count': 1, 'next': None, 'previous': None,
+                                'results': [{'id': 4, 'name': 'app',
+                                             'inventory': 5}],
+                            })
+            index.refresh()
+        self.assertEqual(index.lookup(name='app', inventory=5)['id'], 4)
@@ -0,0 +1,230 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import tempfile
+
+from click.testing import CliRunner
+
+import tower_cli
+from tower_cli import mirror
+from tower_cli.api import client
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest
+
+
+def host(pk, name, modified, inventory=5, enabled=True):
+    return {'id': pk, 'name': name, 'inventory': inventory,
+            'enabled': enabled, 'description': '', 'variables': '',
+            'modified': modified}
+
+
+HOSTS = [host(1, 'web1', '2015-01-01'), host(2, 'web2', '2015-01-02'),
+         host(3, 'db1', '2015-01-03', inventory=6)]
+
+
+def page(results, count=None):
+    return {'count': len(results) if count is None else count,
+            'next': None, 'previous': None, 'results': results}
+
+
+class MirrorTests(unittest.TestCase):
+    """A set of tests to establish that the mirror is synced and read in
+    the way that we expect.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        # The host is the one that test mode uses.
+        values = settings.runtime_values(cache_dir=self.dir,
+                                         host='20.12.4.21')
+        values.__enter__()
+        self.addCleanup(values.__exit__, None, None, None)
+        self.mirror = mirror.Mirror.get()
+
+    def sync(self):
+        with client.test_mode as t:
+            t.register_json('/hosts/?page_size=200&order_by=id&page=1',
+                            page(HOSTS))
+            self.mirror.sync('host')
+
+    def test_sync_full(self):
+        """Establish that the first sync loads every record."""
+        with client.test_mode as t:
+            t.register_json('/hosts/?page_size=200&order_by=id&page=1',
+                            page(HOSTS))
+            summary = self.mirror.sync('host')
+        self.assertEqual(summary['sync'], 'full')
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(len(t.requests), 1)
+
+    def test_sync_incremental(self):
+        """Establish that later syncs read only the records modified since,
+        and find the records deleted by comparing counts.
+        """
+        self.sync()
+        with client.test_mode as t:
+            t.register_json('/hosts/?page_size=200&order_by=id'
+                            '&modified__gt=2015-01-03&page=1',
+                            page([host(2, 'web2b', '2015-01-04')]))
+            t.register_json('/hosts/?id__gt=0&id__lte=3&page_size=1',
+                            page([], count=2))
+            t.register_json('/hosts/?id__in=1%2C2%2C3&page_size=200',
+                            page([HOSTS[0], HOSTS[2]]))
+            summary = self.mirror.sync('host')
+        self.assertEqual(summary['sync'], 'incremental')
+        self.assertEqual(summary['updated'], 1)
+        self.assertEqual(summary['deleted'], 1)
+        self.assertEqual(summary['count'], 2)
+
+    def test_sync_unchanged(self):
+        """Establish that a sync with nothing new makes one request for
+        the changes and one for the count.
+        """
+        self.sync()
+        with client.test_mode as t:
+            t.register_json('/hosts/?page_size=200&order_by=id'
+                            '&modified__gt=2015-01-03&page=1', page([]))
+            t.register_json('/hosts/?id__gt=0&id__lte=3&page_size=1',
+                            page([], count=3))
+            summary = self.mirror.sync('host')
+        self.assertEqual(summary['deleted'], 0)
+        self.assertEqual(len(t.requests), 2)
+
+    def test_query(self):
+        """Establish that SQL queries run against the mirrored tables."""
+        self.sync()
+        columns, rows = self.mirror.query(
+            'SELECT inventory, count(*) AS hosts FROM host '
+            'GROUP BY inventory ORDER BY inventory')
+        self.assertEqual(columns, ['inventory', 'hosts'])
+        self.assertEqual(rows, [(5, 2), (6, 1)])
+        with self.assertRaises(exc.UsageError):
+            self.mirror.query('SELECT nope FROM host')
+
+    def test_read(self):
+        """Establish that reads are answered from the mirror when it is
+        recent enough, and from Tower otherwise.
+        """
+        self.sync()
+        resource = tower_cli.get_resource('host')
+        with client.test_mode as t:
+            with settings.runtime_values(mirror_max_age=60):
+                answer = resource.list(inventory=5, name__startswith='web')
+                self.assertEqual(resource.get(3)['name'], 'db1')
+        self.assertEqual(len(t.requests), 0)
+        self.assertEqual([i['name'] for i in answer['results']],
+                         ['web1', 'web2'])
+
+        with client.test_mode as t:
+            t.register_json('/hosts/3/', HOSTS[2])
+            resource.get(3)
+        self.assertEqual(len(t.requests), 1)
+
+    def test_read_unsupported(self):
+        """Establish that reads with filters the mirror does not have are
+        left to Tower.
+        """
+        self.sync()
+        self.assertIsNone(self.mirror.read('host', None, {'search': 'web'}))
+        self.assertIsNone(self.mirror.read('host', None,
+                                           {'name__regex': 'w.*'}))
+        self.assertIsNone(self.mirror.read('group', None, {}))
+
+
+class OfflineTests(unittest.TestCase):
+    """A set of tests to establish that read commands are answered from
+    the mirror offline in the way that we expect.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        values = settings.runtime_values(cache_dir=self.dir,
+                                         host='20.12.4.21')
+        values.__enter__()
+        self.addCleanup(values.__exit__, None, None, None)
+        with client.test_mode as t:
+            t.register_json('/hosts/?page_size=200&order_by=id&page=1',
+                            page(HOSTS))
+            t.register_json('/jobs/?page_size=200&order_by=id&page=1',
+                            page([
+                                {'id': 42, 'status': 'successful',
+                                 'failed': False, 'elapsed': 12.5,
+                                 'modified': '2015-01-01'},
+                                {'id': 43, 'status': 'running',
+                                 'failed': False, 'elapsed': 0,
+                                 'modified': '2015-01-02'},
+                            ]))
+            t.register_json('/inventories/?page_size=200&order_by=id&page=1',
+                            page([{'id': 6, 'name': 'prod',
+                                   'organization': 1, 'description': '',
+                                   'modified': '2015-01-01'}]))
+            mirror.Mirror.get().sync('host')
+            mirror.Mirror.get().sync('inventory')
+            mirror.Mirror.get().sync('job')
+
+    def test_list_command(self):
+        """Establish that `list --offline` makes no requests, and notes
+        the age of the mirror.
+        """
+        res = tower_cli.get_resource('host')
+        with client.test_mode as t:
+            command = res.as_command().get_command(None, 'list')
+            result = CliRunner().invoke(command, ['--offline', '--inventory',
+                                                  '6', '--format', 'human'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(len(t.requests), 0)
+        self.assertIn('db1', result.output)
+        self.assertNotIn('web1', result.output)
+        self.assertIn('(Offline: from the mirror, synced 0s ago.)',
+                      result.output)
+
+    def test_related_by_name(self):
+        """Establish that related records given by name with `--offline`
+        are looked up in the mirror, rather than on Tower.
+        """
+        res = tower_cli.get_resource('host')
+        with client.test_mode as t:
+            command = res.as_command().get_command(None, 'list')
+            result = CliRunner().invoke(command, ['--offline', '--inventory',
+                                                  'prod', '--format', 'json'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(t.requests), 0)
+        self.assertIn('db1', result.output)
+        self.assertNotIn('web1', result.output)
+
+    def test_unanswerable(self):
+        """Establish that offline reads that the mirror cannot answer are
+        errors, rather than requests to Tower.
+        """
+        with settings.runtime_values(offline=True):
+            with self.assertRaises(exc.UsageError):
+                tower_cli.get_resource('group').list()
+            with self.assertRaises(exc.UsageError):
+                tower_cli.get_resource('host').list(query=[('search', 'w')])
+            with self.assertRaises(exc.NotFound):
+                tower_cli.get_resource('host').get(99)
+
+    def test_job_status(self):
+        """Establish that the status of finished jobs is answered offline,
+        and that of unfinished ones is not.
+        """
+        res = tower_cli.get_resource('job')
+        with settings.runtime_values(offline=True):
+            self.assertEqual(res.status(42)['status'], 'successful')
+            with self.assertRaises(exc.TowerCLIError):
+                res.status(43)
@@ -80,7 +80,8 @@ class ResourceMetaTests(unittest.TestCase):
 
         # Establish it has the commands we expect.
         self.assertEqual(set(MyResource.commands),
-                         set(['create', 'modify', 'list', 'get', 'delete']))
+                         set(['create', 'modify', 'list', 'get', 'delete',
+                              'bulk', 'export_table']))
 
     def test_subclassed_commands(self):
         """Establish that commands overridden in subclasses retain their
@@ -161,10 +162,15 @@ class SubcommandTests(unittest.TestCase):
 
     def test_list_commands(self):
         """Establish that the `list_commands` method for the command
-        corresponds to the commands available on the resource.
+        corresponds to the commands available on the resource, with the
+        words of their names joined by hyphens.
         """
-        self.assertEqual(set(self.resource.commands),
-                         set(self.command.list_commands(None)))
+        self.assertEqual(
+            set([i.replace('_', '-') for i in self.resource.commands]),
+            set(self.command.list_commands(None)),
+        )
+        self.assertIn('export-table', self.command.list_commands(None))
+        self.assertNotIn('export_table', self.command.list_commands(None))
 
     def test_get_command(self):
         """Establish that the `get_command` method returns the appropriate
@@ -842,6 +848,145 @@ class ResourceTests(unittest.TestCase):
                 self.res._lookup(name='bar', fail_on_found=True)
 
 
+    def test_resolve(self):
+        """Establish that many names are resolved with one request, and
+        that primary keys are passed through.
+        """
+        with client.test_mode as t:
+            t.register_json('/foo/?name__in=baz%2Cbar&page_size=100', {
+                'count': 2, 'next': None, 'previous': None, 'results': [
+                    {'id': 1, 'name': 'bar'}, {'id': 2, 'name': 'baz'},
+                ],
+            })
+            answer = self.res.resolve(['baz', '7', 'bar'])
+            self.assertEqual(list(answer.items()),
+                             [('baz', 2), ('7', 7), ('bar', 1)])
+            self.assertEqual(len(t.requests), 1)
+
+    def test_resolve_batches(self):
+        """Establish that names are looked up in batches of
+        `resolve_batch_size`.
+        """
+        self.res.resolve_batch_size = 2
+        with client.test_mode as t:
+            t.register_json('/foo/?name__in=a%2Cb&page_size=2', {
+                'count': 2, 'next': None, 'previous': None, 'results': [
+                    {'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'},
+                ],
+            })
+            t.register_json('/foo/?name__in=c&page_size=2', {
+                'count': 1, 'next': None, 'previous': None, 'results': [
+                    {'id': 3, 'name': 'c'},
+                ],
+            })
+            answer = self.res.resolve(['a', 'b', 'c'])
+            self.assertEqual(list(answer.values()), [1, 2, 3])
+            self.assertEqual(len(t.requests), 2)
+
+    def test_resolve_errors(self):
+        """Establish that every missing and ambiguous name is reported in
+        one error.
+        """
+        with client.test_mode as t:
+            t.register_json('/foo/?name__in=a%2Cb%2Cc&page_size=100', {
+                'count': 3, 'next': None, 'previous': None, 'results': [
+                    {'id': 1, 'name': 'a'}, {'id': 2, 'name': 'a'},
+                    {'id': 3, 'name': 'b'},
+                ],
+            })
+            with self.assertRaises(exc.MultipleRelatedError) as cm:
+                self.res.resolve(['a', 'b', 'c'])
+            self.assertIn('names: a.', cm.exception.message)
+            self.assertIn('named: c.', cm.exception.message)
+
+            t.register_json('/foo/?name__in=b%2Cc&page_size=100', {
+                'count': 1, 'next': None, 'previous': None, 'results': [
+                    {'id': 3, 'name': 'b'},
+                ],
+            })
+            with self.assertRaises(exc.RelatedError) as cm:
+                self.res.resolve(['b', 'c'])
+            self.assertEqual(cm.exception.message,
+                             'Could not get foo named: c.')
+
+    def test_resolve_scopes(self):
+        """Establish that names given with their scope are grouped and
+        looked up per scope.
+        """
+        self.res.identity = ('bar', 'name')
+        with client.test_mode as t:
+            t.register_json('/foo/?bar=1&name__in=x&page_size=100', {
+                'count': 1, 'next': None, 'previous': None, 'results': [
+                    {'id': 10, 'name': 'x'},
+                ],
+            })
+            t.register_json('/foo/?bar=2&name__in=x&page_size=100', {
+                'count': 1, 'next': None, 'previous': None, 'results': [
+                    {'id': 20, 'name': 'x'},
+                ],
+            })
+            answer = self.res.resolve([(1, 'x'), (2, 'x')])
+            self.assertEqual(answer[(1, 'x')], 10)
+            self.assertEqual(answer[(2, 'x')], 20)
+
+    def test_optimistic_create(self):
+        """Establish that in optimistic mode, a creation is posted without
+        looking for an existing record first.
+        """
+        with client.test_mode as t:
+            t.register_json('/foo/', {'id': 42, 'name': 'bar'},
+                            method='POST')
+            with settings.runtime_values(optimistic_writes=True):
+                result = self.res.create(name='bar')
+            self.assertTrue(result['changed'])
+            self.assertEqual(result['id'], 42)
+            self.assertEqual(len(t.requests), 1)
+
+    def test_optimistic_create_conflict(self):
+        """Establish that in optimistic mode, if the server reports that
+        the record already exists, it is looked up and compared as usual.
+        """
+        with client.test_mode as t:
+            t.register_json('/foo/', {
+                'name': ['Foo with this Name already exists.'],
+            }, method='POST', status_code=400)
+            t.register_json('/foo/?name=bar', {'count': 1, 'results': [
+                {'id': 42, 'name': 'bar'},
+            ], 'next': None, 'previous': None})
+            with settings.runtime_values(optimistic_writes=True):
+                result = self.res.create(name='bar')
+            self.assertFalse(result['changed'])
+            self.assertEqual(result['id'], 42)
+
+            with settings.runtime_values(optimistic_writes=True):
+                with self.assertRaises(exc.Found):
+                    self.res.create(name='bar', fail_on_found=True)
+
+    def test_optimistic_create_other_error(self):
+        """Establish that in optimistic mode, errors other than a conflict
+        are raised.
+        """
+        with client.test_mode as t:
+            t.register_json('/foo/', {'name': ['This field is invalid.']},
+                            method='POST', status_code=400)
+            with settings.runtime_values(optimistic_writes=True):
+                with self.assertRaises(exc.BadRequest):
+                    self.res.create(name='bar')
+
+    def test_optimistic_modify(self):
+        """Establish that in optimistic mode, a modification by primary key
+        is sent without reading the record first.
+        """
+        with client.test_mode as t:
+            t.register_json('/foo/42/', {'id': 42, 'name': 'bar',
+                                         'description': 'baz'},
+                            method='PATCH')
+            with settings.runtime_values(optimistic_writes=True):
+                result = self.res.modify(42, description='baz')
+            self.assertTrue(result['changed'])
+            self.assertEqual(result['description'], 'baz')
+            self.assertEqual(len(t.requests), 1)
+
 class MonitorableResourcesTests(unittest.TestCase):
     """Estblaish that the MonitorableResource abstract class works in the
     way that we expect.
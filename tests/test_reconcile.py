@@ -0,0 +1,295 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from six.moves import StringIO
+
+from tower_cli import reconcile
+from tower_cli.api import client
+from tower_cli.conf import settings
+
+from tests.compat import unittest
+
+
+GROUPS = {'count': 2, 'next': None, 'results': [
+    {'id': 10, 'name': 'web', 'inventory': 5, 'description': '',
+     'variables': ''},
+    {'id': 11, 'name': 'old', 'inventory': 5, 'description': '',
+     'variables': ''},
+]}
+HOSTS = {'count': 3, 'next': None, 'results': [
+    {'id': 1, 'name': 'web1', 'inventory': 5, 'enabled': True,
+     'description': '', 'variables': '{"port": 80}'},
+    {'id': 2, 'name': 'web2', 'inventory': 5, 'enabled': True,
+     'description': '', 'variables': ''},
+    {'id': 3, 'name': 'gone', 'inventory': 5, 'enabled': True,
+     'description': '', 'variables': ''},
+]}
+EMPTY = {'count': 0, 'next': None, 'results': []}
+
+
+def register_inventory(t):
+    """Register the groups, hosts and memberships of inventory 5."""
+    t.register_json('/groups/?inventory=5&page=1&page_size=200'
+                    '&order_by=id', GROUPS)
+    t.register_json('/hosts/?inventory=5&page=1&page_size=200'
+                    '&order_by=id', HOSTS)
+    t.register_json('/inventories/5/script/?all=1', {
+        'all': {'hosts': ['web2']},
+        'web': {'hosts': ['web1', 'gone'], 'children': [], 'vars': {}},
+        'old': {'hosts': [], 'children': [], 'vars': {}},
+        '_meta': {'hostvars': {}},
+    })
+
+
+class ReconcileTests(unittest.TestCase):
+    """A set of tests to establish that inventories are reconciled with a
+    source in the way that we expect.
+    """
+    def source(self, data, name='inventory.json'):
+        source = StringIO(data if isinstance(data, str) else
+                          json.dumps(data))
+        source.name = name
+        return source
+
+    def test_plan(self):
+        """Establish that the plan creates, updates, associates and
+        deletes what it should, and nothing else.
+        """
+        groups, hosts = reconcile.desired_inventory({
+            'groups': {'web': {}, 'db': {}},
+            'hosts': {
+                'web1': {'groups': ['web'], 'variables': {'port': 80}},
+                'web2': {'groups': ['web'], 'enabled': False},
+                'db1': {'groups': ['db']},
+            },
+        })
+        with client.test_mode as t:
+            register_inventory(t)
+            plan, targets = reconcile.plan_inventory(5, groups, hosts,
+                                                     workers=2)
+        self.assertEqual([str(i) for i in plan.steps], [
+            '+ create group db',
+            '~ update host web2 (enabled)',
+            '+ create host db1',
+            '> associate host web2 (in group web)',
+            '> associate host db1 (in group db)',
+            '- delete host gone',
+            '- delete group old',
+        ])
+
+    def test_dry_run(self):
+        """Establish that a dry run prints the plan, but writes nothing."""
+        outfile = StringIO()
+        with client.test_mode as t:
+            register_inventory(t)
+            with settings.runtime_values(format='human'):
+                summary = reconcile.reconcile_inventory(
+                    5, self.source({'hosts': {'web1': {'groups': ['web']}}}),
+                    dry_run=True, outfile=outfile)
+        self.assertEqual(set([i.method for i in t.requests]), set(['GET']))
+        self.assertEqual(summary['delete'], 3)
+        self.assertIn('- delete host web2', outfile.getvalue())
+
+    def test_plan_only_in_human_format(self):
+        """Establish that the plan is not printed in other formats, which
+        write only the summary.
+        """
+        outfile = StringIO()
+        with client.test_mode as t:
+            register_inventory(t)
+            reconcile.reconcile_inventory(
+                5, self.source({'hosts': {'web1': {'groups': ['web']}}}),
+                dry_run=True, outfile=outfile)
+        self.assertEqual(outfile.getvalue(), '')
+
+    def test_members_read_once(self):
+        """Establish that the memberships of all of the groups are read
+        with one request.
+        """
+        with client.test_mode as t:
+            register_inventory(t)
+            reconcile.plan_inventory(5, {}, {}, workers=2)
+        self.assertEqual(len(t.requests), 3)
+
+    def test_apply(self):
+        """Establish that the plan is carried out, with memberships made
+        using the IDs of the records just created.
+        """
+        outfile = StringIO()
+        with client.test_mode as t:
+            register_inventory(t)
+            t.register_json('/hosts/', {'id': 4, 'name': 'web3'},
+                            method='POST')
+            t.register_json('/groups/10/hosts/', {}, method='POST')
+            summary = reconcile.reconcile_inventory(
+                5, self.source('name,groups\nweb1,web\nweb3,web\n',
+                               name='hosts.csv'),
+                keep_extra=True, workers=2, outfile=outfile)
+        self.assertEqual(summary['create'], 1)
+        self.assertEqual(summary['associate'], 1)
+        self.assertEqual(summary['disassociate'], 0)
+        self.assertEqual(summary['failed'], 0)
+        self.assertEqual(json.loads(t.requests[-1].body),
+                         {'associate': True, 'id': 4})
+
+    def test_load_csv(self):
+        """Establish that hosts are read from CSV rows."""
+        groups, hosts = reconcile.desired_inventory(reconcile.load(
+            self.source('name,groups,enabled\nweb1,web;prod,yes\n,,\n',
+                        name='hosts.csv')))
+        self.assertEqual(list(groups.keys()), ['web', 'prod'])
+        self.assertEqual(hosts['web1'], {'groups': ['web', 'prod'],
+                                         'enabled': True})
+
+
+USERS = {'count': 2, 'next': None, 'results': [
+    {'id': 1, 'username': 'alice', 'email': 'alice@example.com',
+     'first_name': 'Alice', 'last_name': '', 'is_superuser': False},
+    {'id': 2, 'username': 'bob', 'email': 'bob@example.com',
+     'first_name': 'Bob', 'last_name': '', 'is_superuser': False},
+]}
+ORGANIZATIONS = {'count': 1, 'next': None, 'results': [
+    {'id': 1, 'name': 'Acme'},
+]}
+TEAMS = {'count': 2, 'next': None, 'results': [
+    {'id': 7, 'name': 'ops', 'organization': 1},
+    {'id': 8, 'name': 'dev', 'organization': 1},
+]}
+
+
+class UserSyncTests(unittest.TestCase):
+    """A set of tests to establish that users and their memberships are
+    synchronized with a source in the way that we expect.
+    """
+    def register_current(self, t):
+        for endpoint, payload in (('/users/', USERS),
+                                  ('/organizations/', ORGANIZATIONS),
+                                  ('/teams/', TEAMS)):
+            t.register_json(endpoint + '?page=1&page_size=200&order_by=id',
+                            payload)
+        t.register_json('/organizations/1/users/?page=1&page_size=200', {
+            'count': 2, 'next': None, 'results': [{'id': 1}, {'id': 2}],
+        })
+        t.register_json('/teams/7/users/?page=1&page_size=200', {
+            'count': 1, 'next': None, 'results': [{'id': 2}],
+        })
+        t.register_json('/teams/8/users/?page=1&page_size=200', EMPTY)
+
+    def source(self, text):
+        source = StringIO(text)
+        source.name = 'users.csv'
+        return source
+
+    def test_plan(self):
+        """Establish that only the differences are planned, and that a
+        user is removed only from the teams that the source names.
+        """
+        users = reconcile.desired_users(reconcile.load(self.source(
+            'username,email,first_name,organizations,teams\n'
+            'alice,alice@example.com,Alice,Acme,ops\n'
+            'bob,bob@example.com,Robert,Acme,dev\n'
+            'carol,carol@example.com,Carol,Acme,Acme/dev\n'
+            'dave,,,,nope\n'
+        )))
+        with client.test_mode as t:
+            self.register_current(t)
+            plan, targets, rows = reconcile.plan_users(users, workers=2)
+        self.assertEqual([str(i) for i in plan.steps], [
+            '~ update user bob (first_name)',
+            '+ create user carol',
+            '> associate user alice (in team ops)',
+            '< disassociate user bob (from team ops)',
+            '> associate user bob (in team dev)',
+            '> associate user carol (in organization Acme)',
+            '> associate user carol (in team Acme/dev)',
+        ])
+        self.assertEqual(rows[3].message, 'Could not find the team nope.')
+
+    def test_sync(self):
+        """Establish that the changes are made, and that the outcome of
+        each row is reported.
+        """
+        outfile = StringIO()
+        with client.test_mode as t:
+            self.register_current(t)
+            t.register_json('/users/', {'id': 3, 'username': 'carol'},
+                            method='POST')
+            t.register_json('/teams/7/users/', {}, method='POST')
+            with settings.runtime_values(format='human'):
+                summary = reconcile.sync_users(self.source(
+                    'username,email,organizations,teams\n'
+                    'alice,,Acme,ops\n'
+                    'bob,,Acme,ops\n'
+                    'carol,carol@example.com,,ops\n'
+                ), workers=2, outfile=outfile)
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(summary['modified'], 1)
+        self.assertEqual(summary['unchanged'], 1)
+        self.assertEqual(summary['failed'], 0)
+        self.assertIn('carol: created', outfile.getvalue())
+        bodies = [json.loads(i.body) for i in t.requests
+                  if i.url.endswith('/teams/7/users/')]
+        self.assertEqual(sorted([i['id'] for i in bodies]), [1, 3])
+
+    def test_dry_run(self):
+        """Establish that a dry run writes nothing, and that in formats
+        other than the human one, nothing but the summary is printed.
+        """
+        outfile = StringIO()
+        with client.test_mode as t:
+            self.register_current(t)
+            summary = reconcile.sync_users(self.source(
+                'username,teams\nalice,dev\n'), dry_run=True,
+                outfile=outfile)
+        self.assertEqual(set([i.method for i in t.requests]), set(['GET']))
+        self.assertEqual(summary['associate'], 1)
+        self.assertEqual(outfile.getvalue(), '')
+
+
+class CloneTests(unittest.TestCase):
+    """A set of tests to establish that inventories are cloned in the way
+    that we expect.
+    """
+    def test_clone(self):
+        """Establish that the groups, hosts and memberships of the source
+        are recreated in the new inventory.
+        """
+        with client.test_mode as t:
+            register_inventory(t)
+            t.register_json('/inventories/5/', {
+                'id': 5, 'name': 'prod', 'organization': 1,
+                'description': 'Production', 'variables': '',
+            })
+            t.register_json('/inventories/?name=copy', EMPTY)
+            t.register_json('/inventories/', {'id': 6, 'name': 'copy'},
+                            method='POST')
+            for endpoint in ('groups', 'hosts'):
+                t.register_json('/%s/?inventory=6&page=1&page_size=200'
+                                '&order_by=id' % endpoint, EMPTY)
+            t.register_json('/inventories/6/script/?all=1', {})
+            t.register_json('/groups/', {'id': 20}, method='POST')
+            t.register_json('/hosts/', {'id': 30}, method='POST')
+            t.register_json('/groups/20/hosts/', {}, method='POST')
+            answer = reconcile.clone_inventory(5, 'copy', workers=2,
+                                               outfile=StringIO())
+        self.assertEqual(answer['id'], 6)
+        posts = [(i.url, json.loads(i.body)) for i in t.requests
+                 if i.method == 'POST']
+        self.assertEqual(len([i for i in posts if i[0].endswith('/hosts/')
+                              and 'name' in i[1]]), 3)
+        self.assertEqual(len([i for i in posts
+                              if i[0].endswith('/groups/20/hosts/')]), 2)
@@ -15,8 +15,11 @@
 
 import json
 
+from six.moves import StringIO
+
 import tower_cli
 from tower_cli.api import client
+from tower_cli.utils import exceptions as exc
 
 from tests.compat import unittest, mock
 
@@ -52,3 +55,56 @@ class HostTests(unittest.TestCase):
             self.host_resource.disassociate(42, 84)
             self.assertEqual(t.requests[1].body,
                              json.dumps({'disassociate': True, 'id': 84}))
+
+    def test_associate_host_file(self):
+        """Establish that associating hosts from a file reads the group's
+        hosts once, and associates only those not already in it.
+        """
+        with client.test_mode as t:
+            t.register_json('/groups/84/', {'id': 84, 'inventory': 5})
+            t.register_json('/hosts/?inventory=5&name__in=web1%2Cweb2&'
+                            'page_size=100', {
+                                'count': 2, 'next': None, 'previous': None,
+                                'results': [{'id': 1, 'name': 'web1'},
+                                            {'id': 2, 'name': 'web2'}],
+                            })
+            t.register_json('/groups/84/hosts/?page=1&page_size=200', {
+                'count': 2, 'next': None, 'previous': None,
+                'results': [{'id': 1}, {'id': 9}],
+            })
+            t.register_json('/groups/84/hosts/', {}, method='POST')
+            result = self.host_resource.associate(
+                group=84, host_file=StringIO('web1\n\n# Comment\nweb2\n3\n'))
+            self.assertEqual(result, {'changed': True, 'count': 2})
+            bodies = sorted([json.loads(i.body) for i in t.requests
+                             if i.method == 'POST'], key=lambda i: i['id'])
+            self.assertEqual(bodies, [{'associate': True, 'id': 2},
+                                      {'associate': True, 'id': 3}])
+
+    def test_disassociate_host_file(self):
+        """Establish that disassociating hosts from a file only sends
+        requests for hosts in the group.
+        """
+        with client.test_mode as t:
+            t.register_json('/groups/84/', {'id': 84, 'inventory': 5})
+            t.register_json('/groups/84/hosts/?page=1&page_size=200', {
+                'count': 1, 'next': None, 'previous': None,
+                'results': [{'id': 1}],
+            })
+            t.register_json('/groups/84/hosts/', {}, method='POST')
+            result = self.host_resource.disassociate(
+                group=84, host_file=StringIO('1\n2\n'))
+            self.assertEqual(result, {'changed': True, 'count': 1})
+            self.assertEqual(t.requests[-1].body,
+                             json.dumps({'disassociate': True, 'id': 1}))
+
+    def test_host_and_host_file(self):
+        """Establish that a host and a file of hosts cannot both be given,
+        and that nothing is sent if they are.
+        """
+        with client.test_mode as t:
+            for method in (self.host_resource.associate,
+                           self.host_resource.disassociate):
+                with self.assertRaises(exc.UsageError):
+                    method(host=1, group=84, host_file=StringIO('web1\n'))
+            self.assertEqual(len(t.requests), 0)
@@ -406,3 +406,195 @@ class CancelTests(unittest.TestCase):
             t.register('/jobs/42/cancel/', '', method='POST', status_code=405)
             with self.assertRaises(exc.TowerCLIError):
                 result = self.res.cancel(42, fail_if_not_running=True)
+
+
+class ShardTests(unittest.TestCase):
+    """A set of tests to establish that sharded launches work in the way
+    that we expect.
+    """
+    def setUp(self):
+        self.res = tower_cli.get_resource('job')
+
+    def register_template(self, t, limit='', ask_limit=True, ignored=None):
+        t.register_json('/job_templates/1/', {
+            'id': 1, 'name': 'frobnicate', 'inventory': 5, 'limit': limit,
+            'ask_limit_on_launch': ask_limit,
+            'related': {'launch': '/job_templates/1/launch/'},
+        })
+        t.register_json('/job_templates/1/launch/', {}, method='GET')
+        t.register_json('/job_templates/1/launch/', {
+            'job': 42, 'ignored_fields': ignored or {},
+        }, method='POST')
+
+    def launched_limits(self, t):
+        return sorted([json.loads(i.body)['limit'] for i in t.requests
+                       if i.method == 'POST'])
+
+    def test_shards(self):
+        """Establish that the hosts are split into even slices, given as
+        subscripts, within the template's own limit.
+        """
+        with client.test_mode as t:
+            self.register_template(t, limit='web')
+            t.register_json('/hosts/?inventory=5&enabled=True&page_size=1',
+                            {'count': 10, 'next': None, 'results': []})
+            result = self.res.launch(1, shards=3)
+        self.assertEqual(self.launched_limits(t), [
+            'all[0:3]:&web', 'all[4:7]:&web', 'all[8:9]:&web',
+        ])
+        self.assertEqual([i['shard'] for i in result['shards']], [1, 2, 3])
+
+    def test_shards_within_limit(self):
+        """Establish that a limit given at launch is intersected with each
+        slice, as is each term of the template's limit.
+        """
+        with client.test_mode as t:
+            self.register_template(t, limit='web:!web3')
+            t.register_json('/hosts/?inventory=5&enabled=True&page_size=1',
+                            {'count': 4, 'next': None, 'results': []})
+            self.res.launch(1, shards=2, limit='prod')
+        self.assertEqual(self.launched_limits(t), [
+            'all[0:1]:&web:!web3:&prod', 'all[2:3]:&web:!web3:&prod',
+        ])
+
+    def test_shards_union_limit(self):
+        """Establish that a limit naming several patterns is refused,
+        rather than giving every shard all of the hosts of the others.
+        """
+        with client.test_mode as t:
+            self.register_template(t, limit='web,db')
+            t.register_json('/hosts/?inventory=5&enabled=True&page_size=1',
+                            {'count': 4, 'next': None, 'results': []})
+            with self.assertRaises(exc.UsageError):
+                self.res.launch(1, shards=2)
+        self.assertEqual(self.launched_limits(t), [])
+
+    def test_shards_need_limit_prompt(self):
+        """Establish that shards are refused if the template does not
+        prompt for a limit, since Tower would run each on every host.
+        """
+        with client.test_mode as t:
+            self.register_template(t, ask_limit=False)
+            with self.assertRaises(exc.UsageError):
+                self.res.launch(1, shards=2)
+        self.assertEqual(self.launched_limits(t), [])
+
+    def test_limit_ignored(self):
+        """Establish that a limit that Tower reports it ignored is an
+        error.
+        """
+        with client.test_mode as t:
+            self.register_template(t, ignored={'limit': 'web'})
+            with self.assertRaises(exc.TowerCLIError):
+                self.res.launch(1, limit='web')
+
+    def test_shard_by_group(self):
+        """Establish that a job is launched for each top-level group."""
+        with client.test_mode as t:
+            self.register_template(t)
+            t.register_json('/inventories/5/root_groups/?page=1', {
+                'count': 2, 'next': None,
+                'results': [{'id': 1, 'name': 'web'},
+                            {'id': 2, 'name': 'db'}],
+            })
+            self.res.launch(1, shard_by='group')
+        self.assertEqual(self.launched_limits(t), ['db', 'web'])
+
+    def test_monitor(self):
+        """Establish that monitored shards are waited for, and that their
+        failed hosts are merged.
+        """
+        with client.test_mode as t:
+            self.register_template(t)
+            t.register_json('/hosts/?inventory=5&enabled=True&page_size=1',
+                            {'count': 2, 'next': None, 'results': []})
+            t.register_json('/jobs/42/', {'status': 'failed', 'failed': True,
+                                          'elapsed': 3.0})
+            t.register_json('/jobs/42/job_host_summaries/?page=1', {
+                'count': 2, 'next': None, 'results': [
+                    {'host': 1, 'failures': 0, 'dark': 1,
+                     'summary_fields': {'host': {'name': 'web1'}}},
+                    {'host': 2, 'failures': 0, 'dark': 0,
+                     'summary_fields': {'host': {'name': 'web2'}}},
+                ],
+            })
+            outfile = StringIO()
+            with self.assertRaises(exc.JobFailure):
+                self.res.launch(1, shards=2, monitor=True, outfile=outfile)
+        result = json.loads(outfile.getvalue())
+        self.assertEqual(result['failed_hosts'], ['web1'])
+        self.assertEqual([i['status'] for i in result['shards']],
+                         ['failed', 'failed'])
+
+
+class RelaunchFailedTests(unittest.TestCase):
+    """A set of tests to establish that the failed hosts of a job are
+    launched again in the way that we expect.
+    """
+    def setUp(self):
+        self.res = tower_cli.get_resource('job')
+
+    def register_job(self, t, status='failed', ask_limit=True):
+        t.register_json('/jobs/42/', {
+            'id': 42, 'status': status, 'failed': status == 'failed',
+            'elapsed': 3.0, 'job_template': 1, 'job_tags': 'deploy',
+            'extra_vars': '{"version": 2}',
+        })
+        t.register_json('/jobs/42/job_host_summaries/?page=1', {
+            'count': 3, 'next': None, 'results': [
+                {'host': 1, 'failures': 2, 'dark': 0,
+                 'summary_fields': {'host': {'name': 'web1'}}},
+                {'host': 2, 'failures': 0, 'dark': 0,
+                 'summary_fields': {'host': {'name': 'web2'}}},
+                {'host': 3, 'failures': 0, 'dark': 1,
+                 'summary_fields': {'host': {'name': 'web3'}}},
+            ],
+        })
+        t.register_json('/job_templates/1/', {
+            'id': 1, 'name': 'frobnicate', 'inventory': 5,
+            'ask_limit_on_launch': ask_limit,
+            'related': {'launch': '/job_templates/1/launch/'},
+        })
+        t.register_json('/job_templates/1/launch/', {}, method='GET')
+        t.register_json('/job_templates/1/launch/', {'job': 43},
+                        method='POST')
+
+    def test_relaunch(self):
+        """Establish that the failed and unreachable hosts are launched
+        again, with the same extra variables and tags.
+        """
+        with client.test_mode as t:
+            self.register_job(t)
+            result = self.res.relaunch_failed(42)
+        self.assertEqual(result['hosts'], ['web1', 'web3'])
+        self.assertEqual(result['jobs'], [{'id': 43, 'hosts': 2}])
+        body = json.loads(t.requests[-1].body)
+        self.assertEqual(body, {'limit': 'web1,web3', 'job_tags': 'deploy',
+                                'extra_vars': '{"version": 2}'})
+
+    def test_needs_limit_prompt(self):
+        """Establish that nothing is launched if the job template does not
+        prompt for a limit, since Tower would run it on every host.
+        """
+        with client.test_mode as t:
+            self.register_job(t, ask_limit=False)
+            with self.assertRaises(exc.UsageError):
+                self.res.relaunch_failed(42)
+        self.assertEqual([i.method for i in t.requests
+                          if i.method == 'POST'], [])
+
+    def test_unfinished(self):
+        """Establish that a job that has not finished is refused."""
+        with client.test_mode as t:
+            self.register_job(t, status='running')
+            with self.assertRaises(exc.UsageError):
+                self.res.relaunch_failed(42)
+
+    def test_limits(self):
+        """Establish that hosts are split across limits that are not too
+        long.
+        """
+        with mock.patch.object(type(self.res), 'limit_max_length', 11):
+            self.assertEqual(self.res.limits(['web1', 'web2', 'web3',
+                                              'database01']),
+                             ['web1,web2', 'web3', 'database01'])
@@ -0,0 +1,61 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import tower_cli
+from tower_cli.api import client
+
+from tests.compat import unittest
+
+
+class CopyTests(unittest.TestCase):
+    """A set of tests for ensuring that the job template resource's copy
+    command works in the way we expect.
+    """
+    def setUp(self):
+        self.res = tower_cli.get_resource('job_template')
+
+    def test_copy(self):
+        """Establish that a job template is copied with its fields and its
+        survey, under the new name.
+        """
+        survey = {'name': '', 'description': '', 'spec': [
+            {'variable': 'version', 'type': 'text'},
+        ]}
+        with client.test_mode as t:
+            t.register_json('/job_templates/4/', {
+                'id': 4, 'name': 'deploy', 'job_type': 'run',
+                'inventory': 5, 'project': 6, 'playbook': 'site.yml',
+                'credential': 7, 'cloud_credential': None,
+                'survey_enabled': True, 'related': {},
+            })
+            t.register_json('/job_templates/4/survey_spec/', survey)
+            t.register_json('/job_templates/?name=deploy-copy',
+                            {'count': 0, 'results': []})
+            t.register_json('/job_templates/', {'id': 8, 'changed': True},
+                            method='POST')
+            t.register_json('/job_templates/8/survey_spec/', {},
+                            method='POST')
+            answer = self.res.copy(4, name='deploy-copy')
+        self.assertEqual(answer['id'], 8)
+        posts = [json.loads(i.body) for i in t.requests
+                 if i.method == 'POST']
+        self.assertEqual(posts[0], {
+            'name': 'deploy-copy', 'job_type': 'run', 'inventory': 5,
+            'project': 6, 'playbook': 'site.yml', 'credential': 7,
+            'survey_enabled': True,
+        })
+        self.assertEqual(posts[1], survey)
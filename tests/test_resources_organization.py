@@ -15,8 +15,11 @@
 
 import json
 
+from six.moves import StringIO
+
 import tower_cli
 from tower_cli.api import client
+from tower_cli.utils import exceptions as exc
 
 from tests.compat import unittest, mock
 
@@ -75,3 +78,13 @@ class OrganizationTests(unittest.TestCase):
             self.org_resource.disassociate_project(42, 84)
             self.assertEqual(t.requests[1].body,
                              json.dumps({'disassociate': True, 'id': 84}))
+
+    def test_user_and_user_file(self):
+        """Establish that a user and a file of users cannot both be given."""
+        with client.test_mode as t:
+            for method in (self.org_resource.associate,
+                           self.org_resource.disassociate):
+                with self.assertRaises(exc.UsageError):
+                    method(organization=42, user=7,
+                           user_file=StringIO('bob\n'))
+            self.assertEqual(len(t.requests), 0)
@@ -15,8 +15,11 @@
 
 import json
 
+from six.moves import StringIO
+
 import tower_cli
 from tower_cli.api import client
+from tower_cli.utils import exceptions as exc
 
 from tests.compat import unittest, mock
 
@@ -52,3 +55,35 @@ class TeamTests(unittest.TestCase):
             self.team_resource.disassociate(42, 84)
             self.assertEqual(t.requests[1].body,
                              json.dumps({'disassociate': True, 'id': 84}))
+
+    def test_associate_user_file(self):
+        """Establish that associating users from a file sends nothing for
+        users already on the team.
+        """
+        with client.test_mode as t:
+            t.register_json('/users/?username__in=bob&page_size=100', {
+                'count': 1, 'next': None, 'previous': None,
+                'results': [{'id': 7, 'username': 'bob'}],
+            })
+            t.register_json('/teams/42/users/?page=1&page_size=200', {
+                'count': 1, 'next': None, 'previous': None,
+                'results': [{'id': 7}],
+            })
+            result = self.team_resource.associate(
+                team=42, user_file=StringIO('bob\n'))
+            self.assertEqual(result, {'changed': False, 'count': 0})
+            self.assertEqual(len(t.requests), 2)
+
+    def test_user_file_requires_team(self):
+        """Establish that a team is required with a file of users."""
+        with self.assertRaises(exc.UsageError):
+            self.team_resource.associate(user_file=StringIO('bob\n'))
+
+    def test_user_and_user_file(self):
+        """Establish that a user and a file of users cannot both be given."""
+        with client.test_mode as t:
+            for method in (self.team_resource.associate,
+                           self.team_resource.disassociate):
+                with self.assertRaises(exc.UsageError):
+                    method(team=42, user=7, user_file=StringIO('bob\n'))
+            self.assertEqual(len(t.requests), 0)
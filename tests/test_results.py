@@ -0,0 +1,116 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import tempfile
+
+import tower_cli
+from tower_cli import results
+from tower_cli.api import client
+from tower_cli.conf import settings
+
+from tests.compat import unittest
+
+
+def job(pk, status):
+    return {'id': pk, 'status': status, 'failed': status == 'failed',
+            'elapsed': 1.5}
+
+
+class ResultCacheTests(unittest.TestCase):
+    """A set of tests to establish that the records of finished tasks are
+    cached in the way that we expect.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.job = tower_cli.get_resource('job')
+
+    def cached(self, size=10):
+        """Turn the cache on, in a temporary directory."""
+        return settings.runtime_values(cache_dir=self.dir,
+                                       result_cache_size=size)
+
+    def test_finished_job(self):
+        """Establish that a finished job is read from Tower only once."""
+        with client.test_mode as t:
+            t.register_json('/jobs/42/', job(42, 'successful'))
+            with self.cached():
+                self.job.status(42)
+                answer = self.job.status(42, detail=True)
+        self.assertEqual(len(t.requests), 1)
+        self.assertEqual(answer['status'], 'successful')
+
+    def test_running_job(self):
+        """Establish that a job that has not finished is not cached."""
+        with client.test_mode as t:
+            t.register_json('/jobs/42/', job(42, 'running'))
+            with self.cached():
+                self.job.status(42)
+                self.job.status(42)
+        self.assertEqual(len(t.requests), 2)
+
+    def test_eviction(self):
+        """Establish that the least recently used records are forgotten
+        once the cache is full.
+        """
+        with client.test_mode as t:
+            for pk in (1, 2, 3):
+                t.register_json('/jobs/%d/' % pk, job(pk, 'failed'))
+            with self.cached(size=2):
+                for pk in (1, 2, 1, 3, 1, 2):
+                    self.job.status(pk)
+                cache = results.ResultCache.get_cache()
+                self.assertEqual(len(cache), 2)
+        self.assertEqual([i.url.split('/')[-2] for i in t.requests],
+                         ['1', '2', '3', '2'])
+
+    def test_project_status(self):
+        """Establish that the last update of a project is cached, but the
+        project itself is not.
+        """
+        with client.test_mode as t:
+            t.register_json('/projects/1/', {'related': {
+                'last_update': '/api/v1/project_updates/7/',
+            }})
+            t.register_json('/project_updates/7/', job(7, 'successful'))
+            with self.cached():
+                project = tower_cli.get_resource('project')
+                project.status(1)
+                project.status(1)
+        self.assertEqual([i.url.split('/v1')[-1] for i in t.requests],
+                         ['/projects/1/', '/project_updates/7/',
+                          '/projects/1/'])
+
+    def test_host_summaries(self):
+        """Establish that every page of the host summaries of a finished
+        job is read, and then cached.
+        """
+        with client.test_mode as t:
+            t.register_json('/jobs/42/', job(42, 'failed'))
+            t.register_json('/jobs/42/job_host_summaries/?page=1', {
+                'count': 2, 'next': '/api/v1/jobs/42/job_host_summaries/'
+                                    '?page=2',
+                'results': [{'host': 1, 'failures': 0}],
+            })
+            t.register_json('/jobs/42/job_host_summaries/?page=2', {
+                'count': 2, 'next': None,
+                'results': [{'host': 2, 'failures': 3}],
+            })
+            with self.cached():
+                self.job.host_summaries(42)
+                answer = self.job.host_summaries(42)
+        self.assertEqual(len(t.requests), 3)
+        self.assertEqual([i['host'] for i in answer], [1, 2])
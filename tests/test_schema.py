@@ -0,0 +1,131 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import tempfile
+
+from tower_cli import schema
+from tower_cli.api import client
+from tower_cli.conf import settings
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest
+
+
+FIELDS = {'actions': {'POST': {
+    'name': {'type': 'string', 'required': True},
+    'kind': {'type': 'choice', 'required': False, 'choices': [
+        {'value': 'ssh', 'display_name': 'Machine'},
+        {'value': 'aws', 'display_name': 'Amazon Web Services'},
+    ]},
+    'id': {'type': 'integer', 'required': True, 'read_only': True},
+}}}
+
+
+class SchemaTests(unittest.TestCase):
+    """A set of tests to establish that the API schema is fetched, cached
+    and used in the way that we expect.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        schema.Schema._schemas.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        schema.Schema._schemas.clear()
+
+    def run_with_schema(self, func, *args, **kwargs):
+        """Call `func` in test mode with the schema turned on, serving the
+        version and the OPTIONS metadata above, and return the faux
+        adapter.
+        """
+        with client.test_mode as t:
+            t.register_json('/config/', {'version': '2.1.4'})
+            t.register_json('/credentials/', FIELDS, method='OPTIONS')
+            with settings.runtime_values(schema=True, cache_dir=self.dir):
+                func(*args, **kwargs)
+            return t
+
+    def test_version(self):
+        """Establish that the Tower version is parsed, and fetched only
+        once.
+        """
+        def check():
+            self.assertEqual(schema.tower_version(), (2, 1, 4))
+            self.assertEqual(schema.tower_version(), (2, 1, 4))
+        t = self.run_with_schema(check)
+        self.assertEqual(len(t.requests), 1)
+
+    def test_disk_cache(self):
+        """Establish that the schema is reused from disk by a new process
+        (simulated by clearing the in-memory schemas).
+        """
+        self.run_with_schema(schema.validate, '/credentials/', {'name': 'x'})
+        schema.Schema._schemas.clear()
+        t = self.run_with_schema(schema.validate, '/credentials/',
+                                 {'name': 'x'})
+        self.assertEqual(len(t.requests), 0)
+
+    def test_version_change_discards_metadata(self):
+        """Establish that metadata cached for an older version of Tower is
+        not used.
+        """
+        self.run_with_schema(schema.validate, '/credentials/', {'name': 'x'})
+        schema.Schema._schemas.clear()
+        with client.test_mode as t:
+            t.register_json('/config/', {'version': '2.2.0'})
+            t.register_json('/credentials/', {}, method='OPTIONS')
+            with settings.runtime_values(schema=True, cache_dir=self.dir,
+                                         schema_ttl=0):
+                schema.validate('/credentials/', {'bogus': 'x'})
+        self.assertEqual(len(t.requests), 2)
+
+    def test_validation_errors(self):
+        """Establish that unknown fields, bad choices, and missing required
+        fields are all reported together, before any write is sent.
+        """
+        with self.assertRaises(exc.ValidationError) as cm:
+            self.run_with_schema(schema.validate, '/credentials/',
+                                 {'bogus': 1, 'kind': 'gce'}, create=True)
+        message = cm.exception.message
+        self.assertIn('Unknown field "bogus"', message)
+        self.assertIn('Invalid value for "kind"', message)
+        self.assertIn('Missing required field "name"', message)
+        self.assertNotIn('"id"', message)
+
+    def test_valid_data(self):
+        """Establish that valid data passes validation."""
+        self.run_with_schema(schema.validate, '/credentials/',
+                             {'name': 'x', 'kind': 'ssh'}, create=True)
+
+    def test_write_validates(self):
+        """Establish that a write with an invalid choice fails without
+        sending anything to the endpoint.
+        """
+        from tower_cli import get_resource
+        credential = get_resource('credential')
+        with self.assertRaises(exc.ValidationError):
+            self.run_with_schema(credential.create, name='x', user=1,
+                                 kind='gce')
+
+    def test_no_metadata(self):
+        """Establish that nothing is validated if Tower provides no
+        metadata for an endpoint.
+        """
+        with client.test_mode as t:
+            t.register_json('/config/', {'version': '2.1.4'})
+            t.register_json('/credentials/', {}, method='OPTIONS')
+            with settings.runtime_values(schema=True, cache_dir=self.dir):
+                schema.validate('/credentials/', {'bogus': 'x'})
@@ -0,0 +1,133 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import random
+from datetime import datetime
+
+from click.testing import CliRunner
+
+import tower_cli
+from tower_cli import stats
+from tower_cli.api import client
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest
+
+
+def job(pk, name, finished, elapsed, failed=False):
+    return {'id': pk, 'name': name, 'failed': failed, 'elapsed': elapsed,
+            'status': 'failed' if failed else 'successful',
+            'started': finished, 'finished': finished}
+
+
+JOBS = [
+    job(1, 'deploy', '2016-01-01T09:10:00Z', 60.0),
+    job(2, 'deploy', '2016-01-01T09:40:00Z', 90.0, failed=True),
+    job(3, 'backup', '2016-01-02T02:00:00Z', 600.0),
+    job(4, 'deploy', '2016-01-02T10:00:00Z', 30.0),
+]
+URL = '/jobs/?page=%d&finished__gte=2016-01-01&order_by=id&page_size=200'
+
+
+class QuantileTests(unittest.TestCase):
+    """A set of tests to establish that quantiles are estimated in the
+    way that we expect.
+    """
+    def test_small(self):
+        """Establish that quantiles of a few numbers are exact."""
+        quantile = stats.Quantile(0.5)
+        self.assertIsNone(quantile.value())
+        for x in (5, 1, 3):
+            quantile.add(x)
+        self.assertEqual(quantile.value(), 3)
+
+    def test_stream(self):
+        """Establish that quantiles of many numbers are close to the
+        true ones.
+        """
+        generator = random.Random(7)
+        numbers = [generator.uniform(0, 1000) for i in range(5000)]
+        for p in (0.5, 0.95):
+            quantile = stats.Quantile(p)
+            for x in numbers:
+                quantile.add(x)
+            exact = sorted(numbers)[int(p * len(numbers))]
+            self.assertAlmostEqual(quantile.value(), exact, delta=15)
+
+
+class ReportTests(unittest.TestCase):
+    """A set of tests to establish that job reports are gathered in the
+    way that we expect.
+    """
+    def test_parse_since(self):
+        """Establish that ages and dates are both understood."""
+        now = datetime(2016, 1, 31, 12, 0, 0)
+        self.assertEqual(stats.parse_since('30d', now=now),
+                         '2016-01-01T12:00:00Z')
+        self.assertEqual(stats.parse_since('2h', now=now),
+                         '2016-01-31T10:00:00Z')
+        self.assertEqual(stats.parse_since('2016-01-02'), '2016-01-02')
+        with self.assertRaises(exc.UsageError):
+            stats.parse_since('last week')
+
+    def test_report(self):
+        """Establish that every page of jobs is read, and summarized by
+        template, day and hour.
+        """
+        with client.test_mode as t:
+            t.register_json(URL % 1, {'count': 4, 'next': '/api/v1/jobs/'
+                                      '?page=2', 'results': JOBS[:2]})
+            t.register_json(URL % 2, {'count': 4, 'next': None,
+                                      'results': JOBS[2:]})
+            report = stats.job_report('2016-01-01')
+        self.assertEqual(report['totals']['jobs'], 4)
+        self.assertEqual(report['totals']['failure_rate'], 25.0)
+        self.assertEqual(report['templates'][0], {
+            'template': 'deploy', 'jobs': 3, 'failed': 1,
+            'failure_rate': 33.3, 'p50': 60.0, 'p95': 90.0,
+        })
+        self.assertEqual([i['day'] for i in report['days']],
+                         ['2016-01-01', '2016-01-02'])
+        self.assertEqual([(i['hour'], i['jobs']) for i in report['hours']],
+                         [(2, 1), (9, 2), (10, 1)])
+
+    def test_template(self):
+        """Establish that the job template filter is sent to Tower."""
+        with client.test_mode as t:
+            t.register_json('/jobs/?page=1&finished__gte=2016-01-01'
+                            '&job_template=3&order_by=id&page_size=200',
+                            {'count': 0, 'next': None, 'results': []})
+            report = stats.job_report('2016-01-01', job_template=3)
+        self.assertEqual(report['totals']['jobs'], 0)
+        self.assertEqual(report['templates'], [])
+
+    def test_command(self):
+        """Establish that `job report` prints tables for humans, and the
+        whole report as JSON.
+        """
+        command = tower_cli.get_resource('job').as_command().get_command(
+            None, 'report')
+        with client.test_mode as t:
+            t.register_json(URL % 1, {'count': 4, 'next': None,
+                                      'results': JOBS})
+            human = CliRunner().invoke(command, ['--since', '2016-01-01',
+                                                 '--format', 'human'])
+            machine = CliRunner().invoke(command, ['--since', '2016-01-01'])
+        self.assertEqual(human.exit_code, 0)
+        self.assertIn('Job templates', human.output)
+        self.assertIn('backup', human.output)
+        self.assertIn('Totals', human.output)
+        self.assertEqual(json.loads(machine.output)['totals']['jobs'], 4)
@@ -0,0 +1,127 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+
+from click.testing import CliRunner
+
+import tower_cli
+from tower_cli import tables
+from tower_cli.api import client
+from tower_cli.utils import exceptions as exc
+
+from tests.compat import unittest, mock
+
+
+HOSTS = [
+    {'id': 1, 'name': 'web1', 'description': '', 'inventory': 5,
+     'enabled': True, 'variables': '',
+     'summary_fields': {'inventory': {'name': 'prod'}}},
+    {'id': 2, 'name': 'web2', 'description': 'a, b', 'inventory': 5,
+     'enabled': False, 'variables': '',
+     'summary_fields': {'inventory': {'name': 'prod'}}},
+]
+URL = '/hosts/?page=%d&page_size=200&order_by=id'
+
+
+class TableTests(unittest.TestCase):
+    """A set of tests to establish that tables of records are written in
+    the way that we expect.
+    """
+    def register(self, t):
+        t.register_json(URL % 1, {'count': 2, 'next': '/api/v1/hosts/'
+                                  '?page=2', 'results': HOSTS[:1]})
+        t.register_json(URL % 2, {'count': 2, 'next': None,
+                                  'results': HOSTS[1:]})
+
+    def test_csv(self):
+        """Establish that every page is written, with a column for each
+        field and for the name of each related record.
+        """
+        output = io.BytesIO()
+        with client.test_mode as t:
+            self.register(t)
+            count = tables.export_table(tower_cli.get_resource('host'),
+                                        output)
+        self.assertEqual(count, 2)
+        self.assertEqual(output.getvalue().decode('utf8').splitlines(), [
+            'id,name,description,inventory,enabled,variables,'
+            'inventory_name',
+            '1,web1,,5,true,,prod',
+            '2,web2,"a, b",5,false,,prod',
+        ])
+
+    def test_tsv_summary_fields(self):
+        """Establish that TSV is written with the chosen summary fields."""
+        output = io.BytesIO()
+        with client.test_mode as t:
+            self.register(t)
+            tables.export_table(tower_cli.get_resource('host'), output,
+                                table_format='tsv',
+                                summary_fields=['inventory.kind'])
+        lines = output.getvalue().decode('utf8').splitlines()
+        self.assertTrue(lines[0].endswith('\tvariables\tinventory_kind'))
+        self.assertEqual(lines[2], '2\tweb2\ta, b\t5\tfalse\t\t')
+
+    def test_inferred_columns(self):
+        """Establish that the columns of a resource with no fields are
+        those of its records.
+        """
+        sample = {'id': 42, 'status': 'failed', 'elapsed': 1.5,
+                  'failed': True, 'related': {},
+                  'summary_fields': {'job_template': {'name': 'deploy'}}}
+        answer = tables.columns(tower_cli.get_resource('job'),
+                                summary_fields=['job_template.name'],
+                                sample=sample)
+        self.assertEqual(sorted([(i.name, i.type) for i in answer]), [
+            ('elapsed', 'float'), ('failed', 'boolean'), ('id', 'integer'),
+            ('job_template_name', 'string'), ('status', 'string'),
+        ])
+        with self.assertRaises(exc.UsageError):
+            tables.columns(tower_cli.get_resource('job'),
+                           summary_fields=['job_template'])
+
+    def test_command(self):
+        """Establish that `export-table` writes the table to standard
+        output, and nothing else.
+        """
+        command = tower_cli.get_resource('host').as_command().get_command(
+            None, 'export-table')
+        with client.test_mode as t:
+            t.register_json('/hosts/?inventory=5&page=1&page_size=200'
+                            '&order_by=id',
+                            {'count': 2, 'next': None, 'results': HOSTS})
+            result = CliRunner().invoke(command, ['--inventory', '5'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('2,web2,"a, b",5,false,,prod', result.output)
+
+    def test_parquet_requires_pyarrow(self):
+        """Establish that Parquet tables need pyarrow."""
+        with mock.patch.object(tables, 'pyarrow', None):
+            with self.assertRaises(exc.TowerCLIError):
+                tables.ParquetWriter(io.BytesIO(), [])
+
+    @unittest.skipIf(tables.pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        """Establish that Parquet tables have typed columns."""
+        output = io.BytesIO()
+        with client.test_mode as t:
+            self.register(t)
+            tables.export_table(tower_cli.get_resource('host'), output,
+                                table_format='parquet')
+        output.seek(0)
+        table = tables.pyarrow.parquet.read_table(output)
+        self.assertEqual(table.column('enabled').to_pylist(), [True, False])
+        self.assertEqual(str(table.schema.field('inventory').type), 'int64')
@@ -16,6 +16,8 @@
 import click
 from click.testing import CliRunner
 
+from tower_cli.api import client
+from tower_cli.utils import exceptions as exc, types
 from tower_cli.utils.command import Command
 
 from tests.compat import unittest
@@ -45,3 +47,67 @@ class CommandTests(unittest.TestCase):
         result = self.runner.invoke(foo)
         self.assertIn('--help', result.output)
         self.assertIn('Show this message and exit.\n', result.output)
+
+    def test_related_options_resolved_together(self):
+        """Establish that related options given by names are looked up once
+        all options are parsed, and that the command receives primary keys.
+        """
+        @click.command(cls=Command)
+        @click.option('--user', type=types.Related('user'))
+        @click.option('--team', type=types.Related('team'))
+        @click.option('--other', type=types.Related('user'))
+        def foo(user, team, other):
+            click.echo('%r %r %r' % (user, team, other))
+
+        with client.test_mode as t:
+            t.register_json('/users/?username=bob', {
+                'count': 1, 'results': [{'id': 42}],
+            })
+            t.register_json('/teams/?name=red', {
+                'count': 1, 'results': [{'id': 84}],
+            })
+            result = self.runner.invoke(foo, ['--user', 'bob', '--team',
+                                              'red', '--other', '7'])
+            self.assertEqual(result.output, '42 84 7\n')
+            self.assertEqual(len(t.requests), 2)
+
+    def test_related_option_error(self):
+        """Establish that a deferred lookup that fails gives the same error
+        as an immediate one.
+        """
+        @click.command(cls=Command)
+        @click.option('--user', type=types.Related('user'))
+        def foo(user):
+            click.echo(user)
+
+        with client.test_mode as t:
+            t.register_json('/users/?username=bob', {}, status_code=404)
+            result = self.runner.invoke(foo, ['--user', 'bob'])
+            self.assertEqual(result.exit_code, exc.RelatedError.exit_code)
+            self.assertIn('Could not get user.', result.output)
+
+    def test_multiple_related_scoped_by_name(self):
+        """Establish that a list of related names is looked up after the
+        related options that narrow it, even when those are given by name,
+        and within their scope.
+        """
+        @click.command(cls=Command)
+        @click.option('--names', type=types.Related('host', multiple=True))
+        @click.option('--inventory', type=types.Related('inventory'))
+        def foo(names, inventory):
+            click.echo('%r %r' % (names, inventory))
+
+        with client.test_mode as t:
+            t.register_json('/inventories/?name=prod', {
+                'count': 1, 'results': [{'id': 5}],
+            })
+            t.register_json('/hosts/?inventory=5&name__in=web1%2Cweb2&'
+                            'page_size=100', {
+                                'count': 2, 'next': None, 'previous': None,
+                                'results': [{'id': 2, 'name': 'web2'},
+                                            {'id': 1, 'name': 'web1'}],
+                            })
+            result = self.runner.invoke(foo, ['--names', 'web1,web2',
+                                              '--inventory', 'prod'])
+            self.assertEqual(result.output, '[1, 2] 5\n')
+            self.assertEqual(len(t.requests), 2)
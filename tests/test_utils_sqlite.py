@@ -0,0 +1,62 @@
+# Copyright 2015, Ansible, Inc.
+# Luke Sneeringer <lsneeringer@ansible.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from tower_cli.utils.sqlite import Transaction
+
+from tests.compat import unittest
+
+
+class TransactionTests(unittest.TestCase):
+    """A set of tests to establish that SQLite transactions work in the
+    way that we expect.
+    """
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.filename = os.path.join(directory, 'test.db')
+        with Transaction(self.filename) as db:
+            db.execute('CREATE TABLE t (x INTEGER)')
+
+    def count(self):
+        with Transaction(self.filename) as db:
+            return db.execute('SELECT COUNT(*) FROM t').fetchone()[0]
+
+    def test_commit(self):
+        """Establish that statements are committed if they succeed."""
+        for immediate in (False, True):
+            with Transaction(self.filename, immediate=immediate) as db:
+                db.execute('INSERT INTO t VALUES (1)')
+        self.assertEqual(self.count(), 2)
+
+    def test_rollback(self):
+        """Establish that statements are rolled back if any fails, and
+        that the error is raised.
+        """
+        with self.assertRaises(ValueError):
+            with Transaction(self.filename) as db:
+                db.execute('INSERT INTO t VALUES (1)')
+                raise ValueError('Boom.')
+        self.assertEqual(self.count(), 0)
+
+    def test_closed(self):
+        """Establish that the connection is closed afterwards."""
+        with Transaction(self.filename) as db:
+            pass
+        with self.assertRaises(sqlite3.ProgrammingError):
+            db.execute('SELECT 1')
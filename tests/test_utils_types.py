@@ -130,3 +130,19 @@ class RelatedTests(unittest.TestCase):
         which is the resource name, but in uppercase.
         """
         self.assertEqual(self.related.get_metavar(None), 'USER')
+
+    def test_convert_multiple(self):
+        """Establish that a Related type accepting multiple values looks
+        all of the names up in one request, and returns the primary keys in
+        the order given.
+        """
+        related = types.Related('user', multiple=True)
+        with client.test_mode as t:
+            t.register_json('/users/?username__in=bob%2Cmeagan&page_size=100',
+                            {'count': 2, 'next': None, 'previous': None,
+                             'results': [{'id': 42, 'username': 'meagan'},
+                                         {'id': 84, 'username': 'bob'}]})
+            self.assertEqual(related.convert('bob, 7,meagan', None, None),
+                             [84, 7, 42])
+            self.assertEqual(len(t.requests), 1)
+        self.assertEqual(related.get_metavar(None), 'USERS')